@@ -0,0 +1,130 @@
+"""
+A benchmark for fetch_ccmixter.py against a local stand-in of the ccMixter query API.
+The stand-in serves a synthetic paged catalog (about 100k uploads by default), with some
+pages in latin-1 and some records carrying zero-padded numbers, like the real API.
+The crawler runs as a child process so its peak RSS can be reported on its own.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+
+SCRIPT_DIR = Path(__file__).parent
+
+
+def synthetic_upload(upload_id):
+    return {
+        "upload_id": upload_id,
+        "upload_name": f"Synthetic Track {upload_id}",
+        "user_real_name": f"Artist {upload_id % 997}",
+        "upload_date_format": "Mon, Jan 1, 2024 @ 12:00 PM",
+        "license_name": "Attribution (4.0)",
+        "upload_num_scores": upload_id % 50,
+        "upload_description_plain": "A synthetic upload used for benchmarking. " * 20,
+        "file_page_url": f"https://ccmixter.org/files/artist/{upload_id}",
+        "upload_extra": {"bpm": 80 + upload_id % 90, "usertags": "remix,electronic,house,bpm_above_140"},
+        "files": [
+            {
+                "file_name": f"track_{upload_id}_{idx}.mp3",
+                "file_filesize": " (4.52MB)",
+                "file_rawsize": 4739563,
+                "download_url": f"https://ccmixter.org/content/artist/track_{upload_id}_{idx}.mp3",
+                "file_format_info": {"default-ext": "mp3", "sr": "44k", "ch": "stereo"},
+            }
+            for idx in range(2)
+        ],
+    }
+
+
+def make_handler(total):
+    class CatalogHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+            offset = int(query["offset"][0])
+            limit = int(query["limit"][0])
+            items = [synthetic_upload(total - i) for i in range(offset, min(total, offset + limit))]
+
+            text = json.dumps(items).replace('"upload_num_scores": 7,', '"upload_num_scores": 007,')
+            if (offset // limit) % 11 == 10:
+                body = text.replace("Synthetic", "Synthétic").encode("latin-1")
+            else:
+                body = text.encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return CatalogHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark fetch_ccmixter.py against a local synthetic catalog",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--records",
+        type=int,
+        default=100_000,
+        help="Number of synthetic uploads"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Number of pages kept in flight"
+    )
+
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.records))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/query"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output = Path(tmp_dir) / "ccmixter_data.jsonl"
+        started = time.monotonic()
+        subprocess.run(
+            [sys.executable, str(SCRIPT_DIR / "fetch_ccmixter.py"),
+             "--base-url", base_url,
+             "--output", str(output),
+             "--concurrency", str(args.concurrency),
+             "--rate", "1000"],
+            stdout=subprocess.DEVNULL,
+            check=True
+        )
+        elapsed = time.monotonic() - started
+
+        with open(output, "r") as f:
+            records = sum(1 for _ in f)
+        size_mb = output.stat().st_size / 1024 / 1024
+
+    server.shutdown()
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    if sys.platform == "darwin":
+        peak_rss_mb /= 1024
+
+    print(f"Records written: {records} ({size_mb:.1f} MB)")
+    print(f"Elapsed: {elapsed:.1f}s ({records / elapsed:.0f} records/s, {size_mb / elapsed:.1f} MB/s)")
+    print(f"Crawler peak RSS: {peak_rss_mb:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+A benchmark for the preview progress updates in select_ccmixter.py.
+A local server hands out a synthetic (silent) MP3 preview as fast as it can, and the
+browser runs headless while the preview downloads. The download is measured twice:
+once delivering every 8 KB progress callback to the UI thread, as the player used to,
+and once through PlayerEvents, which coalesces and rate-limits them. Both runs report
+the UI updates and status panel refreshes per downloaded megabyte.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import select_ccmixter
+from ccmixter_store import AudioStore, PreviewCache
+
+
+# One MPEG-1 Layer III frame at 128 kbps / 44.1 kHz with an all-zero body, which decodes as silence.
+SILENT_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+def make_handler(body):
+    class PreviewHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return PreviewHandler
+
+
+async def measure(url, work_dir, throttled, timeout=60.0):
+    data_dir = Path(work_dir) / "dataset"
+    data_dir.mkdir(exist_ok=True)
+    with open(data_dir / "ccmixter_data.jsonl", "w") as f:
+        f.write(json.dumps({
+            "upload_id": 1,
+            "upload_name": "Benchmark preview",
+            "files": [{"file_name": "preview.mp3", "download_url": url}],
+        }) + "\n")
+
+    refreshes = 0
+    refresh_display = select_ccmixter.StatusPanel.refresh_display
+
+    def counting_refresh(panel):
+        nonlocal refreshes
+        refreshes += 1
+        refresh_display(panel)
+
+    select_ccmixter.StatusPanel.refresh_display = counting_refresh
+    app = select_ccmixter.CCMixterBrowser(None)
+    app.player.store = AudioStore(Path(work_dir) / "store")
+    app.player.cache = PreviewCache(app.player.store)
+    try:
+        async with app.run_test() as pilot:
+            await pilot.pause()
+            updates = 0
+            handler = app._play_callback
+
+            def counting_handler(*event):
+                nonlocal updates
+                updates += 1
+                handler(*event)
+
+            if throttled:
+                app.player_events = select_ccmixter.PlayerEvents(app, counting_handler)
+            else:
+                app.player_events = lambda *event: app.call_from_thread(counting_handler, *event)
+
+            refreshes = 0
+            started = time.monotonic()
+            app.action_play_music()
+            while app.player.is_downloading and time.monotonic() - started < timeout:
+                await asyncio.sleep(0.01)
+            elapsed = time.monotonic() - started
+            await pilot.pause(0.2)
+            app.action_play_music()
+            return updates, refreshes, elapsed
+    finally:
+        select_ccmixter.StatusPanel.refresh_display = refresh_display
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Count UI refreshes per downloaded megabyte in the ccMixter browser",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--size-mb",
+        type=float,
+        default=20.0,
+        help="Size of the synthetic preview in MB"
+    )
+
+    args = parser.parse_args()
+
+    frames = int(args.size_mb * 1024 * 1024) // len(SILENT_FRAME)
+    body = SILENT_FRAME * frames
+    size_mb = len(body) / 1024 / 1024
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(body))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/preview.mp3"
+
+    cwd = os.getcwd()
+    results = {}
+    for name, throttled in (("Every chunk", False), ("PlayerEvents", True)):
+        with tempfile.TemporaryDirectory() as work_dir:
+            os.chdir(work_dir)
+            try:
+                results[name] = asyncio.run(measure(url, work_dir, throttled))
+            finally:
+                os.chdir(cwd)
+
+    server.shutdown()
+
+    print(f"Preview: {size_mb:.1f} MB")
+    for name, (updates, refreshes, elapsed) in results.items():
+        print(f"{name}: {updates} UI updates ({updates / size_mb:.1f}/MB), "
+              f"{refreshes} status refreshes ({refreshes / size_mb:.1f}/MB), {elapsed:.2f}s to play")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+A benchmark for key latency in select_ccmixter.py on a large catalog.
+The browser runs headless on a synthetic catalog and, straight after startup while the
+search index is still being built in the background, presses keys that move the
+cursor (down, page down, end, home) at a steady pace, timing each press until the
+highlighted row changes. Filtering is timed too, by switching the table between
+every other upload and the whole catalog. The median and worst latencies are
+reported, and the script exits with an error if the worst key press took longer than
+--max-latency, so it doubles as a check that the table stays responsive.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from textual import events
+
+import select_ccmixter
+
+
+KEYS = ["down", "pagedown", "end", "home"]
+
+
+def write_catalog(path, rows):
+    with open(path, "w") as f:
+        for upload_id in range(rows, 0, -1):
+            f.write(json.dumps({
+                "upload_id": upload_id,
+                "upload_name": f"Synthetic track {upload_id}",
+                "user_real_name": f"Artist {upload_id % 500}",
+                "upload_extra": {"bpm": str(80 + upload_id % 80), "usertags": "house,instrumental,loop"},
+                "files": [{"file_name": f"{upload_id}.mp3", "download_url": f"http://127.0.0.1/{upload_id}.mp3"}],
+            }) + "\n")
+
+
+async def measure(presses, interval):
+    highlighted = asyncio.Event()
+    on_highlighted = select_ccmixter.CCMixterBrowser.on_upload_table_row_highlighted
+
+    def timed_highlight(app, event):
+        highlighted.set()
+        on_highlighted(app, event)
+
+    select_ccmixter.CCMixterBrowser.on_upload_table_row_highlighted = timed_highlight
+    started = time.perf_counter()
+    app = select_ccmixter.CCMixterBrowser(None)
+    try:
+        async with app.run_test() as pilot:
+            await pilot.pause()
+            startup = time.perf_counter() - started
+            indexing = app.search_index is None
+            key_latencies = []
+            for press in range(presses):
+                await asyncio.sleep(interval)
+                highlighted.clear()
+                pressed = time.perf_counter()
+                # Sent the way the terminal driver delivers real input.
+                app._driver.send_message(events.Key(KEYS[press % len(KEYS)], None))
+                await highlighted.wait()
+                key_latencies.append(time.perf_counter() - pressed)
+
+            filter_latencies = []
+            for rows in (range(0, len(app.catalog), 2), range(len(app.catalog))) * 5:
+                filtered = time.perf_counter()
+                app.show_rows(rows)
+                await asyncio.sleep(0)
+                filter_latencies.append(time.perf_counter() - filtered)
+            return startup, indexing, len(app.catalog), key_latencies, filter_latencies
+    finally:
+        select_ccmixter.CCMixterBrowser.on_upload_table_row_highlighted = on_highlighted
+
+
+def format_latencies(latencies):
+    return f"median {statistics.median(latencies) * 1000:.0f} ms, worst {max(latencies) * 1000:.0f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time key presses and filtering in the ccMixter browser on a large catalog",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=50000,
+        help="Number of uploads in the synthetic catalog"
+    )
+    parser.add_argument(
+        "--presses",
+        type=int,
+        default=40,
+        help="Number of key presses"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.05,
+        help="Seconds between key presses"
+    )
+    parser.add_argument(
+        "--max-latency",
+        type=float,
+        default=0.1,
+        help="Worst key latency in seconds that still passes"
+    )
+
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_dir = Path(work_dir) / "dataset"
+        data_dir.mkdir()
+        write_catalog(data_dir / "ccmixter_data.jsonl", args.rows)
+        os.chdir(work_dir)
+        try:
+            startup, indexing, rows, key_latencies, filter_latencies = asyncio.run(measure(args.presses, args.interval))
+        finally:
+            os.chdir(cwd)
+
+    worst = max(key_latencies)
+    print(f"Catalog: {rows} uploads, browser ready in {startup:.2f}s"
+          f"{' (keys pressed while the search index was built)' if indexing else ''}")
+    print(f"{len(key_latencies)} key presses: {format_latencies(key_latencies)}")
+    print(f"{len(filter_latencies)} filters: {format_latencies(filter_latencies)}")
+    if worst > args.max_latency:
+        sys.exit(f"Worst key latency {worst * 1000:.0f} ms exceeds {args.max_latency * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Compact, memory-mapped access to ccmixter_data.jsonl.
+The JSONL is converted once into ccmixter_data.catalog, a single file holding fixed-width
+columns (upload_id, BPM, file count, scores, string references and the byte offset of
+the full record in the JSONL), an open-addressing hash table from upload_id to row and
+a deduplicated string table for names, artists, tags and plain-text descriptions.
+Opening the catalog only maps the file, so loading and filtering costs milliseconds;
+finding an upload's row takes one hash probe on average, and its full record is parsed
+lazily with one seek into the JSONL. The catalog keeps the last line for each
+upload_id, orders rows newest first by upload_id (as the API lists them, whatever
+order --sync appended them in) and is rebuilt whenever the JSONL's size or mtime
+changes.
+It can also be built ahead of time by running this file.
+"""
+
+import argparse
+import array
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from pathlib import Path
+
+
+SCRIPT_DIR = Path(__file__).parent
+DATA_FILE = SCRIPT_DIR / "ccmixter_data.jsonl"
+CATALOG_SUFFIX = ".catalog"
+MAGIC = b"CCMXCAT3"
+HEADER = struct.Struct("<8sQqQQQ")
+COLUMNS = [
+    ("upload_ids", "I"),
+    ("bpms", "f"),
+    ("file_counts", "H"),
+    ("num_scores", "I"),
+    ("name_refs", "I"),
+    ("artist_refs", "I"),
+    ("tag_refs", "I"),
+    ("description_refs", "I"),
+    ("offsets", "Q"),
+    ("slots", "I"),
+]
+# Knuth's multiplicative hash; upload_ids are mostly consecutive, which it spreads evenly.
+HASH_MULTIPLIER = 2654435761
+
+
+def catalog_path(jsonl_filepath):
+    return Path(jsonl_filepath).with_suffix(CATALOG_SUFFIX)
+
+
+def parse_number(value):
+    match = re.search(r"\d+(?:\.\d+)?", str(value or ""))
+    return float(match.group()) if match else 0.0
+
+
+def padded(size):
+    return (size + 7) & ~7
+
+
+def slot_count(count):
+    """The size of the hash table for count rows: a power of two at least twice count."""
+    return 1 << (2 * count).bit_length()
+
+
+def hash_slot(upload_id, mask):
+    return (upload_id * HASH_MULTIPLIER) & mask
+
+
+def build_catalog(jsonl_filepath, output_filepath=None):
+    output_filepath = output_filepath or catalog_path(jsonl_filepath)
+    stat = os.stat(jsonl_filepath)
+    rows = {}
+    strings = {}
+
+    def intern(value):
+        return strings.setdefault(str(value or ""), len(strings))
+
+    with open(jsonl_filepath, "rb") as f:
+        offset = 0
+        for line in f:
+            try:
+                upload = json.loads(line)
+            except json.JSONDecodeError:
+                upload = {}
+            upload_id = upload.get("upload_id")
+            if isinstance(upload_id, int):
+                extra = upload.get("upload_extra") or {}
+                rows[upload_id] = (
+                    upload_id,
+                    parse_number(extra.get("bpm")),
+                    min(len(upload.get("files") or []), 0xFFFF),
+                    int(parse_number(upload.get("upload_num_scores"))),
+                    intern(upload.get("upload_name")),
+                    intern(upload.get("user_real_name")),
+                    intern(extra.get("usertags")),
+                    intern(upload.get("upload_description_plain")),
+                    offset,
+                )
+            offset += len(line)
+
+    values = sorted(rows.values(), key=lambda row: row[0], reverse=True)
+    columns = [array.array(code, (row[i] for row in values)) for i, (_, code) in enumerate(COLUMNS[:-1])]
+    # Each slot holds row + 1 of the upload_id hashed there (or after it), 0 if empty.
+    slots = array.array("I", bytes(4 * slot_count(len(values))))
+    mask = len(slots) - 1
+    for row, value in enumerate(values):
+        slot = hash_slot(value[0], mask)
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = row + 1
+    columns.append(slots)
+
+    encoded = [value.encode("utf-8") for value in strings]
+    string_offsets = array.array("Q", [0])
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    tmp_path = output_filepath.with_name(output_filepath.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, stat.st_size, stat.st_mtime_ns, len(values), len(encoded), string_offsets[-1]))
+        for column in columns + [string_offsets]:
+            data = column.tobytes()
+            f.write(data + b"\0" * (padded(len(data)) - len(data)))
+        f.write(b"".join(encoded))
+    os.replace(tmp_path, output_filepath)
+    return len(values)
+
+
+class Catalog:
+    def __init__(self, jsonl_filepath):
+        self.path = Path(jsonl_filepath)
+        self.catalog_path = catalog_path(self.path)
+        self.mmap = None
+        self.views = []
+
+        if not self._open():
+            build_catalog(self.path, self.catalog_path)
+            if not self._open():
+                raise ValueError(f"Invalid catalog file: {self.catalog_path}")
+
+        self.file = open(self.path, "rb")
+        self.lock = threading.Lock()
+
+    def _open(self):
+        stat = os.stat(self.path)
+        try:
+            with open(self.catalog_path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+
+        views = []
+        try:
+            magic, size, mtime_ns, count, string_count, string_bytes = HEADER.unpack_from(mapped)
+            counts = {"slots": slot_count(count), "string_offsets": string_count + 1}
+            lengths = [counts.get(name, count) * struct.calcsize(code)
+                       for name, code in COLUMNS + [("string_offsets", "Q")]]
+            if magic != MAGIC or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+                raise ValueError("Stale catalog")
+            if HEADER.size + sum(padded(length) for length in lengths) + string_bytes != len(mapped):
+                raise ValueError("Truncated catalog")
+
+            view = memoryview(mapped)
+            views.append(view)
+            pos = HEADER.size
+            columns = {}
+            for (name, code), length in zip(COLUMNS + [("string_offsets", "Q")], lengths):
+                columns[name] = view[pos:pos + length].cast(code)
+                views.append(columns[name])
+                pos += padded(length)
+            string_data = view[pos:pos + string_bytes]
+            views.append(string_data)
+        except (struct.error, TypeError, ValueError):
+            # A stale, truncated or foreign file is rebuilt.
+            for view in reversed(views):
+                view.release()
+            mapped.close()
+            return False
+
+        for name, column in columns.items():
+            setattr(self, name, column)
+        self.string_data = string_data
+        self.views = views
+        self.mmap = mapped
+        return True
+
+    def __contains__(self, upload_id):
+        return self.row(upload_id) is not None
+
+    def __len__(self):
+        return len(self.upload_ids)
+
+    def ids(self):
+        return self.upload_ids
+
+    def row(self, upload_id):
+        mask = len(self.slots) - 1
+        slot = hash_slot(upload_id, mask)
+        while self.slots[slot]:
+            row = self.slots[slot] - 1
+            if self.upload_ids[row] == upload_id:
+                return row
+            slot = (slot + 1) & mask
+        return None
+
+    def string(self, index):
+        return str(self.string_data[self.string_offsets[index]:self.string_offsets[index + 1]], "utf-8")
+
+    def name(self, row):
+        return self.string(self.name_refs[row])
+
+    def artist(self, row):
+        return self.string(self.artist_refs[row])
+
+    def tags(self, row):
+        return self.string(self.tag_refs[row])
+
+    def description(self, row):
+        return self.string(self.description_refs[row])
+
+    def get(self, upload_id):
+        row = self.row(upload_id)
+        if row is None:
+            return None
+        return self.record(row)
+
+    def record(self, row):
+        with self.lock:
+            self.file.seek(self.offsets[row])
+            line = self.file.readline()
+        return json.loads(line)
+
+    def close(self):
+        self.file.close()
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert ccmixter_data.jsonl into a compact, memory-mapped catalog",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "jsonl",
+        nargs="?",
+        type=Path,
+        default=DATA_FILE,
+        help="ccMixter JSONL file"
+    )
+
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    count = build_catalog(args.jsonl)
+    built = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with Catalog(args.jsonl) as catalog:
+        opened = time.perf_counter() - started
+        size_mb = catalog.catalog_path.stat().st_size / 1024 / 1024
+        print(f"Catalog: {catalog.catalog_path} ({count} uploads, {size_mb:.1f} MB)")
+    print(f"Built in {built:.2f}s, opened in {opened * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
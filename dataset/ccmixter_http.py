@@ -0,0 +1,197 @@
+"""
+Shared HTTP(S) transport for the ccMixter scripts.
+Connections are pooled per host and kept alive between requests, so fetching,
+downloading and previewing only pay for a TLS handshake when no idle connection
+to the host is left. Responses are negotiated with gzip/deflate and every request
+carries the standard ccMixter headers (Referer, User-Agent).
+"""
+
+import http.client
+import ssl
+import threading
+import urllib.parse
+import zlib
+from urllib.error import URLError, HTTPError
+
+
+HEADERS = {
+    'Referer': 'https://ccmixter.org/',
+    'User-Agent': 'DJ-LLM',
+    'Accept-Encoding': 'gzip, deflate',
+}
+TIMEOUT = 60
+MAX_IDLE_PER_HOST = 8
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError, BrokenPipeError)
+
+http.client._MAXLINE = 1048576
+
+
+class Response:
+    def __init__(self, pool, key, conn, response, url):
+        self.pool = pool
+        self.key = key
+        self.conn = conn
+        self.response = response
+        self.url = url
+        self.status = response.status
+        self.headers = response.headers
+        self.bytes_received = 0
+        self.decoder = None
+
+        encoding = response.headers.get('Content-Encoding', '').lower()
+        if encoding == 'gzip':
+            self.decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            self.decoder = zlib.decompressobj()
+
+        length = response.headers.get('Content-Length')
+        self.length = int(length) if length and self.decoder is None else None
+
+    def read(self, amt=None):
+        result = b''
+        while self.conn is not None and not result:
+            data = self.response.read() if amt is None else self.response.read(amt)
+            self.bytes_received += len(data)
+            result = self.decoder.decompress(data) if self.decoder else data
+            if not data or self.response.isclosed():
+                if self.decoder:
+                    result += self.decoder.flush()
+                self._release()
+        return result
+
+    def _release(self):
+        if self.conn is not None:
+            self.pool.release(self.key, self.conn, reusable=not self.response.will_close)
+            self.conn = None
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    def __init__(self, max_idle_per_host=MAX_IDLE_PER_HOST, timeout=TIMEOUT):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self.idle = {}
+        self.lock = threading.Lock()
+        self.ssl_context = ssl.create_default_context()
+        self.ssl_context.check_hostname = False
+        self.ssl_context.verify_mode = ssl.CERT_NONE
+        self.stats = {
+            'requests': 0,
+            'connections_opened': 0,
+            'connections_reused': 0,
+            'handshakes_avoided': 0,
+        }
+
+    def acquire(self, key):
+        with self.lock:
+            idle = self.idle.get(key)
+            if idle:
+                return idle.pop(), True
+
+        scheme, netloc = key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(netloc, context=self.ssl_context, timeout=self.timeout), False
+        return http.client.HTTPConnection(netloc, timeout=self.timeout), False
+
+    def record(self, key, reused):
+        with self.lock:
+            self.stats['requests'] += 1
+            if not reused:
+                self.stats['connections_opened'] += 1
+                return
+            self.stats['connections_reused'] += 1
+            if key[0] == 'https':
+                self.stats['handshakes_avoided'] += 1
+
+    def release(self, key, conn, reusable=True):
+        if reusable:
+            with self.lock:
+                idle = self.idle.setdefault(key, [])
+                if len(idle) < self.max_idle_per_host:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def request(self, url, headers=None, method='GET', body=None):
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._request_once(url, headers, method, body)
+
+            if response.status in REDIRECT_STATUSES and response.headers.get('Location'):
+                response.read()
+                url = urllib.parse.urljoin(url, response.headers['Location'])
+                if response.status == 303:
+                    method, body = 'GET', None
+                continue
+
+            if response.status >= 400:
+                response.close()
+                raise HTTPError(url, response.status, response.response.reason, response.headers, None)
+
+            return response
+
+        raise URLError(f"Too many redirects for {url}")
+
+    def _request_once(self, url, headers, method, body):
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        request_headers = dict(HEADERS)
+        if headers:
+            request_headers.update(headers)
+
+        while True:
+            conn, reused = self.acquire(key)
+            try:
+                conn.request(method, path, body=body, headers=request_headers)
+                response = conn.getresponse()
+            except STALE_ERRORS as e:
+                conn.close()
+                if not reused:
+                    raise URLError(e)
+                continue
+            except OSError as e:
+                conn.close()
+                raise URLError(e)
+
+            self.record(key, reused)
+            return Response(self, key, conn, response, url)
+
+    def close(self):
+        with self.lock:
+            for idle in self.idle.values():
+                for conn in idle:
+                    conn.close()
+            self.idle.clear()
+
+
+POOL = ConnectionPool()
+
+
+def request(url, headers=None, method='GET', body=None):
+    return POOL.request(url, headers=headers, method=method, body=body)
+
+
+def stats():
+    with POOL.lock:
+        return dict(POOL.stats)
+
+
+def format_stats():
+    s = stats()
+    return (f"{s['requests']} requests over {s['connections_opened']} connections, "
+            f"{s['connections_reused']} reused ({s['handshakes_avoided']} TLS handshakes avoided)")
@@ -0,0 +1,235 @@
+"""
+An index of the audio facts of the local music library.
+Library keeps library.json in the music directory with one entry per MP3 file: the
+file's size and mtime plus the duration, bitrate, sample rate and channel count
+mutagen reads from it, and the number of MPEG audio frames. The frame count comes from
+the Xing/Info or VBRI header an encoder writes into the first frame, or, for files
+without one, from walking the frame headers with mutagen. A scan only probes files
+whose size or mtime changed since the last one, across a pool of processes, and drops
+entries for files that are gone, so the browser, the downloader's summary and
+decode_ccmixter.py can look these facts up without opening the audio again.
+It can also be run on its own to scan the library and print a summary.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from mutagen.mp3 import (MP3, HeaderNotFoundError, MPEGFrame, VBRIHeader, VBRIHeaderError, XingHeader,
+                         XingHeaderError)
+
+
+SCRIPT_DIR = Path(__file__).parent
+MUSIC_DIR = SCRIPT_DIR / "music"
+INDEX_FILE = "library.json"
+POOL_MIN_FILES = 32
+POOL_CHUNK_SIZE = 16
+
+
+def count_frames(f, info):
+    """
+    The number of audio frames in an open MP3 file whose stream mutagen has read into info:
+    the count in the Xing/Info or VBRI header of the first frame if it has one, otherwise
+    the whole frames walked from there up to the first bytes that are no frame (such as an
+    ID3v1 tag), not counting a header frame.
+    """
+    header_frames = 0
+    if info.layer == 3:
+        for header, error in ((XingHeader, XingHeaderError), (VBRIHeader, VBRIHeaderError)):
+            f.seek(info.frame_offset + header.get_offset(info))
+            try:
+                frames = header(f).frames
+            except error:
+                continue
+            if frames != -1:
+                return frames
+            header_frames = 1
+            break
+
+    size = os.fstat(f.fileno()).st_size
+    f.seek(info.frame_offset)
+    frames = 0
+    while True:
+        try:
+            MPEGFrame(f)
+        except HeaderNotFoundError:
+            break
+        # A frame cut off by the end of the file does not count.
+        if f.tell() > size:
+            break
+        frames += 1
+    return frames - header_frames
+
+
+def probe_file(path):
+    """Read the audio facts of one MP3 file, or the reason they could not be read."""
+    try:
+        info = MP3(path).info
+        with open(path, "rb") as f:
+            frames = count_frames(f, info)
+    except Exception as e:
+        return {"error": str(e) or type(e).__name__}
+    return {
+        "duration": info.length,
+        "bitrate": info.bitrate,
+        "sample_rate": info.sample_rate,
+        "channels": info.channels,
+        "frames": frames,
+    }
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def format_entry(entry):
+    if "error" in entry:
+        return f"unreadable ({entry['error']})"
+    channels = {1: "mono", 2: "stereo"}.get(entry["channels"], f"{entry['channels']} channels")
+    return (f"{format_duration(entry['duration'])}, {entry['bitrate'] // 1000} kbps, "
+            f"{entry['sample_rate'] / 1000:g} kHz, {channels}, {entry['frames']} frames")
+
+
+class Library:
+    def __init__(self, music_dir=MUSIC_DIR, index_path=None):
+        self.music_dir = Path(music_dir)
+        self.path = Path(index_path) if index_path else self.music_dir / INDEX_FILE
+        self.lock = threading.Lock()
+        self.uploads = None
+        try:
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def scan(self, workers=None):
+        """Bring the index up to date; returns the number of files probed, kept and removed."""
+        files = {}
+        if self.music_dir.exists():
+            for path in self.music_dir.glob("*.mp3"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files[path.name] = (stat.st_size, stat.st_mtime_ns)
+
+        with self.lock:
+            entries = dict(self.entries)
+        removed = [name for name in entries if name not in files]
+        pending = [
+            name for name, (size, mtime_ns) in files.items()
+            if name not in entries or (entries[name]["size"], entries[name]["mtime_ns"]) != (size, mtime_ns)
+        ]
+
+        paths = [str(self.music_dir / name) for name in pending]
+        if len(paths) < POOL_MIN_FILES:
+            results = [probe_file(path) for path in paths]
+        else:
+            # The browser scans from a thread, where forking the process is not safe.
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                results = list(pool.map(probe_file, paths, chunksize=POOL_CHUNK_SIZE))
+
+        for name in removed:
+            del entries[name]
+        for name, facts in zip(pending, results):
+            size, mtime_ns = files[name]
+            entries[name] = {"size": size, "mtime_ns": mtime_ns, **facts}
+
+        with self.lock:
+            self.entries = entries
+            self.uploads = None
+        if pending or removed:
+            self.save()
+        return len(pending), len(files) - len(pending), len(removed)
+
+    def get(self, name):
+        """The entry for a file in the music directory, if it is indexed and unchanged."""
+        with self.lock:
+            entry = self.entries.get(name)
+        if entry is None:
+            return None
+        try:
+            stat = (self.music_dir / name).stat()
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+            return None
+        return entry
+
+    def for_upload(self, upload_id):
+        """The (name, entry) pairs of the files downloaded for an upload."""
+        with self.lock:
+            if self.uploads is None:
+                self.uploads = {}
+                for name, entry in sorted(self.entries.items()):
+                    prefix = name.split("_", 1)[0]
+                    if prefix.isdigit():
+                        self.uploads.setdefault(int(prefix), []).append((name, entry))
+            return self.uploads.get(upload_id, [])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def format_summary(self, names=None):
+        with self.lock:
+            entries = [self.entries[name] for name in (self.entries if names is None else names) if name in self.entries]
+        readable = [entry for entry in entries if "error" not in entry]
+        if not readable:
+            return f"{len(entries)} files"
+        duration = sum(entry["duration"] for entry in readable)
+        bitrate = sum(entry["bitrate"] for entry in readable) / len(readable)
+        summary = f"{len(entries)} files, {format_duration(duration)} of audio, {bitrate / 1000:.0f} kbps on average"
+        if len(readable) < len(entries):
+            summary += f", {len(entries) - len(readable)} unreadable"
+        return summary
+
+    def save(self):
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with self.lock:
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Index the duration, bitrate and format of the downloaded music",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--music-dir",
+        type=Path,
+        default=MUSIC_DIR,
+        help="Directory with the downloaded MP3 files"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of scanning processes"
+    )
+
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    library = Library(args.music_dir)
+    probed, kept, removed = library.scan(args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(f"Scanned {args.music_dir} in {elapsed:.2f}s: {probed} probed, {kept} unchanged, {removed} removed")
+    print(f"Library: {library.format_summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+The in-memory model behind the ccMixter browser.
+UploadModel maps every upload_id to its catalog row once at load time, and keeps a
+bounded cache of UploadView objects: the parsed record together with its MP3 files
+and the escaped strings the metadata panel shows. Moving the cursor back over an
+upload or switching between its versions therefore never re-parses, re-filters or
+re-formats anything.
+"""
+
+from collections import OrderedDict
+
+
+VIEW_CACHE_SIZE = 1024
+DESCRIPTION_LENGTH = 300
+
+
+def escape(text):
+    return str(text).replace('[', '\\[').replace(']', '\\]')
+
+
+class UploadView:
+    def __init__(self, upload):
+        self.upload = upload
+        self.upload_id = upload.get('upload_id')
+        self.mp3_files = [f for f in upload.get('files', []) if f.get('file_name', '').lower().endswith('.mp3')]
+        self.file_lines = [
+            f"({i}) {escape(f.get('file_name', 'Unknown'))} {escape(f.get('file_filesize', ''))}"
+            for i, f in enumerate(self.mp3_files)
+        ]
+
+        extra = upload.get('upload_extra', {})
+        self.header = f"""[bold cyan]{escape(upload.get('upload_name', 'N/A'))}[/bold cyan]
+
+[yellow]Artist:[/yellow] {escape(upload.get('user_real_name', 'N/A'))}
+[yellow]Upload ID:[/yellow] {escape(upload.get('upload_id', 'N/A'))}
+[yellow]Date:[/yellow] {escape(upload.get('upload_date_format', 'N/A'))}
+[yellow]License:[/yellow] {escape(upload.get('license_name', 'N/A'))}
+[yellow]Tags:[/yellow] {escape(extra.get('usertags', 'N/A'))}
+[yellow]BPM:[/yellow] {escape(extra.get('bpm', 'N/A'))}
+[yellow]Scores:[/yellow] {escape(upload.get('upload_num_scores', 0))}
+
+[yellow]Versions:[/yellow]
+"""
+        self.footer = f"""
+[yellow]Description:[/yellow]
+{escape(upload.get('upload_description_plain', 'N/A'))[:DESCRIPTION_LENGTH]}
+
+[yellow]Page:[/yellow] {escape(upload.get('file_page_url', 'N/A'))}
+"""
+
+    def mp3_file(self, index):
+        if not self.mp3_files:
+            return None
+        return self.mp3_files[index if index < len(self.mp3_files) else 0]
+
+    def render(self, selected_file_index=0):
+        files_list = "".join(
+            f"{'▶' if i == selected_file_index else ' '} {line}\n"
+            for i, line in enumerate(self.file_lines)
+        )
+        return self.header + files_list + self.footer
+
+
+class UploadModel:
+    def __init__(self, catalog, cache_size=VIEW_CACHE_SIZE):
+        self.catalog = catalog
+        self.rows = {upload_id: row for row, upload_id in enumerate(catalog.upload_ids)}
+        self.cache_size = cache_size
+        self.views = OrderedDict()
+
+    def __contains__(self, upload_id):
+        return upload_id in self.rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def row(self, upload_id):
+        return self.rows.get(upload_id)
+
+    def view(self, upload_id):
+        view = self.views.get(upload_id)
+        if view is not None:
+            self.views.move_to_end(upload_id)
+            return view
+
+        row = self.rows.get(upload_id)
+        if row is None:
+            return None
+        view = UploadView(self.catalog.record(row))
+        self.views[upload_id] = view
+        if len(self.views) > self.cache_size:
+            self.views.popitem(last=False)
+        return view
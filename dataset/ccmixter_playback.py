@@ -0,0 +1,148 @@
+"""
+Sample-accurate playback of decoded previews for the ccMixter browser.
+PCMEngine decodes a file once (with pygame's SDL_mixer, at the mixer's own format)
+and plays the PCM by feeding short chunks into a reserved mixer channel from a
+background thread. Seeking only moves the read cursor, pausing pauses the channel,
+and the position is counted from the frames the mixer has finished with plus the
+time spent in the current chunk, which is bounded by the chunk's length so it
+cannot drift. While nothing is loaded or playback is paused, the thread sleeps until
+load() or resume() wakes it.
+"""
+
+import threading
+import time
+
+import pygame
+
+
+CHUNK_FRAMES = 2048
+FEED_INTERVAL = 0.005
+
+
+def decode(path):
+    return pygame.mixer.Sound(path).get_raw()
+
+
+class PCMEngine:
+    def __init__(self):
+        self.frequency, size, self.channels = pygame.mixer.get_init()
+        self.frame_bytes = abs(size) // 8 * self.channels
+        pygame.mixer.set_reserved(1)
+        self.channel = pygame.mixer.Channel(0)
+        self.lock = threading.Lock()
+        self.wake = threading.Condition(self.lock)
+        self.pcm = memoryview(b"")
+        self.frames = 0
+        self.cursor = 0
+        self.playing_start = 0
+        self.playing_frames = 0
+        self.queued = None
+        self.chunk_started = 0.0
+        self.paused_at = None
+        self.active = False
+        self.thread = threading.Thread(target=self._feed, daemon=True)
+        self.thread.start()
+
+    @property
+    def duration(self):
+        return self.frames / self.frequency
+
+    def load(self, pcm, position=0.0, paused=False):
+        with self.lock:
+            self.channel.stop()
+            self.pcm = memoryview(pcm)
+            self.frames = len(pcm) // self.frame_bytes
+            self.active = True
+            self.paused_at = time.monotonic() if paused else None
+            self._seek(position)
+            self.wake.notify()
+
+    def _seek(self, position):
+        self.channel.stop()
+        frame = min(max(0, int(position * self.frequency)), self.frames)
+        self.cursor = frame
+        self.playing_start = frame
+        self.playing_frames = 0
+        self.queued = None
+        self.chunk_started = time.monotonic()
+        if self.paused_at is not None:
+            self.paused_at = self.chunk_started
+
+    def seek(self, position):
+        with self.lock:
+            if self.active:
+                self._seek(position)
+
+    def _next_chunk(self):
+        start = self.cursor
+        end = min(start + CHUNK_FRAMES, self.frames)
+        self.cursor = end
+        sound = pygame.mixer.Sound(buffer=self.pcm[start * self.frame_bytes:end * self.frame_bytes])
+        return sound, start, end - start
+
+    def _feed(self):
+        while True:
+            with self.lock:
+                while not self.active or self.paused_at is not None:
+                    self.wake.wait()
+                self._feed_chunks()
+            time.sleep(FEED_INTERVAL)
+
+    def _feed_chunks(self):
+        now = time.monotonic()
+        if self.queued and self.channel.get_queue() is None:
+            # The mixer moved on to the queued chunk: the previous one is consumed.
+            self.playing_start, self.playing_frames = self.queued
+            self.queued = None
+            self.chunk_started = now
+
+        if not self.channel.get_busy():
+            if self.cursor >= self.frames:
+                self.playing_start, self.playing_frames = self.frames, 0
+                self.active = False
+                return
+            sound, self.playing_start, self.playing_frames = self._next_chunk()
+            self.queued = None
+            self.channel.play(sound)
+            self.chunk_started = now
+
+        if self.queued is None and self.cursor < self.frames:
+            sound, start, frames = self._next_chunk()
+            self.channel.queue(sound)
+            self.queued = (start, frames)
+
+    def position(self):
+        with self.lock:
+            now = self.paused_at if self.paused_at is not None else time.monotonic()
+            within = min(int((now - self.chunk_started) * self.frequency), self.playing_frames)
+            return (self.playing_start + max(0, within)) / self.frequency
+
+    def pause(self):
+        with self.lock:
+            if self.active and self.paused_at is None:
+                self.channel.pause()
+                self.paused_at = time.monotonic()
+
+    def resume(self):
+        with self.lock:
+            if self.paused_at is not None:
+                self.chunk_started += time.monotonic() - self.paused_at
+                self.paused_at = None
+                self.channel.unpause()
+                self.wake.notify()
+
+    @property
+    def paused(self):
+        return self.paused_at is not None
+
+    def is_active(self):
+        return self.active
+
+    def stop(self):
+        with self.lock:
+            self.active = False
+            self.paused_at = None
+            self.queued = None
+            self.channel.stop()
+            self.pcm = memoryview(b"")
+            self.frames = 0
@@ -0,0 +1,146 @@
+"""
+Search over the ccMixter catalog for the browser.
+SearchIndex builds an inverted index from words to catalog rows for the upload name,
+artist, tags and description, plus a BPM-sorted permutation of the rows for range
+queries. Queries are whitespace-separated terms that must all match:
+
+    deep house              words anywhere (the last one is matched as a prefix)
+    tag:house               a tag from usertags
+    artist:ali name:dub     a word in one field (also description:)
+    bpm:120-128             a BPM range (bpm:120, bpm:120- and bpm:-90 also work)
+
+Results are catalog rows in catalog order (newest first), so a query costs a few set operations.
+"""
+
+import array
+import bisect
+import re
+from collections import OrderedDict
+
+
+FIELDS = ["name", "artist", "tag", "description"]
+WORD = re.compile(r"\w+")
+BPM_RANGE = re.compile(r"^(\d+(?:\.\d+)?)?(-)?(\d+(?:\.\d+)?)?$")
+TERM_CACHE_SIZE = 64
+MIN_PREFIX = 2
+
+
+def words(text):
+    return set(WORD.findall(str(text or "").lower()))
+
+
+def split_tags(text):
+    return {tag.strip() for tag in str(text or "").lower().split(",") if tag.strip()}
+
+
+class SearchIndex:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.postings = {field: {} for field in FIELDS}
+        self.tokens = {}
+        self.terms = OrderedDict()
+
+        string_words = {}
+        string_tags = {}
+
+        def add(field, row, tokens):
+            postings = self.postings[field]
+            for token in tokens:
+                rows = postings.get(token)
+                if rows is None:
+                    postings[token] = rows = array.array("I")
+                rows.append(row)
+
+        # Rows are visited in order, so every posting list ends up sorted.
+        for row in range(len(catalog)):
+            for field, refs in (("name", catalog.name_refs), ("artist", catalog.artist_refs)):
+                ref = refs[row]
+                if ref not in string_words:
+                    string_words[ref] = words(catalog.string(ref))
+                add(field, row, string_words[ref])
+
+            ref = catalog.tag_refs[row]
+            if ref not in string_tags:
+                string_tags[ref] = split_tags(catalog.string(ref))
+            add("tag", row, string_tags[ref])
+
+            add("description", row, words(catalog.description(row)))
+
+        for field in FIELDS:
+            self.tokens[field] = sorted(self.postings[field])
+
+        self.bpm_rows = array.array("I", sorted(range(len(catalog)), key=catalog.bpms.__getitem__))
+        self.bpm_values = array.array("f", (catalog.bpms[row] for row in self.bpm_rows))
+
+    def postings_for(self, field, token, prefix):
+        postings = self.postings[field]
+        if not prefix:
+            return [postings[token]] if token in postings else []
+
+        tokens = self.tokens[field]
+        start = bisect.bisect_left(tokens, token)
+        end = bisect.bisect_left(tokens, token + "\uffff", start)
+        return [postings[name] for name in tokens[start:end]]
+
+    def match_bpm(self, value):
+        match = BPM_RANGE.match(value)
+        if not match or not (match.group(1) or match.group(3)):
+            return set()
+        low, dash, high = match.groups()
+        low = float(low) if low else 0.0
+        high = float(high) if high else (float("inf") if dash else low)
+        start = bisect.bisect_left(self.bpm_values, low)
+        end = bisect.bisect_right(self.bpm_values, high)
+        return set(self.bpm_rows[max(start, bisect.bisect_right(self.bpm_values, 0.0)):end])
+
+    def match_term(self, term, prefix):
+        key = (term, prefix)
+        if key in self.terms:
+            self.terms.move_to_end(key)
+            return self.terms[key]
+
+        field, _, value = term.partition(":")
+        if not value or (field not in FIELDS and field != "bpm"):
+            field, value = None, term
+
+        if field == "bpm":
+            rows = self.match_bpm(value)
+        elif field == "tag":
+            rows = set().union(*self.postings_for(field, value, prefix))
+        else:
+            rows = None
+            for token in WORD.findall(value):
+                token_rows = set().union(*(
+                    rows for name in ([field] if field else FIELDS)
+                    for rows in self.postings_for(name, token, prefix)
+                ))
+                rows = token_rows if rows is None else rows & token_rows
+
+        self.terms[key] = rows
+        if len(self.terms) > TERM_CACHE_SIZE:
+            self.terms.popitem(last=False)
+        return rows
+
+    def search(self, query):
+        terms = query.lower().split()
+        if not terms:
+            return None
+
+        # The last term is still being typed unless it is followed by a space; until it
+        # is long enough to narrow things down it is left out.
+        prefixes = [False] * len(terms)
+        prefixes[-1] = not query[-1:].isspace()
+        if prefixes[-1] and len(terms[-1]) < MIN_PREFIX:
+            terms.pop()
+            prefixes.pop()
+        sets = [self.match_term(term, prefix) for term, prefix in zip(terms, prefixes)]
+        sets = sorted((rows for rows in sets if rows is not None), key=len)
+        if not sets:
+            return None
+
+        rows = sets[0]
+        for other in sets[1:]:
+            rows = rows & other
+            if not rows:
+                break
+        return sorted(rows)
@@ -0,0 +1,286 @@
+"""
+The selection journal behind select_ccmixter.py and download_ccmixter.py.
+Every select or unselect appends one line to selected_uploads.journal:
+
+    <unix time>\t<+ or ->\t<upload_id>\t<label>
+
+Labels group selections into subsets (a task, a split, ...); an upload can carry
+several of them, and the browser selects under "default" unless told otherwise.
+Toggling therefore costs one short append, and the most recent selection still in
+effect is known exactly.
+
+Once the journal holds well over twice its live entries it is compacted in the
+background: it is rewritten as one "+" line per live selection, oldest first, under a
+"# compacted <generation>" header, and snapshots are written next to it, one
+selected_uploads.<label>.txt per label plus selected_uploads.txt with every selected
+upload. Snapshots hold nothing but upload IDs, one per line, as selected_uploads.txt
+always has. The sidecar selected_uploads.snapshot records "<generation> <offset>" for
+them, so a reader takes the snapshots and only replays the journal from that offset;
+if it is missing or its generation disagrees with the journal's (a compaction was
+interrupted) the reader falls back to replaying the whole journal.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+SCRIPT_DIR = Path(__file__).parent
+JOURNAL_FILE = SCRIPT_DIR / "selected_uploads.journal"
+SNAPSHOT_FILE = SCRIPT_DIR / "selected_uploads.txt"
+SIDECAR_SUFFIX = ".snapshot"
+DEFAULT_LABEL = "default"
+LABEL = re.compile(r"^[A-Za-z0-9_-]+$")
+COMPACT_MIN_ENTRIES = 256
+
+
+def check_label(label):
+    if not LABEL.match(label):
+        raise ValueError(f"Invalid label: {label!r} (use letters, digits, '_' and '-')")
+    return label
+
+
+def snapshot_path(label=None, base=SNAPSHOT_FILE):
+    base = Path(base)
+    if label is None:
+        return base
+    return base.with_name(f"{base.stem}.{label}{base.suffix}")
+
+
+def sidecar_path(base=SNAPSHOT_FILE):
+    return Path(base).with_suffix(SIDECAR_SUFFIX)
+
+
+def parse_entry(line):
+    """Parse a journal line into (timestamp, selected, upload_id, label), or None."""
+    parts = line.rstrip("\n").split("\t")
+    if len(parts) != 4 or parts[1] not in ("+", "-") or not LABEL.match(parts[3]):
+        return None
+    try:
+        return float(parts[0]), parts[1] == "+", int(parts[2]), parts[3]
+    except ValueError:
+        return None
+
+
+def replay(lines, entries, label=None):
+    """Apply journal lines to entries, an OrderedDict of (upload_id, label) -> timestamp."""
+    count = 0
+    for line in lines:
+        entry = parse_entry(line)
+        if entry is None:
+            continue
+        timestamp, selected, upload_id, entry_label = entry
+        count += 1
+        if label is not None and entry_label != label:
+            continue
+        key = (upload_id, entry_label)
+        entries.pop(key, None)
+        if selected:
+            entries[key] = timestamp
+    return count
+
+
+def read_header(line, kind):
+    parts = line.split()
+    if len(parts) >= 3 and parts[0] == "#" and parts[1] == kind:
+        return parts[2:]
+    return None
+
+
+def read_sidecar(base):
+    """Return (generation, offset) of the snapshots next to base, or None if there are none."""
+    try:
+        with open(sidecar_path(base), "r") as f:
+            generation, offset = f.read().split()
+        return generation, int(offset)
+    except (OSError, ValueError):
+        return None
+
+
+def read_snapshot(path):
+    """Return the upload IDs in a snapshot, or None if it is unusable."""
+    try:
+        with open(path, "r") as f:
+            return [int(line) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return None
+
+
+def read_selection(label=None, journal_path=JOURNAL_FILE, snapshot_base=SNAPSHOT_FILE):
+    """
+    Return the upload IDs selected under label (or under any label), in selection order,
+    from the snapshots plus the journal written since the last compaction.
+    """
+    journal_path = Path(journal_path)
+    base = Path(snapshot_base)
+    if not journal_path.exists():
+        # Selections saved before the journal existed: a plain list of IDs.
+        with open(base, "r") as f:
+            return [int(line) for line in f if line.strip()]
+
+    with open(journal_path, "r") as f:
+        header = read_header(f.readline(), "compacted")
+        sidecar = read_sidecar(base)
+        entries = OrderedDict()
+        offset = 0
+        if header and sidecar and sidecar[0] == header[0]:
+            offset = sidecar[1]
+            if label is None:
+                labels = [path.name[len(base.stem) + 1:-len(base.suffix)]
+                          for path in sorted(base.parent.glob(f"{base.stem}.*{base.suffix}"))]
+            else:
+                labels = [label]
+            for name in labels:
+                # Labels without a snapshot had nothing selected at the compaction.
+                for upload_id in read_snapshot(snapshot_path(name, base)) or []:
+                    entries[(upload_id, name)] = 0.0
+        f.seek(offset)
+        replay(f, entries, label)
+
+    return list(OrderedDict.fromkeys(upload_id for upload_id, _ in entries))
+
+
+class SelectionJournal:
+    def __init__(self, journal_path=JOURNAL_FILE, snapshot_base=SNAPSHOT_FILE):
+        self.path = Path(journal_path)
+        self.snapshot_base = Path(snapshot_base)
+        self.lock = threading.Lock()
+        self.compact_lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.labels = {}
+        self.lines = 0
+        self.appended = 0
+        self.file = None
+
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self.lines = replay(f, self.entries)
+        elif self.snapshot_base.exists():
+            for upload_id in read_selection(None, self.path, self.snapshot_base):
+                self.entries[(upload_id, DEFAULT_LABEL)] = 0.0
+
+        for upload_id, label in self.entries:
+            self.labels.setdefault(upload_id, set()).add(label)
+
+        if not self.path.exists():
+            self.compact()
+        self.file = open(self.path, "a")
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, upload_id):
+        return upload_id in self.labels
+
+    def labels_of(self, upload_id):
+        return self.labels.get(upload_id, set())
+
+    def is_selected(self, upload_id, label=DEFAULT_LABEL):
+        return (upload_id, label) in self.entries
+
+    def last_selected(self):
+        """The upload most recently selected, under any label, that is still selected."""
+        with self.lock:
+            if not self.entries:
+                return None
+            upload_id, _ = next(reversed(self.entries))
+            return upload_id
+
+    def _append(self, selected, upload_id, label):
+        check_label(label)
+        timestamp = time.time()
+        with self.lock:
+            self.file.write(f"{timestamp:.3f}\t{'+' if selected else '-'}\t{upload_id}\t{label}\n")
+            self.file.flush()
+            self.lines += 1
+            self.appended += 1
+            key = (upload_id, label)
+            self.entries.pop(key, None)
+            labels = self.labels.setdefault(upload_id, set())
+            if selected:
+                self.entries[key] = timestamp
+                labels.add(label)
+            else:
+                labels.discard(label)
+                if not labels:
+                    del self.labels[upload_id]
+
+    def select(self, upload_id, label=DEFAULT_LABEL):
+        self._append(True, upload_id, label)
+
+    def unselect(self, upload_id, label=DEFAULT_LABEL):
+        self._append(False, upload_id, label)
+
+    def toggle(self, upload_id, label=DEFAULT_LABEL):
+        """Flip the selection of upload_id under label; returns whether it is now selected."""
+        selected = not self.is_selected(upload_id, label)
+        self._append(selected, upload_id, label)
+        return selected
+
+    def needs_compaction(self):
+        return self.lines > 2 * len(self.entries) + COMPACT_MIN_ENTRIES
+
+    def compact(self):
+        """Rewrite the journal as its live entries and refresh the snapshots."""
+        with self.compact_lock:
+            generation = os.urandom(6).hex()
+            with self.lock:
+                entries = list(self.entries.items())
+                mark = self.file.tell() if self.file else 0
+
+            data = f"# compacted {generation}\n" + "".join(
+                f"{timestamp:.3f}\t+\t{upload_id}\t{label}\n" for (upload_id, label), timestamp in entries
+            )
+            data = data.encode("utf-8")
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+
+            # Readers replay the whole journal while the snapshots are being replaced;
+            # the sidecar only names the new generation once they all are.
+            sidecar = sidecar_path(self.snapshot_base)
+            sidecar.unlink(missing_ok=True)
+            snapshots = OrderedDict()
+            for (upload_id, label), _ in entries:
+                snapshots.setdefault(snapshot_path(label, self.snapshot_base), OrderedDict())[upload_id] = None
+            snapshots[self.snapshot_base] = OrderedDict.fromkeys(upload_id for (upload_id, _), _ in entries)
+            for path, upload_ids in snapshots.items():
+                snapshot_tmp = path.with_name(path.name + ".tmp")
+                with open(snapshot_tmp, "w") as f:
+                    f.writelines(f"{upload_id}\n" for upload_id in upload_ids)
+                os.replace(snapshot_tmp, path)
+
+            base = self.snapshot_base
+            for path in base.parent.glob(f"{base.stem}.*{base.suffix}"):
+                if path not in snapshots:
+                    path.unlink(missing_ok=True)
+            sidecar_tmp = sidecar.with_name(sidecar.name + ".tmp")
+            with open(sidecar_tmp, "w") as f:
+                f.write(f"{generation} {len(data)}\n")
+            os.replace(sidecar_tmp, sidecar)
+
+            # Toggles made while the snapshots were written go after them, then the
+            # new journal takes the old one's place.
+            with self.lock:
+                tail = b""
+                if self.file:
+                    self.file.flush()
+                    with open(self.path, "rb") as f:
+                        f.seek(mark)
+                        tail = f.read()
+                    with open(tmp_path, "ab") as f:
+                        f.write(tail)
+                os.replace(tmp_path, self.path)
+                if self.file:
+                    self.file.close()
+                    self.file = open(self.path, "a")
+                appended = sum(1 for line in tail.decode("utf-8").splitlines() if parse_entry(line))
+                self.lines = len(entries) + appended
+                self.appended = appended
+
+    def close(self):
+        with self.lock:
+            self.file.close()
@@ -0,0 +1,237 @@
+"""
+A content-addressed store for ccMixter audio.
+Every file is kept once under store/objects/<sha[:2]>/<sha256>.mp3, and the names in
+dataset/music are hard links into it, so identical audio republished under several
+uploads takes the space of one file. A URL index remembers which object each download
+URL produced, letting the downloader and the TUI preview skip the network entirely
+for audio that has already been fetched.
+TUI previews are tracked by a PreviewCache, which evicts the least recently played
+objects once they exceed a size budget, never touching audio that is also linked
+into the music directory.
+
+The TUI and the downloader share both index files, so neither rewrites one from its
+own copy: each change is queued, and saving re-reads the file under a lock, replays
+the queued changes on top of it and replaces it atomically. The URL index is read
+again whenever another process has changed it. Recency updates from preview cache
+hits are only kept in memory until the next save or close().
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+STORE_DIR = Path(__file__).parent / "store"
+PREVIEW_CACHE_BYTES = 512 * 1024 * 1024
+LOCK_SUFFIX = ".lock"
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on path + LOCK_SUFFIX across processes (where fcntl exists)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + LOCK_SUFFIX), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def read_json(path, default):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json(path, data):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def file_version(path):
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class AudioStore:
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.urls_path = self.root / "urls.json"
+        self.lock = threading.Lock()
+        self.version = file_version(self.urls_path)
+        self.urls = read_json(self.urls_path, {})
+
+    def object_path(self, sha256):
+        return self.objects_dir / sha256[:2] / f"{sha256}.mp3"
+
+    def lookup_url(self, url):
+        with self.lock:
+            # Pick up URLs that another process (the downloader or the TUI) has added.
+            version = file_version(self.urls_path)
+            if version != self.version:
+                self.version = version
+                self.urls = read_json(self.urls_path, self.urls)
+            sha256 = self.urls.get(url)
+        if sha256 is None or not self.object_path(sha256).exists():
+            return None
+        return sha256
+
+    def add(self, path, sha256, url=None, move=False):
+        path = Path(path)
+        obj = self.object_path(sha256)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+
+        if obj.exists():
+            if move:
+                path.unlink()
+        elif move:
+            os.replace(path, obj)
+        else:
+            try:
+                os.link(path, obj)
+            except FileExistsError:
+                pass
+            except OSError:
+                shutil.copy2(path, obj)
+
+        if url:
+            self.remember(url, sha256)
+        return obj
+
+    def link(self, sha256, dest):
+        dest = Path(dest)
+        obj = self.object_path(sha256)
+        if dest.exists() and os.path.samefile(obj, dest):
+            return dest
+
+        tmp_path = dest.with_name(dest.name + ".link")
+        tmp_path.unlink(missing_ok=True)
+        try:
+            os.link(obj, tmp_path)
+        except OSError:
+            shutil.copy2(obj, tmp_path)
+        os.replace(tmp_path, dest)
+        return dest
+
+    def adopt(self, path, sha256, url=None):
+        self.add(path, sha256, url)
+        return self.link(sha256, path)
+
+    def release(self, sha256):
+        """Discard an object unless a name outside the store (e.g. in dataset/music) still links to it."""
+        try:
+            linked = self.object_path(sha256).stat().st_nlink > 1
+        except OSError:
+            return
+        if not linked:
+            self.discard(sha256)
+
+    def discard(self, sha256):
+        self.object_path(sha256).unlink(missing_ok=True)
+        with self.lock:
+            self._save(lambda urls: {url: digest for url, digest in urls.items() if digest != sha256})
+
+    def remember(self, url, sha256):
+        with self.lock:
+            if self.urls.get(url) == sha256:
+                return
+            self._save(lambda urls: {**urls, url: sha256})
+
+    def _save(self, change):
+        """Apply change (urls -> urls) to the index on disk, which may hold other processes' URLs."""
+        with file_lock(self.urls_path):
+            self.urls = change(read_json(self.urls_path, {}))
+            write_json(self.urls_path, self.urls)
+            self.version = file_version(self.urls_path)
+
+
+class PreviewCache:
+    def __init__(self, store, max_bytes=PREVIEW_CACHE_BYTES):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.path = store.root / "previews.json"
+        self.lock = threading.Lock()
+        self.pinned = set()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.entries = OrderedDict(read_json(self.path, []))
+        self.changes = []
+
+    def lookup(self, url):
+        sha256 = self.store.lookup_url(url)
+        if sha256 is not None:
+            with self.lock:
+                if sha256 in self.entries:
+                    self.entries.move_to_end(sha256)
+                    self.changes.append((sha256, self.entries[sha256]))
+        return sha256
+
+    def count_hit(self, sha256, saved=True):
+        size = self.store.object_path(sha256).stat().st_size if saved else 0
+        with self.lock:
+            self.hits += 1
+            self.bytes_saved += size
+
+    def count_miss(self):
+        with self.lock:
+            self.misses += 1
+
+    def put(self, path, sha256, url):
+        obj = self.store.add(path, sha256, url, move=True)
+        with self.lock:
+            self.changes.append((sha256, obj.stat().st_size))
+            self._save()
+        return obj
+
+    def close(self):
+        with self.lock:
+            if self.changes:
+                self._save()
+
+    def size(self):
+        with self.lock:
+            return sum(self.entries.values())
+
+    def _evict(self):
+        total = sum(self.entries.values())
+        for sha256 in list(self.entries):
+            if total <= self.max_bytes:
+                break
+            if sha256 in self.pinned:
+                continue
+            total -= self.entries.pop(sha256)
+            # Audio that the downloader also linked into the music directory stays.
+            self.store.release(sha256)
+
+    def _save(self):
+        """Replay the queued uses on the entries on disk, evict, and write them back."""
+        with file_lock(self.path):
+            entries = OrderedDict(read_json(self.path, []))
+            for sha256, size in self.changes:
+                entries[sha256] = size
+                entries.move_to_end(sha256)
+            self.changes = []
+            self.entries = entries
+            self._evict()
+            write_json(self.path, list(self.entries.items()))
+
+    def format_stats(self):
+        with self.lock:
+            return f"cache {self.hits} hits/{self.misses} misses, {self.bytes_saved / 1024 / 1024:.1f} MB saved"
@@ -0,0 +1,220 @@
+"""
+A script to decode the downloaded music into model-ready PCM, once.
+Each MP3 in the music directory is decoded (with pygame's SDL_mixer) to mono 16-bit PCM
+at a configurable sample rate and saved to pcm/<upload_id>_<file_index>.pcm: a small
+header (sample rate, frame count, duration and the source file's size, mtime and
+SHA-256) followed by the raw samples. Files are decoded in parallel across CPU cores,
+and a file is only decoded again when its source changes. Durations come from the
+library index (see ccmixter_library.py), so the longest files are started first and
+the amount of audio to decode is known up front.
+Downstream stages open the cache with open_pcm(), which memory-maps the samples so
+windows can be sliced without copying.
+Before running this script, run download_ccmixter.py to populate the music directory.
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from ccmixter_library import Library, format_duration
+
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+
+
+SCRIPT_DIR = Path(__file__).parent
+MUSIC_DIR = SCRIPT_DIR / 'music'
+PCM_DIR = SCRIPT_DIR / 'pcm'
+MANIFEST_FILE = 'manifest.json'
+SAMPLE_RATE = 16000
+MAGIC = b'DJPCM001'
+HEADER = struct.Struct('<8sIHHQQq32s')
+HEADER_SIZE = 128
+
+
+class PCMFile:
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.sample_rate, self.channels, sample_width, self.frames,
+         self.source_size, self.source_mtime_ns, source_sha256) = HEADER.unpack_from(self.mmap)
+        if magic != MAGIC or sample_width != 2:
+            self.mmap.close()
+            raise ValueError(f"Not a PCM cache file: {self.path}")
+        self.source_sha256 = source_sha256.hex()
+        self.duration = self.frames / self.sample_rate
+        self.samples = memoryview(self.mmap)[HEADER_SIZE:HEADER_SIZE + self.frames * 2 * self.channels].cast('h')
+
+    def window(self, start, end=None):
+        start_frame = max(0, int(start * self.sample_rate))
+        end_frame = self.frames if end is None else min(self.frames, int(end * self.sample_rate))
+        return self.samples[start_frame * self.channels:max(start_frame, end_frame) * self.channels]
+
+    def close(self):
+        self.samples.release()
+        try:
+            self.mmap.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_pcm(path):
+    return PCMFile(path)
+
+
+def pcm_path(source_path, pcm_dir=PCM_DIR):
+    return Path(pcm_dir) / f"{Path(source_path).stem}.pcm"
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_current(source_path, output_path, sample_rate, known_sha256=None):
+    try:
+        with open_pcm(output_path) as cached:
+            if cached.sample_rate != sample_rate:
+                return False
+            stat = os.stat(source_path)
+            if cached.source_size == stat.st_size and cached.source_mtime_ns == stat.st_mtime_ns:
+                return True
+            if cached.source_size != stat.st_size:
+                return False
+            return cached.source_sha256 == (known_sha256 or sha256_file(source_path))
+    except (OSError, ValueError):
+        return False
+
+
+def init_worker(sample_rate):
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    pygame.mixer.init(frequency=sample_rate, size=-16, channels=1)
+
+
+def decode_file(source_path, output_path, sample_rate, known_sha256=None):
+    import pygame
+
+    # SDL may open the mixer in a different format than requested; the header must not claim one it lacks.
+    mixer_format = pygame.mixer.get_init()
+    if mixer_format != (sample_rate, -16, 1):
+        raise RuntimeError(f"Mixer opened as {mixer_format}, not ({sample_rate}, -16, 1)")
+
+    stat = os.stat(source_path)
+    source_sha256 = known_sha256 or sha256_file(source_path)
+    raw = pygame.mixer.Sound(str(source_path)).get_raw()
+    if sys.byteorder != 'little':
+        samples = memoryview(raw).cast('h').tolist()
+        raw = struct.pack(f'<{len(samples)}h', *samples)
+
+    header = HEADER.pack(MAGIC, sample_rate, 1, 2, len(raw) // 2, stat.st_size, stat.st_mtime_ns,
+                         bytes.fromhex(source_sha256))
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        f.write(raw)
+    os.replace(tmp_path, output_path)
+    return len(raw) // 2 / sample_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Decode the downloaded music into memory-mappable mono PCM",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--sample-rate",
+        type=int,
+        default=SAMPLE_RATE,
+        help="Target sample rate in Hz"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of decoding processes"
+    )
+    parser.add_argument(
+        "--music-dir",
+        type=Path,
+        default=MUSIC_DIR,
+        help="Directory with the downloaded MP3 files"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=PCM_DIR,
+        help="Directory for the decoded PCM files"
+    )
+
+    args = parser.parse_args()
+
+    if not args.music_dir.exists():
+        print(f"Error: {args.music_dir} not found!")
+        sys.exit(1)
+
+    args.output_dir.mkdir(exist_ok=True)
+
+    try:
+        with open(args.music_dir / MANIFEST_FILE, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    sources = sorted(args.music_dir.glob('*.mp3'))
+    pending = []
+    for source_path in sources:
+        entry = manifest.get(source_path.name) or {}
+        known_sha256 = entry.get('sha256') if entry.get('mtime_ns') == source_path.stat().st_mtime_ns else None
+        output_path = pcm_path(source_path, args.output_dir)
+        if not is_current(source_path, output_path, args.sample_rate, known_sha256):
+            pending.append((source_path, output_path, known_sha256))
+
+    library = Library(args.music_dir)
+    library.scan(args.workers)
+
+    def listed_duration(source_path):
+        entry = library.get(source_path.name) or {}
+        return entry.get('duration', 0.0)
+
+    # Longest first, so a long file does not start last and leave the other workers idle.
+    pending.sort(key=lambda item: listed_duration(item[0]), reverse=True)
+    total = sum(listed_duration(source_path) for source_path, _, _ in pending)
+    print(f"Found {len(sources)} files, {len(pending)} to decode ({format_duration(total)} of audio) "
+          f"at {args.sample_rate} Hz")
+
+    error_count = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(args.sample_rate,)) as pool:
+        futures = {
+            pool.submit(decode_file, source_path, output_path, args.sample_rate, known_sha256): source_path
+            for source_path, output_path, known_sha256 in pending
+        }
+        for future in as_completed(futures):
+            try:
+                duration = future.result()
+                print(f"  Decoded {futures[future].name} ({duration:.1f}s)")
+            except Exception as e:
+                print(f"  Error decoding {futures[future].name}: {e}")
+                error_count += 1
+
+    print(f"Decoded {len(pending) - error_count} files, {error_count} errors")
+    print(f"PCM saved to {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
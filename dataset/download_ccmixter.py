@@ -4,35 +4,170 @@ For each ccMixter upload, it only downloads the first file that is in MP3 format
 It saves the files in a directory called music, wherever the script itself is located,
 saving the file as <upload_id>_<file_index>.mp3.
 Before running this script, make sure to run fetch_ccmixter.py to get the data from
-ccMixter, and then run select_ccmixter.py to create selected_uploads.txt, containing
-selected upload IDs.
+ccMixter, and then run select_ccmixter.py to select uploads. The selection is read
+from the journal and snapshots it keeps (see ccmixter_selection.py); --label limits
+the download to the uploads selected under one label.
+
+Downloads run on a bounded worker pool with a per-host concurrency cap and jittered
+retries. The per-upload log is printed in selection order whatever order the downloads
+finish in, under a live progress line.
+
+Each file is streamed to <name>.part, resumed with HTTP Range requests after an
+interruption, checked against the catalog's exact file size (file_rawsize) and
+renamed into place; the rounded display size (file_filesize) only raises a warning.
+Audio is requested without content encoding, so byte offsets and sizes are those of
+the file itself. A manifest in the music directory records size, mtime and SHA-256
+of every file, so later runs detect truncated or altered files without re-hashing
+unchanged ones.
+
+Finished files are adopted into the content-addressed store (see ccmixter_store.py)
+and the music directory keeps hard links to it. A URL the store has already seen is
+linked from the store instead of being downloaded again. The catalog carries no
+checksums, so identical audio published under another URL is still transferred and
+only stored once after it has been hashed.
+
+The summary reports the duration and bitrate of the selection and of the whole music
+directory from the library index (see ccmixter_library.py), which is brought up to
+date at the end of every run.
 """
 
+import argparse
+import contextlib
+import hashlib
+import http.client
 import json
+import os
+import random
+import re
 import sys
-import ssl
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from urllib.request import urlopen, Request
-from urllib.error import URLError
-
-
-def read_selected_uploads(filepath):
-    upload_ids = []
-    with open(filepath, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                upload_ids.append(int(line))
-    return upload_ids
-
-
-def find_upload_data(upload_id, jsonl_filepath):
-    with open(jsonl_filepath, 'r') as f:
-        for line in f:
-            data = json.loads(line)
-            if data.get('upload_id') == upload_id:
-                return data
-    return None
+from urllib.error import URLError, HTTPError
+
+import ccmixter_http
+from ccmixter_catalog import Catalog
+from ccmixter_library import Library
+from ccmixter_selection import check_label, read_selection
+from ccmixter_store import AudioStore
+
+
+WORKERS = 8
+PER_HOST = 4
+MAX_RETRIES = 3
+RETRY_DELAY = 1.0
+CHUNK_SIZE = 65536
+PART_SUFFIX = '.part'
+MANIFEST_FILE = 'manifest.json'
+SIZE_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+LISTED_SIZE_SLACK = 0.1
+
+
+class Progress:
+    def __init__(self, total, total_bytes, stream=sys.stderr):
+        self.total = total
+        self.total_bytes = total_bytes
+        self.stream = stream
+        self.interactive = stream.isatty()
+        self.counts = {'success': 0, 'skip': 0, 'error': 0}
+        self.bytes = 0
+        self.started = time.monotonic()
+        self.last_render = 0.0
+        self.lock = threading.Lock()
+
+    def add_bytes(self, count):
+        with self.lock:
+            self.bytes += count
+            if time.monotonic() - self.last_render > 0.2:
+                self._render()
+
+    def finish(self, status, expected_bytes, received_bytes):
+        with self.lock:
+            self.counts[status] += 1
+            self.total_bytes += received_bytes - expected_bytes
+            self._render()
+
+    def write(self, text):
+        with self.lock:
+            self._clear()
+            print(text, flush=True)
+            self._render()
+
+    def close(self):
+        with self.lock:
+            self._clear()
+
+    def _clear(self):
+        if self.interactive:
+            self.stream.write("\r\033[K")
+            self.stream.flush()
+
+    def _render(self):
+        if not self.interactive:
+            return
+        self.last_render = time.monotonic()
+        elapsed = max(self.last_render - self.started, 1e-6)
+        rate = self.bytes / elapsed
+        remaining = max(self.total_bytes - self.bytes, 0)
+        if rate > 0 and remaining:
+            eta = time.strftime('%H:%M:%S', time.gmtime(remaining / rate))
+        else:
+            eta = '--:--:--'
+        finished = sum(self.counts.values())
+        self.stream.write(
+            f"\r\033[K[{finished}/{self.total}] {self.counts['success']} done, "
+            f"{self.counts['skip']} skipped, {self.counts['error']} errors | "
+            f"{rate / 1024 / 1024:.2f} MB/s | ETA {eta}"
+        )
+        self.stream.flush()
+
+
+class HostLimiter:
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self.slots = {}
+        self.lock = threading.Lock()
+
+    def slot(self, url):
+        host = urllib.parse.urlsplit(url).netloc
+        with self.lock:
+            if host not in self.slots:
+                self.slots[host] = threading.Semaphore(self.per_host)
+            return self.slots[host]
+
+
+class Manifest:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, name):
+        with self.lock:
+            return self.entries.get(name)
+
+    def record(self, path, sha256, url=None):
+        stat = path.stat()
+        with self.lock:
+            self.entries[path.name] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': sha256,
+                'url': url,
+            }
+
+    def save(self):
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with self.lock:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
 
 
 def get_first_mp3_file(upload_data):
@@ -44,43 +179,227 @@ def get_first_mp3_file(upload_data):
     return None, None
 
 
-def download_file(url, output_path):
-    try:
-        print(f"  Downloading from: {url}")
+def expected_file_size(file_info):
+    """
+    (exact size, listed size) of a file: the exact size comes from file_rawsize and is
+    0 when unknown; the listed size falls back to the rounded display size.
+    """
+    rawsize = file_info.get('file_rawsize')
+    if rawsize:
+        return int(rawsize), int(rawsize)
+
+    match = re.search(r'([\d.]+)\s*([KMG]?B)', str(file_info.get('file_filesize', '')))
+    if match:
+        return 0, int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+    return 0, 0
+
+
+def size_matches(size, expected_size):
+    return not expected_size or size == expected_size
+
+
+def size_warning(size, listed_size):
+    if listed_size and abs(size - listed_size) > listed_size * LISTED_SIZE_SLACK:
+        return f"  Warning: got {size} bytes, the catalog lists about {listed_size}"
+    return None
+
+
+def sha256_file(path, digest=None):
+    digest = digest or hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE * 16):
+            digest.update(chunk)
+    return digest
+
+
+def download_file(url, output_path, log, on_bytes=None, host_limiter=None, expected_size=0, listed_size=0):
+    log(f"  Downloading from: {url}")
+
+    part_path = output_path.with_name(output_path.name + PART_SUFFIX)
+    received = 0
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            # Ranges and sizes refer to the file's own bytes, not a compressed encoding of them.
+            headers = {'Accept-Encoding': 'identity'}
+            if offset:
+                headers['Range'] = f'bytes={offset}-'
+
+            with host_limiter.slot(url) if host_limiter else contextlib.nullcontext():
+                with ccmixter_http.request(url, headers=headers) as response:
+                    content_range = response.headers.get('Content-Range', '')
+                    if offset and not (response.status == 206 and content_range.startswith(f'bytes {offset}-')):
+                        offset = 0
+
+                    if offset:
+                        log(f"  Resuming at byte {offset}")
+                        digest = sha256_file(part_path)
+                    else:
+                        digest = hashlib.sha256()
+
+                    with open(part_path, 'ab' if offset else 'wb') as out_file:
+                        while True:
+                            chunk = response.read(CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            out_file.write(chunk)
+                            digest.update(chunk)
+                            received += len(chunk)
+                            if on_bytes:
+                                on_bytes(len(chunk))
+                        out_file.flush()
+                        os.fsync(out_file.fileno())
+
+            size = part_path.stat().st_size
+            if not size_matches(size, expected_size):
+                if size > expected_size:
+                    part_path.unlink()
+                raise http.client.HTTPException(f"got {size} bytes, expected {expected_size}")
+            if not expected_size and (warning := size_warning(size, listed_size)):
+                log(warning)
+
+            os.replace(part_path, output_path)
+            log(f"  Saved to: {output_path}")
+            return True, received, digest.hexdigest()
+        except (URLError, OSError, http.client.HTTPException) as e:
+            if isinstance(e, HTTPError) and e.code == 416:
+                part_path.unlink(missing_ok=True)
+            retryable = not isinstance(e, HTTPError) or e.code in (416, 429) or e.code >= 500
+            if not retryable or attempt == MAX_RETRIES:
+                log(f"  Error downloading file: {e}")
+                return False, received, None
+            delay = RETRY_DELAY * 2 ** attempt * random.uniform(0.5, 1.5)
+            log(f"  Retrying after error ({e}) in {delay:.1f}s...")
+            time.sleep(delay)
+        except Exception as e:
+            log(f"  Unexpected error: {e}")
+            return False, received, None
+
+
+def check_existing_file(path, manifest, expected_size, verify):
+    stat = path.stat()
+    if not size_matches(stat.st_size, expected_size):
+        return f"{stat.st_size} bytes, expected {expected_size}"
+
+    entry = manifest.get(path.name)
+    if entry and not verify and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return None
+
+    sha256 = sha256_file(path).hexdigest()
+    if entry and entry['size'] == stat.st_size and entry['sha256'] != sha256:
+        return "checksum mismatch"
 
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
+    manifest.record(path, sha256, entry.get('url') if entry else None)
+    return None
+
+
+def plan_download(upload_id, catalog, music_dir):
+    upload_data = catalog.get(upload_id)
+    if not upload_data:
+        return None, [f"  Warning: Upload ID {upload_id} not found in ccmixter_data.jsonl"]
+
+    file_idx, file_info = get_first_mp3_file(upload_data)
+    if file_info is None:
+        return None, [f"  Warning: No MP3 file found for upload ID {upload_id}"]
+
+    download_url = file_info.get('download_url')
+    if not download_url:
+        return None, [f"  Warning: No download URL found for upload ID {upload_id}"]
+
+    output_path = music_dir / f"{upload_id}_{file_idx}.mp3"
+    expected_size, listed_size = expected_file_size(file_info)
+    return (download_url, output_path, expected_size, listed_size), []
+
+
+def process_upload(plan, progress, host_limiter, manifest, store, verify=False):
+    lines = []
+    download_url, output_path, expected_size, listed_size = plan
 
-        req = Request(url)
-        req.add_header('Referer', 'https://ccmixter.org/')
-        req.add_header('User-Agent', 'DJ-LLM')
+    if output_path.exists():
+        problem = check_existing_file(output_path, manifest, expected_size, verify)
+        if problem is None:
+            file_size = output_path.stat().st_size
+            lines.append(f"  File already exists ({file_size} bytes), skipping...")
+            progress.finish('skip', listed_size, 0)
+            return 'skip', lines
+        lines.append(f"  Existing file is corrupt ({problem}), downloading again...")
+        output_path.unlink()
+        entry = manifest.get(output_path.name)
+        if entry:
+            store.release(entry['sha256'])
+        sha256 = None
+    else:
+        sha256 = store.lookup_url(download_url)
 
-        with urlopen(req, context=ssl_context) as response:
-            with open(output_path, 'wb') as out_file:
-                out_file.write(response.read())
+    if sha256 and size_matches(store.object_path(sha256).stat().st_size, expected_size):
+        store.link(sha256, output_path)
+        manifest.record(output_path, sha256, download_url)
+        lines.append(f"  Found in store ({sha256[:12]}), linked to: {output_path}")
+        progress.finish('skip', listed_size, 0)
+        return 'skip', lines
 
-        print(f"  Saved to: {output_path}")
-        return True
-    except URLError as e:
-        print(f"  Error downloading file: {e}")
-        return False
-    except Exception as e:
-        print(f"  Unexpected error: {e}")
-        return False
+    ok, received, sha256 = download_file(
+        download_url, output_path, lines.append, progress.add_bytes, host_limiter, expected_size, listed_size
+    )
+    if ok:
+        store.adopt(output_path, sha256, download_url)
+        manifest.record(output_path, sha256, download_url)
+    status = 'success' if ok else 'error'
+    progress.finish(status, listed_size, received)
+    return status, lines
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Download the selected ccMixter uploads",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=WORKERS,
+        help="Number of concurrent downloads"
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=PER_HOST,
+        help="Maximum concurrent downloads from one host"
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        default=False,
+        help="Re-hash existing files and compare them with the manifest"
+    )
+    parser.add_argument(
+        "--label",
+        default=None,
+        help="Only download the uploads selected under this label (default: every selected upload)"
+    )
+
+    args = parser.parse_args()
+
     script_dir = Path(__file__).parent
 
     selected_uploads_file = script_dir / 'selected_uploads.txt'
+    journal_file = script_dir / 'selected_uploads.journal'
     ccmixter_data_file = script_dir / 'ccmixter_data.jsonl'
     music_dir = script_dir / 'music'
 
-    if not selected_uploads_file.exists():
-        print(f"Error: {selected_uploads_file} not found!")
+    if not journal_file.exists() and not selected_uploads_file.exists():
+        print(f"Error: {journal_file} not found!")
         sys.exit(1)
 
+    if args.label is not None:
+        try:
+            check_label(args.label)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
     if not ccmixter_data_file.exists():
         print(f"Error: {ccmixter_data_file} not found!")
         sys.exit(1)
@@ -88,55 +407,55 @@ def main():
     music_dir.mkdir(exist_ok=True)
     print(f"Music directory: {music_dir}")
 
-    print(f"\nReading upload IDs from {selected_uploads_file}...")
-    upload_ids = read_selected_uploads(selected_uploads_file)
+    if args.label is None:
+        print(f"\nReading selected upload IDs from {journal_file}...")
+    else:
+        print(f"\nReading upload IDs selected under '{args.label}' from {journal_file}...")
+    upload_ids = read_selection(args.label, journal_file, selected_uploads_file)
     print(f"Found {len(upload_ids)} upload IDs to process")
 
-    success_count = 0
-    skip_count = 0
-    error_count = 0
+    with Catalog(ccmixter_data_file) as catalog:
+        plans = [plan_download(upload_id, catalog, music_dir) for upload_id in upload_ids]
 
-    for i, upload_id in enumerate(upload_ids, 1):
-        print(f"\n[{i}/{len(upload_ids)}] Processing upload ID: {upload_id}")
+    progress = Progress(len(upload_ids), sum(plan[3] for plan, _ in plans if plan))
+    host_limiter = HostLimiter(args.per_host)
+    manifest = Manifest(music_dir / MANIFEST_FILE)
+    store = AudioStore()
+    counts = {'success': 0, 'skip': 0, 'error': 0}
 
-        upload_data = find_upload_data(upload_id, ccmixter_data_file)
-        if not upload_data:
-            print(f"  Warning: Upload ID {upload_id} not found in ccmixter_data.jsonl")
-            error_count += 1
-            continue
-
-        file_idx, file_info = get_first_mp3_file(upload_data)
-        if file_info is None:
-            print(f"  Warning: No MP3 file found for upload ID {upload_id}")
-            error_count += 1
-            continue
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futures = [
+                pool.submit(process_upload, plan, progress, host_limiter, manifest, store, args.verify) if plan else None
+                for plan, _ in plans
+            ]
 
-        download_url = file_info.get('download_url')
-        if not download_url:
-            print(f"  Warning: No download URL found for upload ID {upload_id}")
-            error_count += 1
-            continue
+            for i, (upload_id, (plan, lines), future) in enumerate(zip(upload_ids, plans, futures), 1):
+                if future is None:
+                    progress.finish('error', 0, 0)
+                    status = 'error'
+                else:
+                    status, lines = future.result()
 
-        output_filename = f"{upload_id}_{file_idx}.mp3"
-        output_path = music_dir / output_filename
+                counts[status] += 1
+                progress.write("\n".join([f"\n[{i}/{len(upload_ids)}] Processing upload ID: {upload_id}"] + lines))
+    finally:
+        progress.close()
+        manifest.save()
 
-        if output_path.exists():
-            file_size = output_path.stat().st_size
-            print(f"  File already exists ({file_size} bytes), skipping...")
-            skip_count += 1
-            continue
+    print(f"\nTransport: {ccmixter_http.format_stats()}")
 
-        if download_file(download_url, output_path):
-            success_count += 1
-        else:
-            error_count += 1
+    library = Library(music_dir)
+    library.scan()
 
     print("\n" + "=" * 60)
     print("Download Summary:")
     print(f"  Total uploads processed: {len(upload_ids)}")
-    print(f"  Successfully downloaded: {success_count}")
-    print(f"  Skipped (already exists): {skip_count}")
-    print(f"  Errors: {error_count}")
+    print(f"  Successfully downloaded: {counts['success']}")
+    print(f"  Skipped (already exists): {counts['skip']}")
+    print(f"  Errors: {counts['error']}")
+    print(f"  Selected audio: {library.format_summary([plan[1].name for plan, _ in plans if plan])}")
+    print(f"  Library: {library.format_summary()}")
     print("=" * 60)
 
 
@@ -3,31 +3,157 @@ A script to fetch music metadata from ccMixter (https://ccmixter.org/query-api).
 It only retrieves uploads licensed under Creative Commons Attribution license (CC BY).
 The script is intended to make the music selection process easier.
 Only a small subset of the files will be included in the dataset.
+
+Several offset pages are kept in flight at once, paced by a token bucket whose
+rate backs off on errors or slow responses. Pages are written in offset order.
+
+Every page is appended as a durable batch followed by a checkpoint, so with --sync
+an interrupted crawl resumes where it stopped, and a finished catalog is refreshed by
+fetching only the pages (newest first) that hold uploads newer than the stored ones.
+Changed records are appended again; readers keep the last line for each upload_id.
+A page that cannot be fetched after all retries stops the crawl at that page, and so
+do several unparseable pages in a row; a single unparseable page is skipped and
+recorded in the checkpoint as a gap between the upload_ids around it. New uploads
+shift every offset, so the next --sync does not refetch the old offset: its walk from
+the newest page goes on until it is past the oldest gap's upload_ids, and each page
+in between is written again.
+
+Memory stays bounded by the pages in flight: records go straight to disk, each response
+is decoded once, and the array is parsed element by element. Only an element that fails
+to parse gets a tokenizer pass that strips leading zeros from numbers outside strings.
 """
 
+import argparse
 import json
+import os
 import time
 import http.client
 import urllib.parse
-import ssl
 import re
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import ccmixter_http
+
 
 BASE_URL = "https://ccmixter.org/api/query"
 LIMIT = 100
+CONCURRENCY = 4
+RATE = 2.0
+MIN_RATE = 0.2
+MAX_RETRIES = 5
+MAX_BAD_PAGES = 3
+SLOW_RESPONSE = 10.0
 SCRIPT_DIR = Path(__file__).parent
 OUTPUT_FILE = SCRIPT_DIR / "ccmixter_data.jsonl"
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+DECODER = json.JSONDecoder()
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+JSON_TOKEN = re.compile(r"""
+    (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<number>(?P<sign>-?)(?P<int>\d+)(?P<rest>(?:\.\d+)?(?:[eE][+-]?\d+)?))
+  | (?P<open>[\[{])
+  | (?P<close>[\]}])
+  | (?P<other>[^"\[\]{}\d-]+)
+""", re.VERBOSE | re.DOTALL)
+
+
+class FetchError(Exception):
+    pass
+
 
-http.client._MAXLINE = 1048576
+class TokenBucket:
+    def __init__(self, rate, max_rate=None, min_rate=MIN_RATE):
+        self.rate = rate
+        self.max_rate = max_rate or rate
+        self.min_rate = min(min_rate, rate)
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def slow_down(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def speed_up(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+def decode_content(content, charset=None):
+    for encoding in (charset, "utf-8"):
+        if encoding:
+            try:
+                return content.decode(encoding)
+            except (LookupError, UnicodeDecodeError):
+                pass
+    return content.decode("latin-1")
 
 
-def fix_invalid_json(text):
-    text = re.sub(r':\s*0+(\d+)', r': \1', text)
-    return text
+def repair_value(text, pos):
+    parts = []
+    depth = 0
+    while True:
+        match = JSON_TOKEN.match(text, pos)
+        if match is None:
+            raise json.JSONDecodeError("Unterminated value", text, pos)
+        pos = match.end()
 
+        if match.group("number") is not None:
+            parts.append(match.group("sign") + (match.group("int").lstrip("0") or "0") + match.group("rest"))
+        else:
+            parts.append(match.group())
+            if match.group("open") is not None:
+                depth += 1
+            elif match.group("close") is not None:
+                depth -= 1
 
-def fetch_page(offset=0):
+        if depth == 0 and match.group("other") is None:
+            return "".join(parts), pos
+
+
+def iter_json_array(text):
+    pos = WHITESPACE.match(text, 0).end()
+    if not text.startswith("[", pos):
+        raise json.JSONDecodeError("Expected a JSON array", text, pos)
+    pos = WHITESPACE.match(text, pos + 1).end()
+    if text.startswith("]", pos):
+        return
+
+    while True:
+        try:
+            item, pos = DECODER.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            fixed, pos = repair_value(text, pos)
+            item = json.loads(fixed)
+        yield item
+
+        pos = WHITESPACE.match(text, pos).end()
+        if text.startswith(",", pos):
+            pos = WHITESPACE.match(text, pos + 1).end()
+        elif text.startswith("]", pos):
+            return
+        else:
+            raise json.JSONDecodeError("Expected ',' or ']'", text, pos)
+
+
+def fetch_page(offset=0, base_url=BASE_URL):
     params = urllib.parse.urlencode({
         "limit": LIMIT,
         "lic": "by",
@@ -35,62 +161,312 @@ def fetch_page(offset=0):
         "offset": offset
     })
 
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
+    with ccmixter_http.request(f"{base_url}?{params}") as response:
+        content = response.read()
+        charset = response.headers.get_content_charset()
 
-    conn = http.client.HTTPSConnection("ccmixter.org", context=ctx)
-    conn.request("GET", f"/api/query?{params}")
+    try:
+        return list(iter_json_array(decode_content(content, charset)))
+    except json.JSONDecodeError:
+        return None
 
-    response = conn.getresponse()
-    content = response.read()
-    conn.close()
 
-    for encoding in ['utf-8', 'latin-1', 'iso-8859-1']:
+def fetch_page_with_retry(offset, base_url, limiter, stop=None):
+    """
+    Fetch a page, or None if it does not parse; raises FetchError once the retries
+    for network errors run out (or stop is set while waiting for one).
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        if stop is not None and stop.is_set():
+            raise FetchError(f"Cancelled page at offset {offset}")
+        limiter.acquire()
+        started = time.monotonic()
         try:
-            decoded = content.decode(encoding)
-            try:
-                return json.loads(decoded)
-            except json.JSONDecodeError:
-                fixed = fix_invalid_json(decoded)
-                return json.loads(fixed)
-        except (UnicodeDecodeError, json.JSONDecodeError):
+            data = fetch_page(offset, base_url)
+        except (OSError, http.client.HTTPException) as e:
+            limiter.slow_down()
+            if attempt == MAX_RETRIES:
+                raise FetchError(f"Giving up on page at offset {offset}: {e}") from e
+            delay = min(60, 2 ** attempt) * random.uniform(0.5, 1.5)
+            print(f"Error at offset {offset} ({e}), retrying in {delay:.1f}s...")
+            if stop is not None:
+                stop.wait(delay)
+            else:
+                time.sleep(delay)
             continue
 
-    return None
+        if time.monotonic() - started > SLOW_RESPONSE:
+            limiter.slow_down()
+        else:
+            limiter.speed_up()
+        return data
 
 
-def main():
-    offset = 0
-    all_items = []
+def fetch_pages(base_url=BASE_URL, concurrency=CONCURRENCY, rate=RATE, start_offset=0, limiter=None):
+    """
+    Yield (offset, data) in offset order until a short page, with data None for a page
+    that does not parse. Raises FetchError when a page cannot be fetched or
+    MAX_BAD_PAGES pages in a row do not parse, leaving no hole behind the last page yielded.
+    """
+    limiter = limiter or TokenBucket(rate)
+    stop = threading.Event()
+    pending = {}
+    next_offset = start_offset
+    bad_pages = 0
 
-    with open(OUTPUT_FILE, "w") as f:
-        while True:
-            print(f"Fetching page at offset {offset}...")
-            data = fetch_page(offset)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        try:
+            while True:
+                while len(pending) < concurrency:
+                    pending[next_offset] = pool.submit(fetch_page_with_retry, next_offset, base_url, limiter, stop)
+                    next_offset += LIMIT
+
+                offset = min(pending)
+                data = pending.pop(offset).result()
+                if data is None:
+                    bad_pages += 1
+                    if bad_pages >= MAX_BAD_PAGES:
+                        raise FetchError(f"{bad_pages} unparseable pages in a row, up to offset {offset}")
+                else:
+                    bad_pages = 0
+                yield offset, data
+
+                if data is not None and len(data) < LIMIT:
+                    break
+        finally:
+            # Pages still retrying give up instead of holding the pool open.
+            stop.set()
+            for future in pending.values():
+                future.cancel()
 
-            if data is None:
-                print(f"Skipping page at offset {offset} due to encoding/parsing errors")
-                offset += LIMIT
-                time.sleep(1)
+
+def checkpoint_path(output):
+    return output.with_name(output.name + CHECKPOINT_SUFFIX)
+
+
+def load_checkpoint(output):
+    path = checkpoint_path(output)
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_checkpoint(output, state):
+    path = checkpoint_path(output)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def scan_catalog(output):
+    digests = {}
+    with open(output, "r") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
                 continue
+            digests[item.get("upload_id")] = hash(line)
+    return digests
+
 
-            if not data:
+def truncate_partial_line(output):
+    with open(output, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - 65536)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline != -1:
+                end = start + newline + 1
                 break
+            end = start
+        if end != size:
+            f.truncate(end)
 
-            for item in data:
-                f.write(json.dumps(item) + "\n")
 
-            all_items.extend(data)
+def sync(args):
+    """Fetch into args.output; returns (added, updated, complete)."""
+    checkpoint = load_checkpoint(args.output)
+    start_offset = 0
+    newest = None
+    last_id = None
+    digests = None
+    # Gaps left by unparseable pages, as {"newer": id, "older": id}: the upload_ids of
+    # the records around them (None where the crawl's start or end was).
+    skipped = []
+    earlier_gaps = []
+    gap = None
 
-            if len(data) < LIMIT:
-                break
+    if not args.sync or not args.output.exists():
+        print(f"Starting full crawl into {args.output}")
+        open(args.output, "w").close()
+    elif checkpoint and not checkpoint["complete"]:
+        start_offset = checkpoint["offset"]
+        newest = checkpoint["newest"]
+        last_id = checkpoint.get("last_id")
+        skipped = checkpoint.get("skipped", [])
+        # A gap the interrupted crawl had just skipped is closed by the next page it gets.
+        if skipped and skipped[-1]["older"] is None and skipped[-1]["newer"] == last_id:
+            gap = skipped[-1]
+        with open(args.output, "r+") as f:
+            f.truncate(checkpoint["size"])
+        if newest is not None:
+            digests = scan_catalog(args.output)
+        print(f"Resuming interrupted crawl at offset {start_offset}")
+    else:
+        truncate_partial_line(args.output)
+        digests = scan_catalog(args.output)
+        newest = max((uid for uid in digests if isinstance(uid, int)), default=0)
+        earlier_gaps = checkpoint.get("skipped", []) if checkpoint else []
+        skipped = list(earlier_gaps)
+        print(f"Syncing uploads newer than {newest}"
+              + (f", refilling {len(earlier_gaps)} skipped pages" if earlier_gaps else ""))
+
+    added = 0
+    updated = 0
+    complete = False
+
+    def write_page(f, data):
+        nonlocal added, updated
+        batch = []
+        for item in data:
+            line = json.dumps(item)
+            if digests is None:
+                added += 1
+                batch.append(line + "\n")
+                continue
+
+            upload_id = item.get("upload_id")
+            known = digests.get(upload_id)
+            if known == hash(line):
+                continue
+            if known is None:
+                added += 1
+            else:
+                updated += 1
+            digests[upload_id] = hash(line)
+            batch.append(line + "\n")
+
+        f.write("".join(batch))
+        f.flush()
+        os.fsync(f.fileno())
+
+    def save(f, offset):
+        save_checkpoint(args.output, {
+            "offset": offset,
+            "size": f.tell(),
+            "newest": newest,
+            "last_id": last_id,
+            "complete": False,
+            "skipped": skipped
+        })
+
+    def stop_id():
+        """The upload_id the walk may stop at once a whole page is at or below it, or None."""
+        if newest is None or any(earlier["older"] is None for earlier in earlier_gaps):
+            return None
+        return min([newest] + [earlier["older"] for earlier in earlier_gaps])
+
+    with open(args.output, "a") as f:
+        try:
+            for offset, data in fetch_pages(args.base_url, args.concurrency, args.rate, start_offset):
+                if data is None:
+                    print(f"Skipping page at offset {offset} due to encoding/parsing errors")
+                    if gap is None:
+                        gap = {"newer": last_id, "older": None}
+                        skipped.append(gap)
+                    save(f, offset + LIMIT)
+                    continue
+
+                print(f"Fetched page at offset {offset} ({len(data)} items)")
+                write_page(f, data)
+                ids = [item["upload_id"] for item in data if isinstance(item.get("upload_id"), int)]
+                if gap is not None:
+                    gap["older"] = ids[0] if ids else None
+                    gap = None
+                if ids:
+                    last_id = ids[-1]
+                    # An earlier gap is filled once the walk has come back past the records after it.
+                    for earlier in [e for e in earlier_gaps if e["older"] is not None and last_id <= e["older"]]:
+                        earlier_gaps.remove(earlier)
+                        skipped.remove(earlier)
+                save(f, offset + LIMIT)
+
+                limit = stop_id()
+                if limit is not None and all(item.get("upload_id", 0) <= limit for item in data):
+                    break
+            # The walk reached the end of the listing, past every earlier gap.
+            for earlier in earlier_gaps:
+                skipped.remove(earlier)
+            complete = True
+        except FetchError as e:
+            # The checkpoint still points at the page that failed, so --sync resumes there.
+            print(f"Stopping the crawl: {e}")
+
+        if complete:
+            save_checkpoint(args.output, {
+                "offset": 0,
+                "size": f.tell(),
+                "newest": None,
+                "complete": True,
+                "skipped": skipped
+            })
+
+    return added, updated, complete
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fetch CC BY upload metadata from ccMixter",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--base-url",
+        default=BASE_URL,
+        help="ccMixter query API URL"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=OUTPUT_FILE,
+        help="Output JSONL file"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=CONCURRENCY,
+        help="Number of pages kept in flight"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=RATE,
+        help="Maximum page requests per second"
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        default=False,
+        help="Resume an interrupted crawl or fetch only new and updated uploads"
+    )
+
+    args = parser.parse_args()
 
-            offset += LIMIT
-            time.sleep(1)
+    added, updated, complete = sync(args)
 
-    print(f"Fetched {len(all_items)} items total")
-    print(f"Data saved to {OUTPUT_FILE}")
+    print(f"Fetched {added} new and {updated} updated items total")
+    print(f"Transport: {ccmixter_http.format_stats()}")
+    print(f"Data saved to {args.output}")
+    if not complete:
+        print("The crawl stopped early; run again with --sync to resume it")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
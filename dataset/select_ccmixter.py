@@ -5,162 +5,411 @@ of listening to each track.
 Before using this script, first run fetch_ccmixter.py to fetch data from ccMixter.
 """
 
-import json
+import argparse
+import bisect
+import hashlib
 import os
 from pathlib import Path
-import ssl
+import sys
 import time
 import threading
-from typing import Set, Optional
-import urllib.request
+from typing import Optional
 import urllib.error
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from mutagen.mp3 import MP3
+from rich.cells import set_cell_size
+from rich.segment import Segment
+
+import ccmixter_http
+from ccmixter_catalog import Catalog
+from ccmixter_library import Library, format_entry
+from ccmixter_model import UploadModel, escape
+from ccmixter_search import SearchIndex
+from ccmixter_selection import DEFAULT_LABEL, SelectionJournal, check_label
+from ccmixter_store import AudioStore, PreviewCache
+
+# Jump targets are parsed like the --start/--end timestamps of inference/infer.py.
+sys.path.append(str(Path(__file__).resolve().parent.parent / "inference"))
+from mp3_clip import parse_time
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
 
+from textual import work
 from textual.app import App, ComposeResult
-from textual.widgets import Header, Footer, DataTable, Static, Button
+from textual.widgets import Header, Footer, Static, Button, Input
 from textual.containers import Container, Horizontal, Vertical
 from textual.binding import Binding
+from textual.geometry import Size
+from textual.message import Message
 from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
 
 
 try:
     import pygame
+    from ccmixter_playback import PCMEngine, decode
     AUDIO_AVAILABLE = True
 except ImportError:
     AUDIO_AVAILABLE = False
 
 
+PREFETCH_WORKERS = 2
+STREAM_BUFFER_SECONDS = 5.0
+PROGRESS_INTERVAL = 0.1
+RELOAD_MARGIN = 1.0
+PROBE_BYTES = 16384
+
+
+def probe_stream(path):
+    """Return (audio offset, bytes per second) of a partly downloaded MP3, or None."""
+    try:
+        info = MP3(path).info
+    except Exception:
+        return None
+    if not info.bitrate:
+        return None
+
+    with open(path, 'rb') as f:
+        head = f.read(10)
+    offset = 0
+    if head[:3] == b'ID3' and len(head) == 10:
+        offset = 10 + (head[6] << 21 | head[7] << 14 | head[8] << 7 | head[9])
+    return offset, info.bitrate / 8
+
+
 class MusicPlayer:
-    def __init__(self):
+    def __init__(self, buffer_seconds: Optional[float] = STREAM_BUFFER_SECONDS):
         self.current_file = None
         self.playing = False
         self.temp_dir = tempfile.mkdtemp()
         self.duration = 0.0
         self.start_time = 0.0
         self.download_thread: Optional[threading.Thread] = None
-        self.cancel_download = False
         self.download_progress = 0
         self.is_downloading = False
+        self.closing = False
+        self.buffer_seconds = buffer_seconds
+        self.buffered_seconds = 0.0
+        self.loaded_seconds = 0.0
+        self.requested_at = 0.0
+        self.download_path = None
+        self.decoded = False
+        self.paused_at = None
+        self.engine = None
+        self.time_to_first_audio = None
+        self.generation = 0
+        self.playback_lock = threading.Lock()
+        self.store = AudioStore()
+        self.cache = PreviewCache(self.store)
+        self.prefetch_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS)
+        self.prefetches = {}
+        self.prefetch_progress = {}
+        self.prefetch_lock = threading.Lock()
         if AUDIO_AVAILABLE:
             pygame.mixer.init()
+            self.engine = PCMEngine()
 
     def cancel_current_download(self):
-        if self.is_downloading:
-            self.cancel_download = True
+        # A download thread only acts while the generation it was started for is current.
+        with self.playback_lock:
+            self.generation += 1
+        self.is_downloading = False
+        self.download_progress = 0
+
+    def _fetch(self, url, local_path, on_data, cancelled):
+        """Download url into the preview cache and return its sha256, or None if cancelled."""
+        digest = hashlib.sha256()
+
+        with ccmixter_http.request(url) as response:
+            total_size = response.length or 0
+            downloaded = 0
+            chunk_size = 8192
 
-    def _download_and_play(self, url: str, callback):
-        local_path = os.path.join(self.temp_dir, "current.mp3")
+            with open(local_path, 'wb') as out_file:
+                while True:
+                    if cancelled():
+                        return None
+
+                    chunk = response.read(chunk_size)
+                    if not chunk:
+                        break
+
+                    out_file.write(chunk)
+                    out_file.flush()
+                    digest.update(chunk)
+                    downloaded += len(chunk)
+                    on_data(downloaded, total_size)
+
+        if cancelled():
+            return None
+        if os.path.getsize(local_path) == 0:
+            raise ValueError("Download failed or empty file")
+
+        sha256 = digest.hexdigest()
+        self.cache.put(local_path, sha256, url)
+        return sha256
+
+    def _prefetch_path(self, url):
+        return os.path.join(self.temp_dir, f"prefetch-{hashlib.sha1(url.encode()).hexdigest()}.mp3")
+
+    def _prefetch(self, url):
+        local_path = self._prefetch_path(url)
+
+        def on_data(downloaded, total_size):
+            self.prefetch_progress[url] = (downloaded, total_size)
 
         try:
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-
-            req = urllib.request.Request(url)
-            req.add_header('Referer', 'https://ccmixter.org/')
-            req.add_header('User-Agent', 'DJ-LLM')
-
-            with urllib.request.urlopen(req, context=ssl_context) as response:
-                total_size = int(response.headers.get('Content-Length', 0))
-                downloaded = 0
-                chunk_size = 8192
-
-                with open(local_path, 'wb') as out_file:
-                    while True:
-                        if self.cancel_download:
-                            self.is_downloading = False
-                            self.download_progress = 0
-                            try:
-                                if os.path.exists(local_path):
-                                    os.remove(local_path)
-                            except:
-                                pass
-                            callback(False, "Download cancelled", 0)
-                            return
-
-                        chunk = response.read(chunk_size)
-                        if not chunk:
-                            break
-
-                        out_file.write(chunk)
-                        downloaded += len(chunk)
-
-                        if total_size > 0:
-                            self.download_progress = int((downloaded / total_size) * 100)
-                        else:
-                            self.download_progress = 0
-
-                        callback(None, "Downloading", self.download_progress)
-
-            if self.cancel_download:
-                self.is_downloading = False
-                self.download_progress = 0
+            return self._fetch(url, local_path, on_data, lambda: self.closing)
+        finally:
+            with self.prefetch_lock:
+                self.prefetches.pop(url, None)
+                self.prefetch_progress.pop(url, None)
+            try:
+                if os.path.exists(local_path):
+                    os.remove(local_path)
+            except:
+                pass
+
+    def prefetch(self, urls):
+        """Fetch the given previews in the background, dropping queued ones no longer wanted."""
+        with self.prefetch_lock:
+            for url, future in list(self.prefetches.items()):
+                if url not in urls and future.cancel():
+                    del self.prefetches[url]
+            for url in urls:
+                if url not in self.prefetches and self.store.lookup_url(url) is None:
+                    self.prefetches[url] = self.prefetch_pool.submit(self._prefetch, url)
+
+    def _wait_for_prefetch(self, url, on_data, cancelled):
+        """Follow a running prefetch of url as if it were our own download."""
+        with self.prefetch_lock:
+            future = self.prefetches.get(url)
+            if future is None:
+                return None
+            # A prefetch still queued is dropped; this download fetches the file itself.
+            if future.cancel():
+                del self.prefetches[url]
+                return None
+
+        local_path = self._prefetch_path(url)
+        while not future.done():
+            if cancelled():
+                return None
+            progress = self.prefetch_progress.get(url)
+            if progress:
+                on_data(*progress, local_path)
+            time.sleep(0.1)
+        try:
+            return future.result()
+        except Exception:
+            return None
+
+    def _start(self, path, callback, generation, pcm=None):
+        with self.playback_lock:
+            if self.generation != generation:
+                return
+            if pcm is None:
+                pygame.mixer.music.load(path)
+                pygame.mixer.music.play()
+            else:
+                self.engine.load(pcm)
+            self.decoded = pcm is not None
+            self.playing = True
+            self.current_file = path
+            self.start_time = time.time()
+            self.loaded_seconds = self.buffered_seconds
+        self.time_to_first_audio = self.start_time - self.requested_at
+        callback(True, "Playing", 0)
+
+    def _reload(self, position, generation):
+        """Reopen the growing file so SDL_mixer sees the audio buffered since the last load."""
+        with self.playback_lock:
+            if self.generation != generation:
+                return
+            pygame.mixer.music.load(self.current_file)
+            pygame.mixer.music.play(start=position)
+            self.start_time = time.time() - position
+            self.loaded_seconds = self.buffered_seconds
+
+    def _needs_reload(self):
+        if self.paused:
+            return False
+        position, _ = self.get_position()
+        return position >= self.loaded_seconds - RELOAD_MARGIN or not pygame.mixer.music.get_busy()
+
+    def _decode(self, path):
+        try:
+            return decode(path)
+        except Exception:
+            return None
+
+    def _switch_to_decoded(self, pcm, generation):
+        """Hand a streamed preview over to the PCM engine at the current position."""
+        with self.playback_lock:
+            if not self.playing or self.generation != generation:
+                return
+            position, _ = self.get_position()
+            paused = self.paused_at is not None
+            pygame.mixer.music.stop()
+            self.engine.load(pcm, min(position, self.loaded_seconds), paused)
+            self.decoded = True
+            self.paused_at = None
+
+    def _download_and_play(self, url: str, callback, generation):
+        fd, local_path = tempfile.mkstemp(suffix=".mp3", dir=self.temp_dir)
+        os.close(fd)
+        stream = {'offset': 0, 'rate': None, 'next_probe': 0}
+
+        def current():
+            return self.generation == generation
+
+        def cancelled():
+            return not current()
+
+        def report(success, message, progress):
+            # Events carry their generation, so the UI can drop those of a superseded track.
+            if current():
+                callback(success, message, progress, generation)
+
+        def on_data(downloaded, total_size, path=local_path):
+            if not current():
+                return
+            self.download_progress = int((downloaded / total_size) * 100) if total_size > 0 else 0
+            if self.buffer_seconds is None:
+                report(None, "Downloading", self.download_progress)
+                return
+
+            # SDL_mixer fixes the length of a file when it is loaded, so playback starts
+            # on the partial file and is reloaded at the playhead as more audio arrives.
+            if stream['rate'] is None and downloaded >= stream['next_probe']:
+                stream['next_probe'] = downloaded + PROBE_BYTES
+                probe = probe_stream(path)
+                if probe:
+                    stream['offset'], stream['rate'] = probe
+                    if total_size > 0:
+                        self.duration = (total_size - stream['offset']) / stream['rate']
+            if stream['rate'] is None:
+                report(None, "Buffering", self.download_progress)
+                return
+
+            self.buffered_seconds = max(0.0, downloaded - stream['offset']) / stream['rate']
+            if not self.playing:
+                if self.buffered_seconds >= self.buffer_seconds:
+                    self._start(path, report, generation)
+                else:
+                    report(None, "Buffering", self.download_progress)
+            elif self.buffered_seconds >= self.loaded_seconds + RELOAD_MARGIN and self._needs_reload():
+                position, _ = self.get_position()
+                self._reload(min(position, self.loaded_seconds), generation)
+
+        try:
+            with self.playback_lock:
+                if current():
+                    self.download_path = local_path
+            sha256 = self.cache.lookup(url)
+            if sha256 is not None:
+                self.cache.count_hit(sha256)
+            else:
+                sha256 = self._wait_for_prefetch(url, on_data, cancelled)
+                if sha256 is not None:
+                    self.cache.count_hit(sha256, saved=False)
+                elif current():
+                    self.cache.count_miss()
+                    sha256 = self._fetch(url, local_path, on_data, cancelled)
+
+            if sha256 is None:
                 try:
                     if os.path.exists(local_path):
                         os.remove(local_path)
                 except:
                     pass
-                callback(False, "Download cancelled", 0)
+                # A superseded download leaves the player to the one that replaced it.
+                if current():
+                    self.is_downloading = False
+                    self.download_progress = 0
+                    if not self.playing:
+                        report(False, "Download cancelled", 0)
+                return
+
+            path = str(self.store.object_path(sha256))
+            try:
+                duration = MP3(path).info.length
+            except Exception:
+                duration = 0.0
+            pcm = self._decode(path)
+            if not current():
                 return
 
-            if not os.path.exists(local_path) or os.path.getsize(local_path) == 0:
+            self.cache.pinned = {sha256}
+            self.duration = duration
+            self.buffered_seconds = duration
+            if not self.playing:
+                self.loaded_seconds = duration
+                self._start(path, report, generation, pcm)
                 self.is_downloading = False
                 self.download_progress = 0
-                callback(False, "Download failed or empty file", 0)
                 return
 
-            try:
-                audio = MP3(local_path)
-                self.duration = audio.info.length
-            except Exception:
-                self.duration = 0.0
-
-            pygame.mixer.music.load(local_path)
-            pygame.mixer.music.play()
-            self.playing = True
-            self.current_file = local_path
-            self.start_time = time.time()
+            with self.playback_lock:
+                if self.generation != generation:
+                    return
+                self.current_file = path
             self.is_downloading = False
             self.download_progress = 0
-            callback(True, "Playing", 0)
+
+            if pcm is not None:
+                self._switch_to_decoded(pcm, generation)
+                return
+
+            # Playback is still on the partial file: switch to the full one before it runs out.
+            while self.playing and self.generation == generation and self.loaded_seconds < self.duration:
+                if self._needs_reload():
+                    position, _ = self.get_position()
+                    self._reload(min(position, self.loaded_seconds), generation)
+                    break
+                time.sleep(0.1)
 
         except urllib.error.URLError as e:
-            self.is_downloading = False
-            self.download_progress = 0
             try:
                 if os.path.exists(local_path):
                     os.remove(local_path)
             except:
                 pass
-            callback(False, f"Network error: {e.reason}", 0)
+            if current():
+                self.is_downloading = False
+                self.download_progress = 0
+                report(False, f"Network error: {e.reason}", 0)
         except Exception as e:
-            self.is_downloading = False
-            self.download_progress = 0
             try:
                 if os.path.exists(local_path):
                     os.remove(local_path)
             except:
                 pass
-            callback(False, f"Error: {str(e)}", 0)
+            if current():
+                self.is_downloading = False
+                self.download_progress = 0
+                report(False, f"Error: {str(e)}", 0)
 
     def play(self, url: str, callback):
         if not AUDIO_AVAILABLE:
             callback(False, "pygame not available", 0)
             return
 
-        self.cancel_current_download()
         self.stop()
 
-        self.cancel_download = False
         self.is_downloading = True
         self.download_progress = 0
+        self.buffered_seconds = 0.0
+        self.loaded_seconds = 0.0
+        self.duration = 0.0
+        self.requested_at = time.time()
+        self.time_to_first_audio = None
 
         self.download_thread = threading.Thread(
             target=self._download_and_play,
-            args=(url, callback),
+            args=(url, callback, self.generation),
             daemon=True
         )
         self.download_thread.start()
@@ -172,10 +421,14 @@ class MusicPlayer:
         self.cancel_current_download()
 
         if self.playing:
-            pygame.mixer.music.stop()
-            self.playing = False
-
-        if self.current_file and os.path.exists(self.current_file):
+            with self.playback_lock:
+                self.engine.stop()
+                pygame.mixer.music.stop()
+                self.playing = False
+                self.decoded = False
+                self.paused_at = None
+
+        if self.current_file and self.current_file == self.download_path and os.path.exists(self.current_file):
             try:
                 os.remove(self.current_file)
             except:
@@ -185,56 +438,270 @@ class MusicPlayer:
     def is_playing(self) -> bool:
         if not AUDIO_AVAILABLE:
             return False
-        return self.playing and pygame.mixer.music.get_busy()
+        if self.decoded:
+            return self.playing and self.engine.is_active()
+        return self.playing and (pygame.mixer.music.get_busy() or self.paused_at is not None)
 
-    def seek_forward(self, seconds: int = 5) -> None:
-        if not AUDIO_AVAILABLE or not self.playing or not self.current_file:
-            return
-        try:
-            current_pos, _ = self.get_position()
-            new_pos = min(current_pos + seconds, self.duration)
+    @property
+    def paused(self) -> bool:
+        if self.decoded:
+            return self.engine.paused
+        return self.paused_at is not None
 
-            pygame.mixer.music.stop()
-            pygame.mixer.music.load(self.current_file)
-            pygame.mixer.music.play(start=new_pos)
-            self.start_time = time.time() - new_pos
-        except Exception:
-            pass
+    def toggle_pause(self) -> None:
+        if not AUDIO_AVAILABLE or not self.playing:
+            return
+        with self.playback_lock:
+            if self.decoded:
+                if self.engine.paused:
+                    self.engine.resume()
+                else:
+                    self.engine.pause()
+            elif self.paused_at is None:
+                pygame.mixer.music.pause()
+                self.paused_at = time.time()
+            else:
+                self.start_time += time.time() - self.paused_at
+                self.paused_at = None
+                pygame.mixer.music.unpause()
+
+    def seekable_seconds(self) -> float:
+        if self.is_downloading:
+            return max(0.0, self.buffered_seconds - RELOAD_MARGIN)
+        return self.duration
 
-    def seek_backward(self, seconds: int = 5) -> None:
+    def seek_to(self, position: float) -> None:
         if not AUDIO_AVAILABLE or not self.playing or not self.current_file:
             return
-        try:
-            current_pos, _ = self.get_position()
-            new_pos = max(0, current_pos - seconds)
+        position = min(max(0.0, position), self.seekable_seconds())
+        with self.playback_lock:
+            if self.decoded:
+                self.engine.seek(position)
+                return
+            try:
+                pygame.mixer.music.stop()
+                pygame.mixer.music.load(self.current_file)
+                pygame.mixer.music.play(start=position)
+                self.start_time = time.time() - position
+                self.loaded_seconds = self.buffered_seconds
+                if self.paused_at is not None:
+                    pygame.mixer.music.pause()
+                    self.paused_at = time.time()
+            except Exception:
+                pass
 
-            pygame.mixer.music.stop()
-            pygame.mixer.music.load(self.current_file)
-            pygame.mixer.music.play(start=new_pos)
-            self.start_time = time.time() - new_pos
-        except Exception:
-            pass
+    def seek_forward(self, seconds: int = 5) -> None:
+        current_pos, _ = self.get_position()
+        if min(current_pos + seconds, self.seekable_seconds()) > current_pos:
+            self.seek_to(current_pos + seconds)
+
+    def seek_backward(self, seconds: int = 5) -> None:
+        current_pos, _ = self.get_position()
+        self.seek_to(current_pos - seconds)
 
     def get_position(self) -> tuple[float, float]:
         if not AUDIO_AVAILABLE or not self.playing:
             return (0.0, 0.0)
+        if self.decoded:
+            return (self.engine.position(), self.duration)
         try:
-            elapsed = time.time() - self.start_time
+            elapsed = (self.paused_at or time.time()) - self.start_time
             return (elapsed, self.duration)
         except Exception:
             return (0.0, 0.0)
 
     def cleanup(self):
+        self.closing = True
+        self.prefetch_pool.shutdown(wait=False, cancel_futures=True)
         self.stop()
+        self.cache.close()
         try:
             os.rmdir(self.temp_dir)
         except:
             pass
 
 
+class PlayerEvents:
+    """Delivers the player's status callbacks to the UI thread, coalesced and rate-limited.
+
+    Progress updates keep only the latest value and reach the UI at most once per
+    interval; results (success or failure) are delivered straight away.
+    """
+
+    def __init__(self, app, handler, interval=PROGRESS_INTERVAL):
+        self.app = app
+        self.handler = handler
+        self.interval = interval
+        self.ui_thread = threading.get_ident()
+        self.lock = threading.Lock()
+        self.pending = None
+        self.scheduled = False
+        self.last_event = None
+        self.last_delivery = 0.0
+        self.emitted = 0
+        self.delivered = 0
+
+    def __call__(self, success, message, progress, generation=None):
+        event = (success, message, progress, generation)
+        with self.lock:
+            self.emitted += 1
+            self.pending = event
+            if self.scheduled and success is None:
+                return
+            self.scheduled = True
+            delay = 0.0 if success is not None else max(0.0, self.last_delivery + self.interval - time.monotonic())
+
+        if threading.get_ident() == self.ui_thread:
+            self._schedule(delay)
+            return
+        try:
+            self.app.call_from_thread(self._schedule, delay)
+        except RuntimeError:
+            pass
+
+    def _schedule(self, delay):
+        if delay > 0:
+            self.app.set_timer(delay, self._deliver)
+        else:
+            self._deliver()
+
+    def _deliver(self):
+        with self.lock:
+            event, self.pending = self.pending, None
+            self.scheduled = False
+            if event is None or (event[0] is None and event == self.last_event):
+                return
+            self.last_event = event
+            self.last_delivery = time.monotonic()
+            self.delivered += 1
+        self.handler(*event)
+
+
+class UploadTable(ScrollView, can_focus=True):
+    """
+    A table of catalog rows that only renders the rows on screen. DataTable measures
+    and lays out every row it holds whenever rows are added, so filling it with the
+    whole catalog stalled key presses for up to a second per refresh; this table just
+    indexes into the rows it is given, so showing or filtering the catalog costs the
+    same as drawing one screen.
+    """
+
+    COLUMNS = [("Selected", 8), ("ID", 8), ("Name", 30), ("Artist", 15), ("BPM", 8), ("Tags", 20), ("Files", 5)]
+    COMPONENT_CLASSES = {"upload-table--header", "upload-table--cursor"}
+    BINDINGS = [
+        Binding("up", "cursor_up", "Up", show=False),
+        Binding("down", "cursor_down", "Down", show=False),
+        Binding("pageup", "cursor_page_up", "Page up", show=False),
+        Binding("pagedown", "cursor_page_down", "Page down", show=False),
+        Binding("home", "cursor_first", "First", show=False),
+        Binding("end", "cursor_last", "Last", show=False),
+    ]
+
+    class RowHighlighted(Message):
+        def __init__(self, row):
+            super().__init__()
+            self.row = row
+
+    def __init__(self, cells, **kwargs):
+        super().__init__(**kwargs)
+        self.cells = cells
+        self.rows = range(0)
+        self.cursor_row = 0
+        self.highlighted = None
+        self.line_width = sum(width + 2 for _, width in self.COLUMNS)
+
+    def show(self, rows):
+        """Show catalog rows (in catalog order), keeping the cursor on its row if it is among them."""
+        self.rows = rows
+        self.virtual_size = Size(self.line_width, len(rows) + 1)
+        self.move_cursor(self.index_of(self.highlighted) or 0)
+        self.refresh()
+
+    def index_of(self, row):
+        if row is None:
+            return None
+        index = bisect.bisect_left(self.rows, row)
+        return index if index < len(self.rows) and self.rows[index] == row else None
+
+    def page_rows(self):
+        return max(1, self.size.height - 1)
+
+    def move_cursor(self, index):
+        if not self.rows:
+            self.cursor_row = 0
+            self.highlighted = None
+            return
+        previous = self.cursor_row
+        self.cursor_row = max(0, min(index, len(self.rows) - 1))
+        top = round(self.scroll_y)
+        if self.cursor_row < top:
+            self.scroll_to(y=self.cursor_row, animate=False)
+        elif self.cursor_row >= top + self.page_rows():
+            self.scroll_to(y=self.cursor_row - self.page_rows() + 1, animate=False)
+        self.refresh_line(previous + 1)
+        self.refresh_line(self.cursor_row + 1)
+
+        row = self.rows[self.cursor_row]
+        if row != self.highlighted:
+            self.highlighted = row
+            self.post_message(self.RowHighlighted(row))
+
+    def refresh_row(self, row):
+        index = self.index_of(row)
+        if index is not None:
+            self.refresh_line(index + 1)
+
+    def render_line(self, y):
+        width = self.size.width
+        if y == 0:
+            cells = [name for name, _ in self.COLUMNS]
+            style = self.get_component_rich_style("upload-table--header")
+        else:
+            index = round(self.scroll_y) + y - 1
+            if index >= len(self.rows):
+                return Strip.blank(width, self.rich_style)
+            cells = self.cells(self.rows[index])
+            style = self.rich_style
+            if index == self.cursor_row:
+                style += self.get_component_rich_style("upload-table--cursor")
+        text = "".join(f" {set_cell_size(cell, column_width)} " for cell, (_, column_width) in zip(cells, self.COLUMNS))
+        scroll_x = round(self.scroll_x)
+        return Strip([Segment(text, style)]).crop_extend(scroll_x, scroll_x + width, style)
+
+    def on_click(self, event):
+        offset = event.get_content_offset(self)
+        if offset is not None and offset.y > 0:
+            self.move_cursor(round(self.scroll_y) + offset.y - 1)
+
+    def on_focus(self, event):
+        self.refresh()
+
+    def on_blur(self, event):
+        self.refresh()
+
+    def action_cursor_up(self):
+        self.move_cursor(self.cursor_row - 1)
+
+    def action_cursor_down(self):
+        self.move_cursor(self.cursor_row + 1)
+
+    def action_cursor_page_up(self):
+        self.move_cursor(self.cursor_row - self.page_rows())
+
+    def action_cursor_page_down(self):
+        self.move_cursor(self.cursor_row + self.page_rows())
+
+    def action_cursor_first(self):
+        self.move_cursor(0)
+
+    def action_cursor_last(self):
+        self.move_cursor(len(self.rows) - 1)
+
+
 class MetadataPanel(Static):
     upload_data = reactive(None)
     selected_file_index = reactive(0)
+    library_text = reactive("")
 
     def watch_upload_data(self, data):
         self.selected_file_index = 0
@@ -243,62 +710,20 @@ class MetadataPanel(Static):
     def watch_selected_file_index(self, index):
         self.refresh_display()
 
+    def watch_library_text(self, text):
+        self.refresh_display()
+
     def refresh_display(self):
         if self.upload_data:
-            self.update(self.render_metadata(self.upload_data, self.selected_file_index))
+            self.update(self.upload_data.render(self.selected_file_index) + self.library_text)
         else:
             self.update("Select an upload to view metadata")
 
-    def render_metadata(self, data, selected_file_index=0) -> str:
-        def safe_escape(text):
-            return str(text).replace('[', '\\[').replace(']', '\\]')
-
-        extra = data.get("upload_extra", {})
-        files = data.get("files", [])
-
-        mp3_files = [f for f in files if f.get('file_name', '').lower().endswith('.mp3')]
-
-        files_list = ""
-        for i, f in enumerate(mp3_files):
-            marker = "▶" if i == selected_file_index else " "
-            file_size = safe_escape(f.get('file_filesize', ''))
-            file_name = safe_escape(f.get('file_name', 'Unknown'))
-            files_list += f"{marker} ({i}) {file_name} {file_size}\n"
-
-        upload_name = safe_escape(data.get('upload_name', 'N/A'))
-        user_real_name = safe_escape(data.get('user_real_name', 'N/A'))
-        upload_date = safe_escape(data.get('upload_date_format', 'N/A'))
-        license_name = safe_escape(data.get('license_name', 'N/A'))
-        usertags = safe_escape(extra.get('usertags', 'N/A'))
-        bpm = safe_escape(extra.get('bpm', 'N/A'))
-        description = safe_escape(data.get('upload_description_plain', 'N/A'))[:300]
-        page_url = safe_escape(data.get('file_page_url', 'N/A'))
-        upload_id = safe_escape(data.get('upload_id', 'N/A'))
-        upload_num_scores = safe_escape(data.get('upload_num_scores', 0))
-
-        content = f"""[bold cyan]{upload_name}[/bold cyan]
-
-[yellow]Artist:[/yellow] {user_real_name}
-[yellow]Upload ID:[/yellow] {upload_id}
-[yellow]Date:[/yellow] {upload_date}
-[yellow]License:[/yellow] {license_name}
-[yellow]Tags:[/yellow] {usertags}
-[yellow]BPM:[/yellow] {bpm}
-[yellow]Scores:[/yellow] {upload_num_scores}
-
-[yellow]Versions:[/yellow]
-{files_list}
-[yellow]Description:[/yellow]
-{description}
-
-[yellow]Page:[/yellow] {page_url}
-"""
-        return content
-
 
 class StatusPanel(Static):
     status_text = reactive("Ready")
     progress_text = reactive("")
+    cache_text = reactive("")
 
     def watch_status_text(self, text):
         self.refresh_display()
@@ -306,11 +731,17 @@ class StatusPanel(Static):
     def watch_progress_text(self, text):
         self.refresh_display()
 
+    def watch_cache_text(self, text):
+        self.refresh_display()
+
     def refresh_display(self):
         if self.progress_text:
-            self.update(f"[bold]{self.status_text}[/bold] {self.progress_text}")
+            text = f"[bold]{self.status_text}[/bold] {self.progress_text}"
         else:
-            self.update(f"[bold]{self.status_text}[/bold]")
+            text = f"[bold]{self.status_text}[/bold]"
+        if self.cache_text:
+            text += f" [dim]({self.cache_text})[/dim]"
+        self.update(text)
 
 
 class CCMixterBrowser(App):
@@ -350,12 +781,37 @@ class CCMixterBrowser(App):
         padding: 1;
     }
 
-    DataTable {
-        height: 100%;
+    #search_input {
+        margin-bottom: 1;
+    }
+
+    #jump_input {
+        width: 12;
+    }
+
+    #label_input {
+        width: 16;
+    }
+
+    UploadTable {
+        height: 1fr;
+        background: $surface;
     }
 
-    DataTable > .datatable--header {
+    UploadTable > .upload-table--header {
         text-style: bold;
+        background: $panel;
+    }
+
+    UploadTable > .upload-table--cursor {
+        background: $block-cursor-blurred-background;
+        color: $block-cursor-blurred-foreground;
+    }
+
+    UploadTable:focus > .upload-table--cursor {
+        background: $block-cursor-background;
+        color: $block-cursor-foreground;
+        text-style: $block-cursor-text-style;
     }
 
     MetadataPanel {
@@ -383,31 +839,52 @@ class CCMixterBrowser(App):
     BINDINGS = [
         Binding("q", "quit", "Quit"),
         Binding("s", "toggle_select", "Select/Unselect"),
+        Binding("l", "focus_label", "Label"),
         Binding("p", "play_music", "Play/Stop"),
+        Binding("slash", "focus_search", "Search"),
+        Binding("space", "toggle_pause", "Pause/Resume"),
+        Binding("g", "focus_jump", "Go to MM:SS"),
         Binding("shift+up", "prev_file", "Shift+↑ Version", show=True),
         Binding("shift+down", "next_file", "Shift+↓ Version", show=True),
         Binding("left", "seek_backward", "Seek -5s", show=True, priority=True),
         Binding("right", "seek_forward", "Seek +5s", show=True, priority=True),
     ]
 
-    def __init__(self):
+    def __init__(self, buffer_seconds: Optional[float] = STREAM_BUFFER_SECONDS):
         super().__init__()
-        self.uploads = []
-        self.selected_ids: Set[int] = set()
-        self.player = MusicPlayer()
+        self.catalog = None
+        self.model = None
+        self.search_index = None
+        self.library = None
+        self.search_query = ""
+        self.row_order = range(0)
+        self.selections = None
+        self.label = DEFAULT_LABEL
+        self.player = MusicPlayer(buffer_seconds)
         self.current_upload = None
         self.current_upload_id = None
         self.current_track_name = ""
         self.play_mode = False
         self.data_file = Path("dataset/ccmixter_data.jsonl")
+        self.music_dir = Path("dataset/music")
         self.selection_file = Path("dataset/selected_uploads.txt")
+        self.journal_file = Path("dataset/selected_uploads.journal")
+        self.table = None
+        self.metadata_panel = None
+        self.status_panel = None
+        self.play_button = None
+        self.search_input = None
+        self.jump_input = None
+        self.label_input = None
+        self.player_events = None
 
     def compose(self) -> ComposeResult:
         yield Header()
 
         with Horizontal(id="main_container"):
             with Container(id="uploads_container"):
-                yield DataTable(id="uploads_table", cursor_type="row")
+                yield Input(placeholder="Search: words, tag:house, bpm:120-128", id="search_input")
+                yield UploadTable(self.table_cells, id="uploads_table")
 
             with Vertical(id="right_panel"):
                 with Container(id="metadata_container"):
@@ -420,86 +897,153 @@ class CCMixterBrowser(App):
                     with Horizontal():
                         yield Button("Play Mode: Off", id="btn_play_stop", variant="error")
                         yield Button("Toggle Select", id="btn_select", variant="primary")
+                        yield Input(placeholder="MM:SS", id="jump_input")
+                        yield Input(placeholder=DEFAULT_LABEL, id="label_input")
 
         yield Footer()
 
     def on_mount(self) -> None:
+        self.table = self.query_one("#uploads_table", UploadTable)
+        self.metadata_panel = self.query_one("#metadata_panel", MetadataPanel)
+        self.status_panel = self.query_one("#status_panel", StatusPanel)
+        self.play_button = self.query_one("#btn_play_stop", Button)
+        self.search_input = self.query_one("#search_input", Input)
+        self.jump_input = self.query_one("#jump_input", Input)
+        self.label_input = self.query_one("#label_input", Input)
+        self.player_events = PlayerEvents(self, self._play_callback)
         self.load_data()
         self.load_selections()
-        self.setup_table()
-        self.populate_table()
+        self.table.focus()
+        self.table.show(self.row_order)
         self.navigate_to_last_selected()
+        self.update_row_count()
+        self.build_search_index()
+        self.scan_library()
         self.set_interval(0.5, self.update_progress)
 
     def load_data(self):
-        with open(self.data_file, 'r') as f:
-            self.uploads = [json.loads(line) for line in f]
+        self.catalog = Catalog(self.data_file)
+        self.model = UploadModel(self.catalog)
+        self.row_order = range(len(self.catalog))
 
     def load_selections(self):
-        if self.selection_file.exists():
-            with open(self.selection_file, 'r') as f:
-                self.selected_ids = {int(line.strip()) for line in f if line.strip()}
-
-    def save_selections(self):
-        with open(self.selection_file, 'w') as f:
-            for upload_id in sorted(self.selected_ids, reverse=True):
-                f.write(f"{upload_id}\n")
-
-    def setup_table(self):
-        table = self.query_one("#uploads_table", DataTable)
-        table.add_column("Selected", width=8)
-        table.add_column("ID", width=8)
-        table.add_column("Name", width=30)
-        table.add_column("Artist", width=15)
-        table.add_column("BPM", width=8)
-        table.add_column("Tags", width=20)
-        table.add_column("Files", width=5)
-        table.cursor_type = "row"
-
-    def populate_table(self):
-        table = self.query_one("#uploads_table", DataTable)
-        for upload in self.uploads:
-            upload_id = upload["upload_id"]
-            selected = "✓" if upload_id in self.selected_ids else " "
-            extra = upload.get("upload_extra", {})
-            tags = extra.get("usertags", "")
-
-            upload_name = str(upload["upload_name"])
-            artist_name = str(upload.get("user_real_name", ""))
-            bpm = str(extra.get("bpm", ""))
-            if not bpm:
-                bpm = "-"
-
-            table.add_row(
-                selected,
-                str(upload_id),
-                upload_name,
-                artist_name,
-                bpm,
-                tags,
-                str(len(upload.get("files", []))),
-                key=str(upload_id)
-            )
+        self.selections = SelectionJournal(self.journal_file, self.selection_file)
+        if self.selections.needs_compaction():
+            self.compact_selections()
+
+    @work(thread=True, exclusive=True, group="compact_selections")
+    def compact_selections(self):
+        self.selections.compact()
+
+    def selection_mark(self, upload_id):
+        labels = self.selections.labels_of(upload_id)
+        names = sorted(labels - {DEFAULT_LABEL})
+        if DEFAULT_LABEL in labels:
+            names.insert(0, "✓")
+        return ",".join(names) or " "
+
+    def table_cells(self, row):
+        catalog = self.catalog
+        bpm = f"{catalog.bpms[row]:g}" if catalog.bpms[row] else "-"
+        return [
+            self.selection_mark(catalog.upload_ids[row]),
+            str(catalog.upload_ids[row]),
+            catalog.name(row),
+            catalog.artist(row),
+            bpm,
+            catalog.tags(row),
+            str(catalog.file_counts[row]),
+        ]
+
+    def update_row_count(self):
+        total = len(self.catalog)
+        shown = len(self.row_order)
+        if shown < total:
+            self.sub_title = f"{shown} of {total} uploads match"
+        else:
+            self.sub_title = f"{total} uploads"
+
+    @work(thread=True, exclusive=True, group="search_index")
+    def build_search_index(self):
+        index = SearchIndex(self.catalog)
+        self.call_from_thread(self.on_search_index_ready, index)
+
+    @work(thread=True, exclusive=True, group="library")
+    def scan_library(self):
+        library = Library(self.music_dir)
+        library.scan()
+        self.call_from_thread(self.on_library_ready, library)
+
+    def on_library_ready(self, library):
+        self.library = library
+        if self.current_upload_id is not None:
+            self.metadata_panel.library_text = self.library_text(self.current_upload_id)
+
+    def library_text(self, upload_id):
+        if self.library is None:
+            return ""
+        files = self.library.for_upload(upload_id)
+        if not files:
+            return ""
+        lines = "".join(f"  {name}: {escape(format_entry(entry))}\n" for name, entry in files)
+        return f"\n[yellow]Downloaded:[/yellow]\n{lines}"
+
+    def on_search_index_ready(self, index):
+        self.search_index = index
+        if self.search_query.strip():
+            self.apply_search(self.search_query)
+
+    def on_input_changed(self, event: Input.Changed):
+        if event.input.id == "search_input":
+            self.apply_search(event.value)
+
+    def on_input_submitted(self, event: Input.Submitted):
+        if event.input.id == "jump_input":
+            self.jump_to(event.value)
+            event.input.value = ""
+        elif event.input.id == "label_input":
+            self.set_label(event.value)
+        if event.input.id in ("search_input", "jump_input", "label_input"):
+            self.table.focus()
+
+    def action_focus_search(self):
+        self.search_input.focus()
+
+    def check_action(self, action, parameters):
+        # Left and right move the caret in an input instead of seeking the preview.
+        if action in ("seek_forward", "seek_backward") and isinstance(self.focused, Input):
+            return False
+        return True
 
-    def navigate_to_last_selected(self):
-        if not self.selection_file.exists():
+    def apply_search(self, query):
+        self.search_query = query
+        if self.search_index is None:
+            if query.strip():
+                self.sub_title = "Indexing uploads for search..."
             return
 
-        try:
-            with open(self.selection_file, 'r') as f:
-                lines = [line.strip() for line in f if line.strip()]
-                if not lines:
-                    return
+        rows = self.search_index.search(query)
+        self.show_rows(range(len(self.catalog)) if rows is None else rows)
 
-                last_id = int(lines[-1])
+    def show_rows(self, rows):
+        """Make the table show the given catalog rows, in catalog order."""
+        self.row_order = rows
+        # The table only draws the rows on screen, so nothing else needs patching.
+        self.table.show(rows)
+        self.update_row_count()
 
-                table = self.query_one("#uploads_table", DataTable)
-                table.move_cursor(row=table.get_row_index(str(last_id)))
-        except Exception:
-            pass
+    def move_cursor_to(self, upload_id):
+        index = self.table.index_of(self.model.row(upload_id))
+        if index is not None:
+            self.table.move_cursor(index)
 
-    def on_data_table_row_highlighted(self, event):
-        upload_id = int(event.row_key.value)
+    def navigate_to_last_selected(self):
+        last_id = self.selections.last_selected()
+        if last_id is not None:
+            self.move_cursor_to(last_id)
+
+    def on_upload_table_row_highlighted(self, event):
+        upload_id = self.catalog.upload_ids[event.row]
 
         if upload_id == self.current_upload_id:
             return
@@ -508,57 +1052,71 @@ class CCMixterBrowser(App):
             self.player.cancel_current_download()
 
         self.current_upload_id = upload_id
-        self.current_upload = next((u for u in self.uploads if u["upload_id"] == upload_id), None)
+        self.current_upload = self.model.view(upload_id)
 
         if self.current_upload:
-            metadata_panel = self.query_one("#metadata_panel", MetadataPanel)
+            metadata_panel = self.metadata_panel
+            metadata_panel.library_text = self.library_text(upload_id)
             metadata_panel.upload_data = self.current_upload
             metadata_panel.selected_file_index = 0
 
             if self.play_mode:
                 self.play_current_file()
+                self.prefetch_neighbors()
+
+    def prefetch_neighbors(self):
+        table = self.table
+        urls = []
+        for index in (table.cursor_row - 1, table.cursor_row + 1):
+            if 0 <= index < len(self.row_order):
+                view = self.model.view(self.catalog.upload_ids[self.row_order[index]])
+                mp3_file = view.mp3_file(0)
+                if mp3_file and mp3_file.get("download_url"):
+                    urls.append(mp3_file["download_url"])
+        self.player.prefetch(urls)
 
     def action_toggle_select(self):
         if not self.current_upload:
             self.update_status("No upload selected")
             return
 
-        upload_id = self.current_upload["upload_id"]
-        table = self.query_one("#uploads_table", DataTable)
-
-        if upload_id in self.selected_ids:
-            self.selected_ids.remove(upload_id)
-            status = "Unselected"
-        else:
-            self.selected_ids.add(upload_id)
-            status = "Selected"
+        upload_id = self.current_upload.upload_id
+        status = "Selected" if self.selections.toggle(upload_id, self.label) else "Unselected"
+        if self.selections.needs_compaction():
+            self.compact_selections()
 
-        self.save_selections()
         self.refresh_table_row(upload_id)
-        self.update_status(f"{status} upload {upload_id}")
-
-    def refresh_table_row(self, upload_id: int):
-        table = self.query_one("#uploads_table", DataTable)
+        self.update_status(f"{status} upload {upload_id} ({self.label})")
 
-        selected = "✓" if upload_id in self.selected_ids else " "
-
-        row_key = str(upload_id)
+    def action_focus_label(self):
+        self.label_input.focus()
 
+    def set_label(self, text: str):
+        label = text.strip() or DEFAULT_LABEL
         try:
-            from textual.coordinate import Coordinate
-            row_index = table.get_row_index(row_key)
-            coord = Coordinate(row_index, 0)
-            table.update_cell_at(coord, selected)
-        except Exception:
-            pass
+            self.label = check_label(label)
+        except ValueError as e:
+            self.update_status(str(e))
+            return
+        self.label_input.value = "" if label == DEFAULT_LABEL else label
+        self.update_status(f"Selecting under label: {label}")
+
+    def refresh_table_row(self, upload_id: int):
+        self.table.refresh_row(self.model.row(upload_id))
 
-    def _play_callback(self, success, message, progress):
+    def _play_callback(self, success, message, progress, generation=None):
+        if generation is not None and generation != self.player.generation:
+            return
         if success is None:
-            status_panel = self.query_one("#status_panel", StatusPanel)
-            status_panel.status_text = f"Downloading: {self.current_track_name}"
+            status_panel = self.status_panel
+            status_panel.status_text = f"{message}: {self.current_track_name}"
             status_panel.progress_text = f"[{progress}%]"
         elif success:
-            self.update_status(f"Playing: {self.current_track_name}")
+            first_audio = self.player.time_to_first_audio
+            if first_audio is None:
+                self.update_status(f"Playing: {self.current_track_name}")
+            else:
+                self.update_status(f"Playing: {self.current_track_name} (first audio after {first_audio:.2f}s)")
         else:
             self.update_status(f"Failed: {message}")
             self.current_track_name = ""
@@ -568,26 +1126,19 @@ class CCMixterBrowser(App):
             self.update_status("No upload selected")
             return
 
-        files = self.current_upload.get("files", [])
-        mp3_files = [f for f in files if f.get('file_name', '').lower().endswith('.mp3')]
+        metadata_panel = self.metadata_panel
+        mp3_file = self.current_upload.mp3_file(metadata_panel.selected_file_index)
 
-        if not mp3_files:
+        if not mp3_file:
             self.update_status("No MP3 files available")
             return
 
-        metadata_panel = self.query_one("#metadata_panel", MetadataPanel)
-        file_index = metadata_panel.selected_file_index
-
-        if file_index >= len(mp3_files):
-            file_index = 0
-
-        mp3_file = mp3_files[file_index]
         url = mp3_file.get("download_url")
 
         if url:
             self.current_track_name = mp3_file['file_name']
             self.update_status(f"Starting download: {self.current_track_name}")
-            self.player.play(url, self._play_callback)
+            self.player.play(url, self.player_events)
         else:
             self.update_status("No download URL available")
 
@@ -599,6 +1150,7 @@ class CCMixterBrowser(App):
         else:
             self.play_mode = True
             self.play_current_file()
+            self.prefetch_neighbors()
             self.update_play_button()
 
     def action_stop_music(self):
@@ -610,13 +1162,12 @@ class CCMixterBrowser(App):
         if not self.current_upload:
             return
 
-        files = self.current_upload.get("files", [])
-        mp3_files = [f for f in files if f.get('file_name', '').lower().endswith('.mp3')]
+        mp3_files = self.current_upload.mp3_files
 
         if not mp3_files:
             return
 
-        metadata_panel = self.query_one("#metadata_panel", MetadataPanel)
+        metadata_panel = self.metadata_panel
         metadata_panel.selected_file_index = (metadata_panel.selected_file_index + 1) % len(mp3_files)
 
         if self.play_mode:
@@ -626,18 +1177,40 @@ class CCMixterBrowser(App):
         if not self.current_upload:
             return
 
-        files = self.current_upload.get("files", [])
-        mp3_files = [f for f in files if f.get('file_name', '').lower().endswith('.mp3')]
+        mp3_files = self.current_upload.mp3_files
 
         if not mp3_files:
             return
 
-        metadata_panel = self.query_one("#metadata_panel", MetadataPanel)
+        metadata_panel = self.metadata_panel
         metadata_panel.selected_file_index = (metadata_panel.selected_file_index - 1) % len(mp3_files)
 
         if self.play_mode:
             self.play_current_file()
 
+    def action_toggle_pause(self):
+        if self.player.playing:
+            self.player.toggle_pause()
+            self.update_status(f"{'Paused' if self.player.paused else 'Playing'}: {self.current_track_name}")
+
+    def action_focus_jump(self):
+        self.jump_input.focus()
+
+    def jump_to(self, text: str):
+        if not self.player.playing:
+            self.update_status("Nothing is playing")
+            return
+        try:
+            position = parse_time(text)
+        except ValueError as e:
+            self.update_status(str(e))
+            return
+        if position > self.player.seekable_seconds():
+            self.update_status(f"{text.strip()} is beyond the buffered audio")
+            return
+        self.player.seek_to(position)
+        self.update_status(f"Playing: {self.current_track_name} from {text.strip()}")
+
     def action_seek_forward(self):
         if self.player.is_playing():
             self.player.seek_forward(5)
@@ -654,11 +1227,11 @@ class CCMixterBrowser(App):
             self.action_toggle_select()
 
     def update_status(self, text: str):
-        status_panel = self.query_one("#status_panel", StatusPanel)
+        status_panel = self.status_panel
         status_panel.status_text = text
 
     def update_play_button(self) -> None:
-        button = self.query_one("#btn_play_stop", Button)
+        button = self.play_button
         if self.play_mode:
             button.label = "Play Mode: On"
             button.variant = "success"
@@ -676,18 +1249,50 @@ class CCMixterBrowser(App):
                 pos_secs = int(pos % 60)
                 dur_mins = int(duration // 60)
                 dur_secs = int(duration % 60)
-                status_panel = self.query_one("#status_panel", StatusPanel)
+                status_panel = self.status_panel
                 status_panel.progress_text = f"[{pos_mins:02d}:{pos_secs:02d}/{dur_mins:02d}:{dur_secs:02d}]"
+                if self.player.paused:
+                    status_panel.progress_text += " [paused]"
+                if self.player.is_downloading:
+                    buffered = self.player.buffered_seconds
+                    status_panel.progress_text += f" [{int(buffered // 60):02d}:{int(buffered % 60):02d} buffered]"
         else:
-            status_panel = self.query_one("#status_panel", StatusPanel)
+            status_panel = self.status_panel
             status_panel.progress_text = ""
 
+        status_panel = self.status_panel
+        status_panel.cache_text = self.player.cache.format_stats()
         self.update_play_button()
 
     def on_unmount(self):
         self.player.cleanup()
+        if self.selections:
+            # Leave the snapshots current for the downloader and other readers.
+            if self.selections.appended:
+                self.selections.compact()
+            self.selections.close()
+        if self.catalog:
+            self.catalog.close()
 
 
 if __name__ == "__main__":
-    app = CCMixterBrowser()
+    parser = argparse.ArgumentParser(
+        description="Browse, preview and select ccMixter uploads",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--buffer-seconds",
+        type=float,
+        default=STREAM_BUFFER_SECONDS,
+        help="Seconds of audio to buffer before a preview starts playing"
+    )
+    parser.add_argument(
+        "--no-stream",
+        action="store_true",
+        help="Wait for the whole preview to download before playing it"
+    )
+
+    args = parser.parse_args()
+
+    app = CCMixterBrowser(None if args.no_stream else args.buffer_seconds)
     app.run()
@@ -0,0 +1,249 @@
+"""
+Analyze tracks with every evaluation task prompt at once.
+Each prompt in evaluation/prompts/*.md (BPM, key and chords, structure, cue points,
+drops, loops, mood, vocals, genre) becomes one /chat_predict job for a track, and the
+answers are combined into one record per track:
+
+    {"audio": "dataset/music/17_0.mp3", "tasks": {"bpm_estimation": "...", ...},
+     "errors": {}, "settings": {"temperature": 0.6, ...}}
+
+The jobs run through infer.py's batch machinery on one shared client, so a track's
+audio is uploaded once for all of its tasks (see upload_registry.py) and deterministic
+answers come from the response cache. Given a directory, all of its tracks form a
+single pipeline: jobs are queued track after track with at most --max-in-flight on the
+server, so the next track's tasks fill the slots freed by the last one's and the GPU
+queue never drains between tracks. Each track's record is written as soon as its last
+task finishes, and --resume only runs the tasks an earlier record with the same
+settings has no answer for.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from infer import JOB_DEFAULTS, MAX_IN_FLIGHT, RETRIES, connect, run_batch
+from response_cache import ResponseCache
+from upload_registry import UploadRegistry
+
+
+PROMPT_DIR = Path(__file__).parent.parent / "evaluation" / "prompts"
+SETTINGS = ["system_prompt", "temperature", "top_p", "top_k", "enable_thinking"]
+
+
+def read_tasks(prompt_dir=PROMPT_DIR, names=None):
+    """{task name: prompt} for the prompts in prompt_dir, in name order, optionally only the named ones."""
+    tasks = {path.stem: path.read_text().strip() for path in sorted(Path(prompt_dir).glob("*.md"))}
+    if names:
+        unknown = [name for name in names if name not in tasks]
+        if unknown:
+            raise ValueError(f"Unknown tasks: {', '.join(unknown)} (available: {', '.join(tasks)})")
+        tasks = {name: tasks[name] for name in tasks if name in names}
+    return tasks
+
+
+def find_tracks(path):
+    path = Path(path)
+    if path.is_dir():
+        return [str(track) for track in sorted(path.glob("*.mp3"))]
+    return [str(path)]
+
+
+def read_records(path):
+    """{audio: record} from an output file; a later record of a track replaces an earlier one."""
+    records = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short by an interrupted run.
+                records[record["audio"]] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+
+class TrackAnalyses:
+    """Collects the job records of each track and hands over its combined record once all tasks are in."""
+
+    def __init__(self, tracks, tasks, settings, on_track, previous=None):
+        self.task_names = list(tasks)
+        self.on_track = on_track
+        self.jobs = []
+        self.tracks = {}
+        self.pending = {}
+        self.records = {}
+        for track in tracks:
+            earlier = (previous or {}).get(track, {})
+            # Answers given with other settings are not mixed into this record.
+            answered = earlier.get("tasks", {}) if earlier.get("settings") == settings else {}
+            self.records[track] = {"audio": track, "tasks": dict(answered), "errors": {}, "settings": settings}
+            missing = [task for task in tasks if task not in answered]
+            self.pending[track] = len(missing)
+            for task in missing:
+                job_id = f"{Path(track).name}:{task}"
+                self.tracks[job_id] = (track, task)
+                self.jobs.append((job_id, {**JOB_DEFAULTS, **settings, "text": tasks[task], "audio": track}))
+
+    def add(self, record):
+        track, task = self.tracks[record["id"]]
+        result = self.records[track]
+        if "response" in record:
+            result["tasks"][task] = record["response"]
+        else:
+            result["errors"][task] = record["error"]
+        self.pending[track] -= 1
+        if self.pending[track] == 0:
+            result = self.records.pop(track)
+            # Answers arrive in completion order; records list them in task order.
+            result["tasks"] = {name: result["tasks"][name] for name in self.task_names if name in result["tasks"]}
+            self.on_track(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run every evaluation task prompt on a track or a directory of tracks",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--client",
+        required=True,
+        help="Gradio client URL (e.g., https://example.com/)"
+    )
+    parser.add_argument(
+        "--audio",
+        required=True,
+        help="MP3 file to analyze, or a directory whose MP3 files are all analyzed"
+    )
+    parser.add_argument(
+        "--output",
+        help="JSONL file the per-track records are written to (default: standard output)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        help="Append to --output and only run the tasks it has no answer for"
+    )
+    parser.add_argument(
+        "--tasks",
+        help="Comma-separated task names to run instead of all of them (e.g. bpm_estimation,genre_classification)"
+    )
+    parser.add_argument(
+        "--prompt-dir",
+        type=Path,
+        default=PROMPT_DIR,
+        help="Directory with the task prompts"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=MAX_IN_FLIGHT,
+        help="Maximum number of task prompts submitted to the server at once, across tracks"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=RETRIES,
+        help="Number of times a failed task prompt is retried"
+    )
+    parser.add_argument(
+        "--system-prompt",
+        default=JOB_DEFAULTS["system_prompt"],
+        help="System prompt for the model"
+    )
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        default=JOB_DEFAULTS["temperature"],
+        help="Sampling temperature"
+    )
+    parser.add_argument(
+        "--top-p",
+        type=float,
+        default=JOB_DEFAULTS["top_p"],
+        help="Top-p sampling parameter"
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=JOB_DEFAULTS["top_k"],
+        help="Top-k sampling parameter"
+    )
+    parser.add_argument(
+        "--enable-thinking",
+        action="store_true",
+        default=JOB_DEFAULTS["enable_thinking"],
+        help="Enable thinking mode"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_const",
+        const="off",
+        dest="cache",
+        default="auto",
+        help="Neither read nor store cached responses"
+    )
+    parser.add_argument(
+        "--cache-sampled",
+        action="store_const",
+        const="all",
+        dest="cache",
+        help="Cache responses to sampled settings too, not only deterministic ones (temperature 0 or top-k 1)"
+    )
+
+    args = parser.parse_args()
+
+    if args.resume and not args.output:
+        parser.error("--resume needs --output")
+    if args.max_in_flight < 1:
+        parser.error("--max-in-flight must be at least 1")
+    try:
+        tasks = read_tasks(args.prompt_dir, args.tasks.split(",") if args.tasks else None)
+    except ValueError as e:
+        parser.error(str(e))
+    if not tasks:
+        parser.error(f"No task prompts in {args.prompt_dir}")
+    tracks = find_tracks(args.audio)
+    if not tracks:
+        parser.error(f"No MP3 files in {args.audio}")
+
+    settings = {option: getattr(args, option) for option in SETTINGS}
+    previous = read_records(args.output) if args.resume else {}
+    output = open(args.output, 'a' if args.resume else 'w') if args.output else sys.stdout
+    failed_tracks = 0
+
+    def write_track(record):
+        nonlocal failed_tracks
+        failed_tracks += bool(record["errors"])
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+        print(f"{record['audio']}: {len(record['tasks'])} of {len(tasks)} tasks answered", file=sys.stderr)
+
+    analyses = TrackAnalyses(tracks, tasks, settings, write_track, previous)
+    print(f"{len(tracks)} tracks x {len(tasks)} tasks, {len(analyses.jobs)} to run", file=sys.stderr)
+    if not analyses.jobs:
+        return
+
+    client = connect(args.client, max_workers=max(40, 3 * args.max_in_flight + 4))
+    registry = UploadRegistry(client)
+    cache = ResponseCache()
+    started = time.monotonic()
+    try:
+        counts = run_batch(client, analyses.jobs, None, args.max_in_flight, args.retries, cache, args.cache,
+                           args.client, registry, analyses.add)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.monotonic() - started
+    print(f"Done in {elapsed:.1f}s: {counts['done']} answered, {counts['failed']} failed, "
+          f"{cache.format_stats()}, {registry.format_stats()}", file=sys.stderr)
+    if failed_tracks:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Send one Qwen3-Omni request through the inference daemon (see infer_daemon.py).
+Takes the same prompt, audio and sampling options as infer.py, but instead of
+connecting to Gradio itself it hands the request to the daemon's warm client over a
+Unix socket, so it only imports the standard library. Options left out get
+infer.py's defaults.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+
+
+SOCKET_PATH = Path(__file__).parent / "cache" / "infer.sock"
+
+
+def is_local(path):
+    return "://" not in path and os.path.exists(path)
+
+
+def ask(job, client=None, socket_path=SOCKET_PATH, cache="auto"):
+    """Send a job to the daemon and return its reply: {"response": ...} or {"error": ...}."""
+    # The daemon runs in its own working directory.
+    job = {key: os.path.abspath(value) if key in ("audio", "image", "video") and value and is_local(value) else value
+           for key, value in job.items()}
+    request = {"client": client, "job": job, "cache": cache}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as f:
+            reply = f.readline()
+    if not reply:
+        return {"error": "The daemon closed the connection without a reply"}
+    return json.loads(reply)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Infer Qwen3-Omni through the inference daemon",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--client",
+        help="Gradio client URL (default: the daemon's first backend)"
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=SOCKET_PATH,
+        help="Unix socket of the daemon"
+    )
+    parser.add_argument(
+        "--text",
+        required=True,
+        help="Text prompt for the model"
+    )
+    parser.add_argument(
+        "--audio",
+        required=True,
+        help="Path or URL to audio file"
+    )
+    parser.add_argument(
+        "--start",
+        help="Only send the audio from this time on (MM:SS or seconds; local MP3 files only)"
+    )
+    parser.add_argument(
+        "--end",
+        help="Only send the audio up to this time (MM:SS or seconds; local MP3 files only)"
+    )
+    parser.add_argument(
+        "--image",
+        help="Path or URL to image file"
+    )
+    parser.add_argument(
+        "--video",
+        help="Path or URL to video file"
+    )
+    parser.add_argument(
+        "--system-prompt",
+        help="System prompt for the model"
+    )
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        help="Sampling temperature"
+    )
+    parser.add_argument(
+        "--top-p",
+        type=float,
+        help="Top-p sampling parameter"
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        help="Top-k sampling parameter"
+    )
+    parser.add_argument(
+        "--return-audio",
+        action="store_true",
+        default=None,
+        help="Return audio output"
+    )
+    parser.add_argument(
+        "--no-return-audio",
+        action="store_false",
+        dest="return_audio",
+        help="Don't return audio output"
+    )
+    parser.add_argument(
+        "--enable-thinking",
+        action="store_true",
+        default=None,
+        help="Enable thinking mode"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_const",
+        const="off",
+        dest="cache",
+        default="auto",
+        help="Neither read nor store cached responses"
+    )
+    parser.add_argument(
+        "--cache-sampled",
+        action="store_const",
+        const="all",
+        dest="cache",
+        help="Cache responses to sampled settings too, not only deterministic ones (temperature 0 or top-k 1)"
+    )
+
+    args = parser.parse_args()
+
+    options = ["text", "audio", "start", "end", "image", "video", "system_prompt",
+               "temperature", "top_p", "top_k", "return_audio", "enable_thinking"]
+    job = {option: getattr(args, option) for option in options if getattr(args, option) is not None}
+    try:
+        reply = ask(job, args.client, args.socket, args.cache)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sys.exit(f"No inference daemon at {args.socket}; start one with inference/infer_daemon.py --client URL")
+
+    if "error" in reply:
+        print(reply["error"], file=sys.stderr)
+        sys.exit(1)
+    print(reply["response"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+A benchmark for the per-call overhead of infer.py and of ask.py with the daemon.
+A stand-in server (see standin_server.py) answers /chat_predict with no delay, so a
+call's wall time is all overhead: starting Python, importing, connecting, uploading
+the audio and the round trip. Each script is run --calls times as a fresh process,
+as a shell loop or an evaluation harness would, and the median and mean wall time
+per call are reported.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from mp3_clip import info_frame, parse_header
+from standin_server import StandIn, make_handler
+
+
+SCRIPT_DIR = Path(__file__).parent
+# MPEG-1 layer III, 128 kbps, 44.1 kHz, joint stereo, no CRC.
+SILENCE_HEADER = b"\xff\xfb\x90\x64"
+
+
+def silence(seconds, header_bytes=SILENCE_HEADER):
+    """The bytes of an MP3 of empty layer III frames, which decode as silence, behind an Info frame."""
+    _, _, sample_rate, size, samples, _ = parse_header(header_bytes, 0)
+    frames = max(1, round(seconds * sample_rate / samples))
+    audio = (header_bytes + bytes(size - 4)) * frames
+    return info_frame(header_bytes, frames, len(audio), False) + audio
+
+
+def time_calls(command, calls):
+    times = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the per-call overhead of infer.py and of ask.py through the daemon",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--calls",
+        type=int,
+        default=10,
+        help="Number of calls per script"
+    )
+    parser.add_argument(
+        "--audio-seconds",
+        type=float,
+        default=30.0,
+        help="Length of the synthetic audio sent with each call"
+    )
+
+    args = parser.parse_args()
+
+    standin = StandIn(slots=1, latency=0.0, fail_rate=0.0, file_ttl=None)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(standin))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        audio = Path(work_dir) / "silence.mp3"
+        audio.write_bytes(silence(args.audio_seconds))
+        audio_kb = audio.stat().st_size / 1024
+        socket_path = Path(work_dir) / "infer.sock"
+        prompt = ["--text", "Estimate the BPM of this track.", "--audio", str(audio)]
+
+        results = {}
+        results["infer.py"] = time_calls(
+            [sys.executable, str(SCRIPT_DIR / "infer.py"), "--client", url, *prompt], args.calls
+        )
+
+        daemon = subprocess.Popen(
+            [sys.executable, str(SCRIPT_DIR / "infer_daemon.py"), "--client", url, "--socket", str(socket_path)],
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            while not socket_path.exists():
+                if daemon.poll() is not None:
+                    sys.exit("The daemon did not start")
+                time.sleep(0.05)
+            results["ask.py + daemon"] = time_calls(
+                [sys.executable, str(SCRIPT_DIR / "ask.py"), "--socket", str(socket_path), *prompt], args.calls
+            )
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    server.shutdown()
+
+    print(f"Audio: {audio_kb:.0f} KB, {args.calls} calls each, server time 0")
+    for name, times in results.items():
+        print(f"{name}: {statistics.median(times) * 1000:.0f} ms median, {statistics.mean(times) * 1000:.0f} ms mean per call")
+
+
+if __name__ == "__main__":
+    main()
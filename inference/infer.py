@@ -1,12 +1,272 @@
 """
 Inference script for Qwen3-Omni using via Gradio
+With --start and/or --end, only that part of a local MP3 file is sent, cut by copying
+MPEG frames (see mp3_clip.py) rather than decoding and re-encoding it.
+
+With --batch, the jobs come from a JSONL file instead, one object per line:
+
+    {"id": "bpm-17", "prompt_file": "evaluation/prompts/bpm_estimation.md",
+     "audio": "dataset/music/17_0.mp3", "temperature": 0.2}
+
+Each job needs "text" (or "prompt_file") and "audio"; "id" defaults to the line
+number, and "system_prompt", "start", "end", "image", "video" and the sampling options
+default to the command line. The jobs share one client and are submitted through the
+Gradio job API with at most --max-in-flight of them queued on the server at a time.
+Every result is appended to --output as soon as it arrives, failed jobs are retried
+up to --retries times, and --resume skips the jobs the output already has a response
+for. Each distinct file is uploaded once per batch (see upload_registry.py), however
+many jobs use it.
+
+Responses to deterministic settings (temperature 0 or top-k 1) are kept in a
+persistent cache (see response_cache.py) and answered from it when the same audio,
+prompt, endpoint and settings come up again; --cache-sampled caches every response
+and --no-cache bypasses the cache.
 """
 
 import argparse
+import heapq
+import json
+import queue
 import sys
 import os
+import time
 from gradio_client import Client, handle_file
 
+from mp3_clip import clip_file, parse_time
+from response_cache import ResponseCache, uses_cache
+from upload_registry import UploadRegistry, is_missing_file
+
+
+MAX_IN_FLIGHT = 4
+RETRIES = 2
+RETRY_DELAY = 2.0
+JOB_DEFAULTS = {
+    "system_prompt": "",
+    "start": None,
+    "end": None,
+    "image": None,
+    "video": None,
+    "temperature": 0.6,
+    "top_p": 0.95,
+    "top_k": 20,
+    "return_audio": False,
+    "enable_thinking": False,
+}
+
+
+def connect(url, max_workers=40):
+    # Initialize client (suppress connection messages)
+    stdout_backup = sys.stdout
+    stderr_backup = sys.stderr
+    devnull = open(os.devnull, 'w')
+    try:
+        sys.stdout = devnull
+        sys.stderr = devnull
+        return Client(url, max_workers=max_workers)
+    finally:
+        sys.stdout = stdout_backup
+        sys.stderr = stderr_backup
+        devnull.close()
+
+
+def audio_source(job):
+    """The audio file or URL sent for a job: its audio, or a clip of it for start and end."""
+    if job.get("start") is None and job.get("end") is None:
+        return job["audio"]
+    if not os.path.isfile(job["audio"]):
+        raise ValueError("start and end need a local MP3 file for the audio")
+    start = parse_time(job["start"]) if job.get("start") is not None else 0.0
+    end = parse_time(job["end"]) if job.get("end") is not None else None
+    return str(clip_file(job["audio"], start, end))
+
+
+def chat_arguments(job, audio=None):
+    """The /chat_predict arguments for a job: text, audio and the options in JOB_DEFAULTS."""
+    return dict(
+        text=job["text"],
+        audio=handle_file(audio or audio_source(job)),
+        image=handle_file(job["image"]) if job.get("image") else None,
+        video={"video": handle_file(job["video"])} if job.get("video") else None,
+        history=[],
+        system_prompt=job["system_prompt"],
+        temperature=job["temperature"],
+        top_p=job["top_p"],
+        top_k=job["top_k"],
+        return_audio=job["return_audio"],
+        enable_thinking=job["enable_thinking"],
+        api_name="/chat_predict"
+    )
+
+
+def endpoint(url):
+    return url.rstrip("/") + "/chat_predict"
+
+
+def cache_key(cache, url, job, mode):
+    """The response cache key of a job, or None if it is not cached in this mode."""
+    if cache is None or not uses_cache(job, mode):
+        return None
+    return cache.key(endpoint(url), job, audio_source(job))
+
+
+def extract_response(result):
+    messages = result[-1]
+    return next(
+        (msg['content'] for msg in reversed(messages) if msg.get('role') == 'assistant'),
+        None
+    )
+
+
+def read_jobs(path, defaults):
+    """Read the jobs of a batch file as (id, job) pairs, filling in the defaults."""
+    jobs = []
+    seen = set()
+    with open(path, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                spec = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON ({e})")
+            job = {**defaults, **spec}
+            if "prompt_file" in spec and "text" not in spec:
+                with open(spec["prompt_file"], 'r') as prompt:
+                    job["text"] = prompt.read().strip()
+            if not job.get("text") or not job.get("audio"):
+                raise ValueError(f"{path}:{line_number}: a job needs text (or prompt_file) and audio")
+            job_id = str(spec.get("id", line_number))
+            if job_id in seen:
+                raise ValueError(f"{path}:{line_number}: duplicate job id {job_id!r}")
+            seen.add(job_id)
+            jobs.append((job_id, job))
+    return jobs
+
+
+def read_finished(path):
+    """The ids of the jobs that already have a response in an output file."""
+    finished = set()
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short by an interrupted run.
+                if record.get("response") is not None:
+                    finished.add(str(record["id"]))
+    except FileNotFoundError:
+        pass
+    return finished
+
+
+def forget_uploads(registry, job):
+    """Make the next attempt of a job upload its files again; returns whether any had been uploaded."""
+    if registry is None:
+        return False
+    forgotten = [registry.forget(source) for source in (audio_source(job), job.get("image"), job.get("video"))]
+    return any(forgotten)
+
+
+def run_batch(client, jobs, output, max_in_flight=MAX_IN_FLIGHT, retries=RETRIES, cache=None, cache_mode="auto",
+              url=None, registry=None, on_record=None):
+    """
+    Run jobs with at most max_in_flight submitted at once, writing a record to output (if
+    any) and passing it to on_record as each finishes. With a cache, url is the client URL
+    the cache keys are made for; with an upload registry, a failed job that reused
+    uploaded files gets one extra attempt if the server no longer had them.
+    """
+    url = url or client.src
+    completed = queue.Queue()
+    ready = []
+    delayed = []
+    in_flight = 0
+    counts = {"done": 0, "failed": 0}
+    cache_keys = {}
+    reuploaded = set()
+
+    def write(record):
+        if output is not None:
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+        finished = counts["done"] + counts["failed"]
+        status = "ok" if "response" in record else f"failed: {record['error']}"
+        print(f"[{finished}/{len(jobs)}] {record['id']} {status}", file=sys.stderr)
+        if on_record is not None:
+            on_record(record)
+
+    def submit(job_id, job, attempt):
+        started = time.monotonic()
+        try:
+            handle = client.submit(**chat_arguments(job))
+        except Exception as e:
+            completed.put((job_id, job, attempt, started, None, e))
+            return
+        handle.add_done_callback(lambda _: completed.put((job_id, job, attempt, started, handle, None)))
+
+    # Cached answers are written straight away and never take a slot on the server.
+    for job_id, job in jobs:
+        try:
+            key = cache_key(cache, url, job, cache_mode)
+        except (OSError, ValueError):
+            key = None  # Reported when the job is submitted.
+        response = cache.get(key) if key else None
+        if response:
+            counts["done"] += 1
+            write({"id": job_id, "response": response, "attempts": 0, "cached": True})
+            continue
+        if key:
+            cache_keys[job_id] = key
+        ready.append((job_id, job, 1))
+    ready.reverse()
+
+    while ready or delayed or in_flight:
+        now = time.monotonic()
+        while delayed and delayed[0][0] <= now:
+            _, _, job_id, job, attempt = heapq.heappop(delayed)
+            ready.append((job_id, job, attempt))
+        while ready and in_flight < max_in_flight:
+            submit(*ready.pop())
+            in_flight += 1
+
+        try:
+            timeout = max(0.0, delayed[0][0] - time.monotonic()) if delayed else None
+            job_id, job, attempt, started, handle, error = completed.get(timeout=timeout)
+        except queue.Empty:
+            continue
+        in_flight -= 1
+
+        if error is None:
+            try:
+                response = extract_response(handle.result())
+            except Exception as e:
+                error = e
+        if error is None:
+            if response:
+                counts["done"] += 1
+                if job_id in cache_keys:
+                    cache.put(cache_keys[job_id], response, endpoint(url))
+                write({"id": job_id, "response": response, "attempts": attempt,
+                       "seconds": round(time.monotonic() - started, 3)})
+            else:
+                counts["failed"] += 1
+                write({"id": job_id, "error": "No response from LLM found", "attempts": attempt})
+        else:
+            # Only failures on the server are retried; a job that cannot be prepared never will be.
+            # The server may have dropped files uploaded earlier, which earns one more attempt per job.
+            if (handle is not None and job_id not in reuploaded and is_missing_file(error)
+                    and forget_uploads(registry, job)):
+                reuploaded.add(job_id)
+            allowed = retries + 1 if job_id in reuploaded else retries
+            if handle is not None and attempt <= allowed:
+                delay = RETRY_DELAY * attempt
+                heapq.heappush(delayed, (time.monotonic() + delay, id(job), job_id, job, attempt + 1))
+            else:
+                counts["failed"] += 1
+                write({"id": job_id, "error": str(error) or type(error).__name__, "attempts": attempt})
+
+    return counts
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -20,14 +280,20 @@ def main():
     )
     parser.add_argument(
         "--text",
-        required=True,
         help="Text prompt for the model"
     )
     parser.add_argument(
         "--audio",
-        required=True,
         help="Path or URL to audio file"
     )
+    parser.add_argument(
+        "--start",
+        help="Only send the audio from this time on (MM:SS or seconds; local MP3 files only)"
+    )
+    parser.add_argument(
+        "--end",
+        help="Only send the audio up to this time (MM:SS or seconds; local MP3 files only)"
+    )
     parser.add_argument(
         "--image",
         help="Path or URL to image file"
@@ -38,31 +304,31 @@ def main():
     )
     parser.add_argument(
         "--system-prompt",
-        default="",
+        default=JOB_DEFAULTS["system_prompt"],
         help="System prompt for the model"
     )
     parser.add_argument(
         "--temperature",
         type=float,
-        default=0.6,
+        default=JOB_DEFAULTS["temperature"],
         help="Sampling temperature"
     )
     parser.add_argument(
         "--top-p",
         type=float,
-        default=0.95,
+        default=JOB_DEFAULTS["top_p"],
         help="Top-p sampling parameter"
     )
     parser.add_argument(
         "--top-k",
         type=int,
-        default=20,
+        default=JOB_DEFAULTS["top_k"],
         help="Top-k sampling parameter"
     )
     parser.add_argument(
         "--return-audio",
         action="store_true",
-        default=False,
+        default=JOB_DEFAULTS["return_audio"],
         help="Return audio output"
     )
     parser.add_argument(
@@ -74,49 +340,107 @@ def main():
     parser.add_argument(
         "--enable-thinking",
         action="store_true",
-        default=False,
+        default=JOB_DEFAULTS["enable_thinking"],
         help="Enable thinking mode"
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_const",
+        const="off",
+        dest="cache",
+        default="auto",
+        help="Neither read nor store cached responses"
+    )
+    parser.add_argument(
+        "--cache-sampled",
+        action="store_const",
+        const="all",
+        dest="cache",
+        help="Cache responses to sampled settings too, not only deterministic ones (temperature 0 or top-k 1)"
+    )
+    parser.add_argument(
+        "--batch",
+        help="JSONL file of jobs to run instead of --text and --audio (see the module docstring)"
+    )
+    parser.add_argument(
+        "--output",
+        help="JSONL file the batch results are written to"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=MAX_IN_FLIGHT,
+        help="Maximum number of batch jobs submitted to the server at once"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=RETRIES,
+        help="Number of times a failed batch job is retried"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        help="Append to --output and skip the jobs it already has a response for"
+    )
 
     args = parser.parse_args()
 
-    # Initialize client (suppress connection messages)
-    stdout_backup = sys.stdout
-    stderr_backup = sys.stderr
-    devnull = open(os.devnull, 'w')
-    try:
-        sys.stdout = devnull
-        sys.stderr = devnull
-        client = Client(args.client)
-    finally:
-        sys.stdout = stdout_backup
-        sys.stderr = stderr_backup
-        devnull.close()
+    if args.batch:
+        if not args.output:
+            parser.error("--batch needs --output")
+        if args.max_in_flight < 1:
+            parser.error("--max-in-flight must be at least 1")
+        defaults = {option: getattr(args, option) for option in JOB_DEFAULTS}
+        try:
+            jobs = read_jobs(args.batch, defaults)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
 
-    audio_input = handle_file(args.audio)
-    image_input = handle_file(args.image) if args.image else None
-    video_input = {"video": handle_file(args.video)} if args.video else None
+        finished = read_finished(args.output) if args.resume else set()
+        pending = [(job_id, job) for job_id, job in jobs if job_id not in finished]
+        print(f"{len(jobs)} jobs, {len(jobs) - len(pending)} already done, {len(pending)} to run", file=sys.stderr)
+        if not pending:
+            return
 
-    result = client.predict(
-        text=args.text,
-        audio=audio_input,
-        image=image_input,
-        video=video_input,
-        history=[],
-        system_prompt=args.system_prompt,
-        temperature=args.temperature,
-        top_p=args.top_p,
-        top_k=args.top_k,
-        return_audio=args.return_audio,
-        enable_thinking=args.enable_thinking,
-        api_name="/chat_predict"
-    )
+        cache = ResponseCache()
+        # Every job in flight keeps a few of the client's worker threads busy.
+        client = connect(args.client, max_workers=max(40, 3 * args.max_in_flight + 4))
+        registry = UploadRegistry(client)
+        started = time.monotonic()
+        with open(args.output, 'a' if args.resume else 'w') as output:
+            counts = run_batch(client, pending, output, args.max_in_flight, args.retries, cache, args.cache,
+                               args.client, registry)
+        elapsed = time.monotonic() - started
+        print(f"Done in {elapsed:.1f}s: {counts['done']} answered, {counts['failed']} failed, "
+              f"{cache.format_stats()}, {registry.format_stats()}", file=sys.stderr)
+        if counts["failed"]:
+            sys.exit(1)
+        return
 
-    messages = result[-1]
-    llm_response = next(
-        (msg['content'] for msg in reversed(messages) if msg.get('role') == 'assistant'),
-        None
-    )
+    if not args.text or not args.audio:
+        parser.error("--text and --audio are required without --batch")
+
+    job = {"text": args.text, "audio": args.audio, **{option: getattr(args, option) for option in JOB_DEFAULTS}}
+    cache = ResponseCache()
+    try:
+        audio = audio_source(job)
+        key = cache_key(cache, args.client, job, args.cache)
+        arguments = chat_arguments(job, audio)
+    except ValueError as e:
+        parser.error(str(e))
+
+    llm_response = cache.get(key) if key else None
+    if llm_response:
+        print(llm_response)
+        return
+
+    client = connect(args.client)
+    result = client.predict(**arguments)
+    llm_response = extract_response(result)
+    if llm_response and key:
+        cache.put(key, llm_response, endpoint(args.client))
 
     if llm_response:
         print(llm_response)
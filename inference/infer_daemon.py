@@ -0,0 +1,197 @@
+"""
+A long-lived inference daemon that keeps Gradio clients warm.
+Every infer.py call pays for importing gradio_client and for building a Client, which
+fetches the app's config and API info, before the request itself is sent. The daemon
+does that once per backend and then serves requests over a Unix socket, so the thin
+forwarder ask.py only pays for the request.
+
+The protocol is one JSON line each way per connection. A request is
+
+    {"client": "http://127.0.0.1:7860/", "job": {"text": "...", "audio": "/abs/track.mp3"}}
+
+where "client" may be left out to use the first backend the daemon was started with,
+and "job" is an infer.py batch job (see infer.py); "cache" may set the response cache
+mode (see response_cache.py). The reply is {"response": "..."} or {"error": "..."}.
+
+Backends given with --client are connected at startup; others are connected on first
+use. A backend whose connection fails is reconnected on the next request. Files are
+uploaded once per backend (see upload_registry.py), so repeated questions about a
+track only send its audio the first time.
+"""
+
+import argparse
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+
+from ask import SOCKET_PATH
+from infer import (JOB_DEFAULTS, audio_source, cache_key, chat_arguments, connect, endpoint, extract_response,
+                   forget_uploads)
+from response_cache import CACHE_MODES, ResponseCache
+from upload_registry import UploadRegistry, is_missing_file
+
+
+MAX_WORKERS = 40
+
+
+class Backends:
+    """Warm Gradio clients keyed by URL."""
+
+    def __init__(self, urls=(), max_workers=MAX_WORKERS, cache=None):
+        self.max_workers = max_workers
+        self.cache = cache
+        self.default = urls[0] if urls else None
+        self.clients = {}
+        self.registries = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+        for url in urls:
+            self.get(url)
+
+    def get(self, url=None):
+        url = url or self.default
+        if not url:
+            raise ValueError("No backend: start the daemon with --client or pass one")
+        with self.lock:
+            client = self.clients.get(url)
+            if client is not None:
+                return client
+            lock = self.locks.setdefault(url, threading.Lock())
+        # Connecting can take a while; only requests for the same backend wait for it.
+        with lock:
+            with self.lock:
+                client = self.clients.get(url)
+            if client is None:
+                started = time.monotonic()
+                client = connect(url, self.max_workers)
+                print(f"Connected to {url} in {time.monotonic() - started:.2f}s", file=sys.stderr, flush=True)
+                registry = UploadRegistry(client)
+                with self.lock:
+                    self.clients[url] = client
+                    self.registries[url] = registry
+            return client
+
+    def drop(self, url, client):
+        url = url or self.default
+        with self.lock:
+            if self.clients.get(url) is client:
+                del self.clients[url]
+                del self.registries[url]
+
+    def predict(self, url, job, cache_mode="auto"):
+        job = {**JOB_DEFAULTS, **job}
+        if not job.get("text") or not job.get("audio"):
+            raise ValueError("A job needs text and audio")
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"Invalid cache mode: {cache_mode!r}")
+        url = url or self.default
+        if not url:
+            raise ValueError("No backend: start the daemon with --client or pass one")
+        audio = audio_source(job)
+        key = cache_key(self.cache, url, job, cache_mode)
+        response = self.cache.get(key) if key else None
+        if response:
+            return response
+
+        client = self.get(url)
+        with self.lock:
+            registry = self.registries.get(url)
+        for attempt in range(2):
+            try:
+                result = client.submit(**chat_arguments(job, audio)).result()
+                break
+            except Exception as e:
+                # An error reported by the app (a ValueError) leaves the connection usable,
+                # and may mean the server no longer has a file uploaded earlier.
+                if not isinstance(e, ValueError):
+                    self.drop(url, client)
+                    raise
+                if attempt or not is_missing_file(e) or not forget_uploads(registry, job):
+                    raise
+        response = extract_response(result)
+        if not response:
+            raise ValueError(f"No response from LLM found. Full result: {result}")
+        if key:
+            self.cache.put(key, response, endpoint(url))
+        return response
+
+
+def make_handler(backends):
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline())
+                reply = {"response": backends.predict(request.get("client"), request.get("job") or {},
+                                                      request.get("cache", "auto"))}
+            except Exception as e:
+                reply = {"error": str(e) or type(e).__name__}
+            self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+
+    return RequestHandler
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve Qwen3-Omni requests from warm Gradio clients over a Unix socket",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--client",
+        action="append",
+        default=[],
+        help="Gradio client URL to connect at startup (repeat for several backends; the first is the default)"
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=SOCKET_PATH,
+        help="Path of the Unix socket to listen on"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        default=False,
+        help="Never read or store cached responses, whatever the requests ask for"
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=MAX_WORKERS,
+        help="Worker threads per Gradio client"
+    )
+
+    args = parser.parse_args()
+
+    backends = Backends(args.client, args.max_workers, None if args.no_cache else ResponseCache())
+    args.socket.parent.mkdir(parents=True, exist_ok=True)
+    if args.socket.exists():
+        args.socket.unlink()
+    server = DaemonServer(str(args.socket), make_handler(backends))
+    print(f"Listening on {args.socket}", file=sys.stderr, flush=True)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        args.socket.unlink(missing_ok=True)
+        if backends.cache is not None:
+            print(backends.cache.format_stats().capitalize(), file=sys.stderr, flush=True)
+        for url, registry in backends.registries.items():
+            print(f"{url}: {registry.format_stats()}", file=sys.stderr, flush=True)
+        # The clients' heartbeat threads would keep the process alive.
+        os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Frame-accurate MP3 clipping without decoding.
+An MP3 file is a sequence of self-contained MPEG audio frames, each holding a fixed
+number of samples, so a time range can be cut by copying whole frames. FrameIndex
+walks the frame headers once (skipping ID3 tags, a Xing/Info/VBRI header frame and
+any junk between frames) and records the byte offset and size of every frame; the
+index is cached in cache/mp3_index, keyed by the file's path and rebuilt whenever its
+size or mtime changes.
+
+clip() copies the frames covering [start, end) behind a fresh Info (or Xing, for
+variable bitrate) frame carrying the clip's frame and byte counts, so players report
+the right duration. It costs I/O proportional to the clip, and the same range of the
+same file always produces the same bytes, so clip_file() stores clips under a name
+derived from that range and reuses them. Clip boundaries fall on frame boundaries
+(26 ms at 44.1 kHz); a layer III frame can borrow bits from the frames before it, so
+the first frame of a clip may decode as silence.
+"""
+
+import array
+import hashlib
+import mmap
+import os
+import re
+import struct
+from pathlib import Path
+
+
+CACHE_DIR = Path(__file__).parent / "cache"
+INDEX_DIR = CACHE_DIR / "mp3_index"
+CLIP_DIR = CACHE_DIR / "mp3_clips"
+MAGIC = b"MP3FIDX1"
+HEADER = struct.Struct("<8sQqIII")
+TIMESTAMP = re.compile(r"^\[?\s*(?:(\d+):)?(\d+):(\d+(?:\.\d+)?)\s*\]?$")
+
+BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+VERSIONS = {0: 2.5, 2: 2, 3: 1}
+LAYERS = {1: 3, 2: 2, 3: 1}
+
+
+def parse_time(text):
+    """Parse "MM:SS", "H:MM:SS" (optionally in brackets, as the model writes them) or plain seconds into seconds."""
+    text = str(text).strip()
+    match = TIMESTAMP.match(text)
+    if match:
+        hours, minutes, seconds = match.groups()
+        return int(hours or 0) * 3600 + int(minutes) * 60 + float(seconds)
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"Invalid time: {text!r}")
+
+
+def parse_header(data, pos):
+    """Return (version, layer, sample_rate, frame size, samples, mono) for the frame header at pos, or None."""
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    version = VERSIONS.get((b1 >> 3) & 3)
+    layer = LAYERS.get((b1 >> 1) & 3)
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = BITRATES[(min(version, 2), layer)][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 1
+    if layer == 1:
+        size, samples = (12 * bitrate // sample_rate + padding) * 4, 384
+    elif layer == 2 or version == 1:
+        size, samples = 144 * bitrate // sample_rate + padding, 1152
+    else:
+        size, samples = 72 * bitrate // sample_rate + padding, 576
+    return version, layer, sample_rate, size, samples, b3 >> 6 == 3
+
+
+def side_info_size(version, mono):
+    if version == 1:
+        return 17 if mono else 32
+    return 9 if mono else 17
+
+
+def is_vbr_header(data, pos, header):
+    version, layer, _, size, _, mono = header
+    if layer != 3:
+        return False
+    tag = pos + 4 + side_info_size(version, mono)
+    return data[tag:tag + 4] in (b"Xing", b"Info") or data[pos + 36:pos + 40] == b"VBRI"
+
+
+def id3v2_size(data):
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = data[6] << 21 | data[7] << 14 | data[8] << 7 | data[9]
+    return 10 + size + (10 if data[5] & 0x10 else 0)
+
+
+def scan_frames(data):
+    """Return (offsets, sizes, first header) for the audio frames in an MP3 file's bytes."""
+    offsets = array.array("Q")
+    sizes = array.array("I")
+    first = None
+    pos = id3v2_size(data)
+    end = len(data)
+    synced = False
+
+    while pos + 4 <= end:
+        header = parse_header(data, pos)
+        if header is not None and first is not None and header[:3] != first[:3]:
+            header = None
+        if header is not None and not synced:
+            # After junk, only trust a header followed by another frame of the same stream.
+            following = parse_header(data, pos + header[3])
+            if pos + header[3] < end and (following is None or following[:3] != header[:3]):
+                header = None
+        if header is None or pos + header[3] > end:
+            synced = False
+            pos += 1
+            continue
+
+        synced = True
+        if first is None:
+            first = header
+            if is_vbr_header(data, pos, header):
+                pos += header[3]
+                continue
+        offsets.append(pos)
+        sizes.append(header[3])
+        pos += header[3]
+
+    return offsets, sizes, first
+
+
+class FrameIndex:
+    def __init__(self, path, offsets, sizes, sample_rate, samples_per_frame):
+        self.path = Path(path)
+        self.offsets = offsets
+        self.sizes = sizes
+        self.sample_rate = sample_rate
+        self.samples_per_frame = samples_per_frame
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def frame_duration(self):
+        return self.samples_per_frame / self.sample_rate
+
+    @property
+    def duration(self):
+        return len(self.offsets) * self.frame_duration
+
+    def frame_range(self, start, end=None):
+        """The frames [first, last) covering the time range [start, end)."""
+        first = min(max(0, int(start / self.frame_duration)), len(self))
+        if end is None:
+            return first, len(self)
+        last = -int(-end // self.frame_duration)
+        return first, min(max(first, last), len(self))
+
+
+def index_path(path, index_dir=INDEX_DIR):
+    key = hashlib.sha256(str(Path(path).resolve()).encode("utf-8")).hexdigest()[:32]
+    return Path(index_dir) / f"{key}.idx"
+
+
+def load_index(path, cache_path):
+    stat = os.stat(path)
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+        magic, size, mtime_ns, sample_rate, samples_per_frame, count = HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+    if magic != MAGIC or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+        return None
+    offsets = array.array("Q")
+    sizes = array.array("I")
+    offsets.frombytes(data[HEADER.size:HEADER.size + count * offsets.itemsize])
+    sizes.frombytes(data[HEADER.size + count * offsets.itemsize:])
+    if len(offsets) != count or len(sizes) != count:
+        return None
+    return FrameIndex(path, offsets, sizes, sample_rate, samples_per_frame)
+
+
+def frame_index(path, index_dir=INDEX_DIR):
+    """Return the FrameIndex of an MP3 file, from the cache when the file is unchanged."""
+    cache_path = index_path(path, index_dir)
+    index = load_index(path, cache_path)
+    if index is not None:
+        return index
+
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offsets, sizes, first = scan_frames(data)
+    if first is None:
+        raise ValueError(f"No MPEG audio frames found in {path}")
+    _, _, sample_rate, _, samples_per_frame, _ = first
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, stat.st_size, stat.st_mtime_ns, sample_rate, samples_per_frame, len(offsets)))
+        f.write(offsets.tobytes())
+        f.write(sizes.tobytes())
+    os.replace(tmp_path, cache_path)
+    return FrameIndex(path, offsets, sizes, sample_rate, samples_per_frame)
+
+
+def info_frame(header_bytes, frames, audio_bytes, vbr):
+    """An empty layer III frame with a Xing/Info tag for a clip of the given frames and bytes."""
+    version, _, sample_rate, _, _, mono = parse_header(header_bytes, 0)
+    tag = 4 + side_info_size(version, mono)
+    table = BITRATES[(min(version, 2), 3)]
+    rate_index = (header_bytes[2] >> 2) & 3
+    for bitrate_index in range(1, 15):
+        size = (144 if version == 1 else 72) * table[bitrate_index] * 1000 // sample_rate
+        if size >= tag + 16:
+            break
+
+    frame = bytearray(size)
+    # Same stream parameters as the audio, no CRC, no padding, the smallest bitrate that fits.
+    frame[0:4] = header_bytes[0:4]
+    frame[1] |= 1
+    frame[2] = bitrate_index << 4 | rate_index << 2 | header_bytes[2] & 1
+    frame[tag:tag + 16] = (b"Xing" if vbr else b"Info") + struct.pack(">III", 3, frames, audio_bytes + size)
+    return bytes(frame)
+
+
+def clip(path, start, end=None, index=None):
+    """Return the bytes of a standalone MP3 holding the frames of path that cover [start, end)."""
+    index = index or frame_index(path)
+    first, last = index.frame_range(start, end)
+    if first >= last:
+        raise ValueError(f"Empty clip: {start}s to {end}s of a {index.duration:.2f}s file")
+
+    with open(path, "rb") as f:
+        f.seek(index.offsets[first])
+        span = f.read(index.offsets[last - 1] + index.sizes[last - 1] - index.offsets[first])
+
+    base = index.offsets[first]
+    if index.offsets[last - 1] + index.sizes[last - 1] - base == sum(index.sizes[first:last]):
+        audio = span
+    else:
+        # Junk between frames is left out.
+        audio = b"".join(
+            span[offset - base:offset - base + size]
+            for offset, size in zip(index.offsets[first:last], index.sizes[first:last])
+        )
+
+    if parse_header(audio, 0)[1] != 3:
+        return audio
+    vbr = len(set(index.sizes[first:last])) > 2
+    return info_frame(audio[:4], last - first, len(audio), vbr) + audio
+
+
+def clip_file(path, start, end=None, clip_dir=CLIP_DIR, index_dir=INDEX_DIR):
+    """Write clip(path, start, end) to the clip cache, once, and return its path."""
+    index = frame_index(path, index_dir)
+    first, last = index.frame_range(start, end)
+    stat = os.stat(path)
+    key = hashlib.sha256(f"{Path(path).resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8")).hexdigest()[:16]
+    output_path = Path(clip_dir) / f"{Path(path).stem}_{key}_{first}-{last}.mp3"
+    if output_path.exists():
+        return output_path
+
+    data = clip(path, start, end, index)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, output_path)
+    return output_path
@@ -0,0 +1,211 @@
+"""
+A persistent cache of model responses.
+A response is stored under a key hashed from everything that decides it: the content
+of the audio (and image or video) actually sent, the text and system prompt, the
+endpoint, and temperature, top_p, top_k and enable_thinking. Audio given as a URL is
+keyed by the URL itself, not by what it serves, so a URL whose content changes keeps
+returning the old answer until the entry ages out or the cache is cleared. Each entry
+is a small JSON file under cache/responses/<key[:2]>/<key>.json, written atomically,
+so infer.py runs, batches and the daemon can share the cache at the same time.
+
+By default only deterministic settings (temperature 0 or top_k 1) are cached, since
+a sampled answer is one draw among many; the "all" mode caches those too, and "off"
+bypasses the cache. An entry's modification time records its last use: entries
+unused for longer than the age limit are dropped when read or evicted, and once the
+cache outgrows its size limit the least recently used entries are evicted.
+It can also be run on its own to summarize, evict or clear the cache.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+
+CACHE_DIR = Path(__file__).parent / "cache"
+RESPONSE_DIR = CACHE_DIR / "responses"
+MAX_BYTES = 64 * 1024 * 1024
+MAX_AGE_DAYS = 30
+CACHE_MODES = ["auto", "all", "off"]
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def content_hash(source):
+    """The SHA-256 of a local file's content (remembered while it is unchanged), or a hash of a URL's text."""
+    if not source:
+        return None
+    if "://" in source or not os.path.isfile(source):
+        return "url:" + hashlib.sha256(source.encode("utf-8")).hexdigest()
+    path = os.path.realpath(source)
+    stat = os.stat(path)
+    memo_key = (path, stat.st_size, stat.st_mtime_ns)
+    with _digests_lock:
+        digest = _digests.get(memo_key)
+    if digest is None:
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        with _digests_lock:
+            _digests[memo_key] = digest
+    return digest
+
+
+def is_deterministic(job):
+    return job["temperature"] == 0 or job["top_k"] == 1
+
+
+def uses_cache(job, mode):
+    return mode == "all" or mode == "auto" and is_deterministic(job)
+
+
+class ResponseCache:
+    def __init__(self, root=RESPONSE_DIR, max_bytes=MAX_BYTES, max_age=MAX_AGE_DAYS * 86400):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.total_bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+    def key(self, endpoint, job, audio):
+        """The cache key of a job sent to endpoint, with audio the file or URL actually sent."""
+        fields = {
+            "endpoint": endpoint,
+            "audio": content_hash(audio),
+            "image": content_hash(job.get("image")),
+            "video": content_hash(job.get("video")),
+            "text": job["text"],
+            "system_prompt": job["system_prompt"],
+            "temperature": float(job["temperature"]),
+            "top_p": float(job["top_p"]),
+            "top_k": int(job["top_k"]),
+            "enable_thinking": bool(job["enable_thinking"]),
+        }
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def entry_path(self, key):
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        """The cached response for key, or None (counted as a miss)."""
+        path = self.entry_path(key)
+        try:
+            expired = time.time() - path.stat().st_mtime > self.max_age
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            expired, entry = False, None
+        if expired:
+            path.unlink(missing_ok=True)
+            entry = None
+
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # The modification time records the last use, for eviction.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["response"]
+
+    def put(self, key, response, endpoint=None):
+        path = self.entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({"response": response, "endpoint": endpoint, "created": time.time()})
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            self.stored += 1
+            if self.total_bytes is not None:
+                self.total_bytes += len(data) - replaced
+            if self.total_bytes is None or self.total_bytes > self.max_bytes:
+                self.total_bytes = self.evict()
+
+    def entries(self):
+        """(path, size, last use) of every entry."""
+        result = []
+        for path in self.root.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            result.append((path, stat.st_size, stat.st_mtime))
+        return result
+
+    def evict(self):
+        """Drop entries unused for longer than the age limit, then the least recently used ones above the size limit; returns the size left."""
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        expired_before = time.time() - self.max_age
+        total = sum(size for _, size, _ in entries)
+        for path, size, last_used in entries:
+            if total <= self.max_bytes and last_used >= expired_before:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+        return total
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            path.unlink(missing_ok=True)
+        with self.lock:
+            self.total_bytes = 0
+
+    def format_stats(self):
+        with self.lock:
+            return f"response cache {self.hits} hits/{self.misses} misses, {self.stored} stored"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Summarize, evict or clear the cache of model responses",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--evict",
+        action="store_true",
+        default=False,
+        help="Drop expired entries and trim the cache to its size limit"
+    )
+    parser.add_argument(
+        "--clear",
+        action="store_true",
+        default=False,
+        help="Drop every entry"
+    )
+
+    args = parser.parse_args()
+
+    cache = ResponseCache()
+    if args.clear:
+        cache.clear()
+    elif args.evict:
+        cache.evict()
+
+    entries = cache.entries()
+    size = sum(size for _, size, _ in entries)
+    print(f"{cache.root}: {len(entries)} responses, {size / 1024:.0f} KB "
+          f"(limit {cache.max_bytes / 1024 / 1024:.0f} MB, {MAX_AGE_DAYS} days)")
+
+
+if __name__ == "__main__":
+    main()
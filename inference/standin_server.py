@@ -0,0 +1,369 @@
+"""
+A local stand-in for the Qwen3-Omni Gradio app, for exercising infer.py without a GPU.
+It speaks enough of the Gradio API (config, API info, uploads, the sse_v3 queue and
+heartbeats) for gradio_client to call /chat_predict with the same parameters as the
+real demo. Jobs run on a fixed number of slots, like a GPU worker with a concurrency
+limit, each taking --latency seconds; the answer is a deterministic line derived from
+the prompt and the audio, so repeated calls return the same text.
+
+--fail-rate makes a share of the jobs fail, to exercise retries, and --file-ttl
+expires uploaded files like a server cleaning its cache. GET /standin/stats returns
+the number of uploads, uploaded bytes and jobs run so far.
+"""
+
+import argparse
+import hashlib
+import json
+import queue
+import random
+import shutil
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+
+API_PREFIX = "/gradio_api"
+HEARTBEAT_INTERVAL = 5.0
+PARAMETERS = [
+    ("text", "textbox", "str", None, False),
+    ("audio", "audio", "filepath", None, True),
+    ("image", "image", "filepath", None, True),
+    ("video", "video", "filepath", None, True),
+    ("history", "chatbot", "list", [], True),
+    ("system_prompt", "textbox", "str", "", True),
+    ("temperature", "slider", "float", 0.6, True),
+    ("top_p", "slider", "float", 0.95, True),
+    ("top_k", "slider", "float", 20, True),
+    ("return_audio", "checkbox", "bool", False, True),
+    ("enable_thinking", "checkbox", "bool", False, True),
+]
+OUTPUTS = [("audio_output", "audio"), ("chatbot", "chatbot")]
+FILE_SCHEMA = {
+    "properties": {"path": {"type": "string"}, "meta": {"default": {"_type": "gradio.FileData"}}},
+    "required": ["path"],
+    "title": "FileData",
+    "type": "object",
+}
+
+
+def make_config():
+    components = []
+    for i, (name, component, _, _, _) in enumerate(PARAMETERS):
+        info = FILE_SCHEMA if component in ("audio", "image", "video") else {"type": {}}
+        components.append({"id": i + 1, "type": component, "props": {"label": name}, "api_info": info})
+    for i, (name, component) in enumerate(OUTPUTS):
+        components.append({"id": 100 + i, "type": component, "props": {"label": name}, "api_info": {"type": {}}})
+    return {
+        "version": "5.49.1",
+        "protocol": "sse_v3",
+        "api_prefix": API_PREFIX,
+        "components": components,
+        "dependencies": [{
+            "id": 0,
+            "api_name": "chat_predict",
+            "inputs": [component["id"] for component in components[:len(PARAMETERS)]],
+            "outputs": [100 + i for i in range(len(OUTPUTS))],
+            "backend_fn": True,
+            "show_api": True,
+            "queue": True,
+            "cancels": [],
+        }],
+    }
+
+
+def make_api_info():
+    parameters = [
+        {
+            "label": name,
+            "parameter_name": name,
+            "parameter_has_default": has_default,
+            "parameter_default": default,
+            "type": {},
+            "python_type": {"type": python_type, "description": ""},
+            "component": component.capitalize(),
+            "example_input": None,
+        }
+        for name, component, python_type, default, has_default in PARAMETERS
+    ]
+    returns = [
+        {"label": name, "type": {}, "python_type": {"type": "Any", "description": ""}, "component": component.capitalize()}
+        for name, component in OUTPUTS
+    ]
+    endpoint = {"parameters": parameters, "returns": returns, "show_api": True}
+    return {"named_endpoints": {"/chat_predict": endpoint}, "unnamed_endpoints": {}}
+
+
+class Session:
+    def __init__(self):
+        self.messages = queue.Queue()
+        self.pending = 0
+
+
+class StandIn:
+    def __init__(self, slots, latency, fail_rate, file_ttl):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.file_ttl = file_ttl
+        self.upload_dir = Path(tempfile.mkdtemp(prefix="standin-"))
+        self.uploads = {}
+        self.sessions = {}
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.stats = {"uploads": 0, "upload_bytes": 0, "jobs": 0, "failed": 0, "max_running": 0}
+        self.running = 0
+        self.random = random.Random(0)
+        for _ in range(slots):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def session(self, session_hash):
+        with self.lock:
+            if session_hash not in self.sessions:
+                self.sessions[session_hash] = Session()
+            return self.sessions[session_hash]
+
+    def store_upload(self, name, data):
+        directory = self.upload_dir / uuid.uuid4().hex
+        directory.mkdir()
+        path = directory / Path(name).name
+        path.write_bytes(data)
+        with self.lock:
+            self.uploads[str(path)] = time.monotonic()
+            self.stats["uploads"] += 1
+            self.stats["upload_bytes"] += len(data)
+        return str(path)
+
+    def resolve_file(self, value):
+        """The local path of a FileData input, or raise if the server does not have it."""
+        if not value:
+            return None
+        path = value.get("path", "") if isinstance(value, dict) else str(value)
+        marker = f"{API_PREFIX}/file="
+        if marker in path:
+            path = urllib.parse.unquote(path.split(marker, 1)[1])
+        with self.lock:
+            uploaded = self.uploads.get(path)
+        if uploaded is None or not Path(path).exists():
+            raise FileNotFoundError(f"File not found on the server: {path}")
+        if self.file_ttl is not None and time.monotonic() - uploaded > self.file_ttl:
+            raise FileNotFoundError(f"File has expired on the server: {path}")
+        return Path(path)
+
+    def submit(self, body):
+        event_id = uuid.uuid4().hex
+        session = self.session(body.get("session_hash", ""))
+        with self.lock:
+            session.pending += 1
+        session.messages.put({"msg": "estimation", "event_id": event_id, "rank": self.jobs.qsize(),
+                              "queue_size": self.jobs.qsize() + 1, "rank_eta": None})
+        self.jobs.put((event_id, session, body.get("data") or []))
+        return event_id
+
+    def answer(self, data):
+        values = dict(zip([name for name, *_ in PARAMETERS], list(data) + [None] * len(PARAMETERS)))
+        audio = self.resolve_file(values["audio"])
+        digest = hashlib.sha256(audio.read_bytes()).hexdigest()[:12] if audio else "none"
+        text = str(values["text"] or "").strip().splitlines()
+        sampling = ", ".join(f"{name}={values[name]}" for name in ("temperature", "top_p", "top_k", "enable_thinking"))
+        return f"Stand-in answer to {text[0][:60] if text else ''!r} for audio {digest} ({sampling})"
+
+    def _work(self):
+        while True:
+            event_id, session, data = self.jobs.get()
+            with self.lock:
+                self.running += 1
+                self.stats["max_running"] = max(self.stats["max_running"], self.running)
+            session.messages.put({"msg": "process_starts", "event_id": event_id, "eta": self.latency})
+            time.sleep(self.latency)
+            try:
+                if self.random.random() < self.fail_rate:
+                    raise RuntimeError("Stand-in failure")
+                response = self.answer(data)
+                history = [{"role": "user", "content": data[0] if data else ""},
+                           {"role": "assistant", "content": response}]
+                message = {"msg": "process_completed", "event_id": event_id, "success": True,
+                           "output": {"data": [None, history], "is_generating": False}}
+            except Exception as e:
+                with self.lock:
+                    self.stats["failed"] += 1
+                message = {"msg": "process_completed", "event_id": event_id, "success": False,
+                           "output": {"error": str(e)}}
+            with self.lock:
+                self.running -= 1
+                self.stats["jobs"] += 1
+                session.pending -= 1
+            session.messages.put(message)
+
+
+def make_handler(standin):
+    config = json.dumps(make_config()).encode("utf-8")
+    api_info = json.dumps(make_api_info()).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, value, status=200):
+            body = value if isinstance(value, bytes) else json.dumps(value).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def start_stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+        def send_event(self, message):
+            self.wfile.write(b"data: " + json.dumps(message).encode("utf-8") + b"\n\n")
+            self.wfile.flush()
+
+        def read_body(self):
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            query = urllib.parse.parse_qs(url.query)
+            path = url.path
+            if path in ("/config", "/config/"):
+                self.send_json(config)
+            elif path == f"{API_PREFIX}/info":
+                self.send_json(api_info)
+            elif path == "/standin/stats":
+                with standin.lock:
+                    self.send_json(dict(standin.stats))
+            elif path.startswith(f"{API_PREFIX}/heartbeat/"):
+                self.start_stream()
+                try:
+                    while True:
+                        self.send_event({"msg": "heartbeat"})
+                        time.sleep(HEARTBEAT_INTERVAL)
+                except OSError:
+                    pass
+            elif path == f"{API_PREFIX}/queue/data":
+                session = standin.session(query.get("session_hash", [""])[0])
+                self.start_stream()
+                try:
+                    while True:
+                        try:
+                            message = session.messages.get(timeout=HEARTBEAT_INTERVAL)
+                        except queue.Empty:
+                            message = {"msg": "heartbeat"}
+                        try:
+                            self.send_event(message)
+                        except OSError:
+                            if message["msg"] != "heartbeat":
+                                session.messages.put(message)
+                            raise
+                        # Like Gradio, close the stream once the session has nothing left.
+                        if message["msg"] == "process_completed":
+                            with standin.lock:
+                                idle = session.pending == 0 and session.messages.empty()
+                            if idle:
+                                self.send_event({"msg": "close_stream"})
+                                break
+                except OSError:
+                    pass
+            elif path.startswith(f"{API_PREFIX}/file="):
+                try:
+                    file_path = standin.resolve_file({"path": path})
+                except FileNotFoundError as e:
+                    self.send_json({"detail": str(e)}, 404)
+                    return
+                data = file_path.read_bytes()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            else:
+                self.send_json({"detail": "Not Found"}, 404)
+
+        def do_POST(self):
+            path = urllib.parse.urlsplit(self.path).path
+            body = self.read_body()
+            if path == f"{API_PREFIX}/upload":
+                message = BytesParser(policy=HTTP).parsebytes(
+                    b"Content-Type: " + self.headers["Content-Type"].encode("latin-1") + b"\r\n\r\n" + body
+                )
+                paths = [
+                    standin.store_upload(part.get_filename() or "upload", part.get_payload(decode=True))
+                    for part in message.iter_parts() if part.get_param("name", header="content-disposition") == "files"
+                ]
+                self.send_json(paths)
+            elif path == f"{API_PREFIX}/queue/join":
+                self.send_json({"event_id": standin.submit(json.loads(body))})
+            elif path in (f"{API_PREFIX}/reset", f"{API_PREFIX}/cancel"):
+                self.send_json(True)
+            else:
+                self.send_json({"detail": "Not Found"}, 404)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a stand-in for the Qwen3-Omni Gradio app's /chat_predict endpoint",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=7860,
+        help="Port to listen on (127.0.0.1)"
+    )
+    parser.add_argument(
+        "--slots",
+        type=int,
+        default=1,
+        help="Number of jobs that run at the same time"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.5,
+        help="Seconds each job takes"
+    )
+    parser.add_argument(
+        "--fail-rate",
+        type=float,
+        default=0.0,
+        help="Share of jobs that fail"
+    )
+    parser.add_argument(
+        "--file-ttl",
+        type=float,
+        default=None,
+        help="Seconds after which uploaded files expire (default: never)"
+    )
+
+    args = parser.parse_args()
+
+    standin = StandIn(args.slots, args.latency, args.fail_rate, args.file_ttl)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(standin))
+    server.daemon_threads = True
+    print(f"Stand-in /chat_predict on http://127.0.0.1:{args.port}/ "
+          f"({args.slots} slots, {args.latency}s per job)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        shutil.rmtree(standin.upload_dir, ignore_errors=True)
+        print(f"Stats: {json.dumps(standin.stats)}")
+
+
+if __name__ == "__main__":
+    main()
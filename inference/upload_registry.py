@@ -0,0 +1,104 @@
+"""
+Upload each file once per Gradio client session.
+gradio_client uploads every local file it is given with every request, so asking the
+nine task prompts about one track sends the whole MP3 nine times. UploadRegistry
+hooks into a client's uploads and remembers, by content hash, the path each file got
+on the server; later requests with the same content send that path instead, exactly
+as the client would after uploading it, and the server reads the copy it already has.
+
+Servers clean up uploaded files eventually. When a request fails because the server
+no longer has a file (is_missing_file), forget() drops the file's entry so the retry
+uploads it again; other failures leave the entry alone.
+
+The hook replaces Endpoint._upload_file, which is private to gradio_client (the
+version is pinned in pyproject.toml). If a client has no such method, the registry
+stays out of the way and every request uploads its files as usual.
+"""
+
+import os
+import re
+import sys
+import threading
+
+from gradio_client import utils
+
+from response_cache import content_hash
+
+
+MISSING_FILE = re.compile(r"not found|no such file|does not exist|expired|cannot be accessed", re.IGNORECASE)
+
+
+def is_missing_file(error):
+    """Whether an error reported by the app (a ValueError) says a file sent with the request is not on the server."""
+    return isinstance(error, ValueError) and bool(MISSING_FILE.search(str(error)))
+
+
+class UploadRegistry:
+    def __init__(self, client):
+        self.client = client
+        self.paths = {}
+        self.uploaded = set()
+        self.locks = {}
+        self.lock = threading.Lock()
+        self.uploads = 0
+        self.uploaded_bytes = 0
+        self.reused = 0
+        self.saved_bytes = 0
+        endpoints = list(getattr(client, "endpoints", {}).values())
+        self.active = bool(endpoints) and all(callable(getattr(e, "_upload_file", None)) for e in endpoints)
+        if not self.active:
+            print("This gradio_client has no Endpoint._upload_file; files are uploaded with every request",
+                  file=sys.stderr)
+            return
+        for endpoint in endpoints:
+            endpoint._upload_file = self._wrap(endpoint._upload_file)
+
+    def _wrap(self, upload_file):
+        def registered_upload_file(f, data_index):
+            if utils.is_http_url_like(f["path"]):
+                return upload_file(f, data_index)
+            digest = content_hash(f["path"])
+            size = os.path.getsize(f["path"])
+            with self.lock:
+                lock = self.locks.setdefault(digest, threading.Lock())
+            # Requests for the same content wait for its first upload instead of repeating it.
+            with lock:
+                with self.lock:
+                    server_path = self.paths.get(digest)
+                    if server_path is not None:
+                        self.reused += 1
+                        self.saved_bytes += size
+                if server_path is None:
+                    uploaded = upload_file(f, data_index)
+                    with self.lock:
+                        self.paths[digest] = uploaded["path"]
+                        self.uploaded.add(digest)
+                        self.uploads += 1
+                        self.uploaded_bytes += size
+                    return uploaded
+            return {
+                "path": server_path,
+                "orig_name": utils.strip_invalid_filename_characters(os.path.basename(f["path"])),
+                "meta": {"_type": "gradio.FileData"},
+            }
+
+        return registered_upload_file
+
+    def forget(self, source):
+        """
+        Drop the server path of a local file, so it is uploaded again; returns whether it
+        had been uploaded in this session, even if another request forgot it first.
+        """
+        if not self.active or not source or utils.is_http_url_like(source) or not os.path.isfile(source):
+            return False
+        digest = content_hash(source)
+        with self.lock:
+            self.paths.pop(digest, None)
+            return digest in self.uploaded
+
+    def format_stats(self):
+        if not self.active:
+            return "uploads not tracked"
+        with self.lock:
+            return (f"{self.uploads} uploads ({self.uploaded_bytes / 1024 / 1024:.1f} MB), "
+                    f"{self.reused} reused ({self.saved_bytes / 1024 / 1024:.1f} MB saved)")
@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The scripts import their siblings by name, as they do when run from their own directory.
+ROOT = Path(__file__).resolve().parent.parent
+for directory in ("dataset", "inference"):
+    sys.path.insert(0, str(ROOT / directory))
+
+# MPEG-1 layer III, 128 kbps, 44.1 kHz, stereo, no padding: 417-byte frames of 1152 samples.
+FRAME_HEADER = b"\xff\xfb\x90\x00"
+FRAME_SIZE = 417
+
+
+def mpeg_frames(count, first=0):
+    """Frames of silence-like audio, each carrying its index so that clips can be told apart."""
+    return b"".join(FRAME_HEADER + i.to_bytes(4, "big") + bytes(FRAME_SIZE - 8) for i in range(first, first + count))
+
+
+@pytest.fixture
+def write_mp3(tmp_path):
+    """Write an MP3 of count frames, optionally behind an ID3v2 tag and followed by other bytes."""
+    def write(name, count, id3=False, trailer=b""):
+        tag = b"ID3\x04\x00\x00\x00\x00\x00\x10" + bytes(16) if id3 else b""
+        path = tmp_path / name
+        path.write_bytes(tag + mpeg_frames(count) + trailer)
+        return path
+    return write
@@ -0,0 +1,62 @@
+import json
+import os
+
+from ccmixter_catalog import Catalog, catalog_path
+
+
+def upload(upload_id, name="", **fields):
+    return {"upload_id": upload_id, "upload_name": name, **fields}
+
+
+def write_jsonl(path, uploads):
+    with open(path, "w") as f:
+        for item in uploads:
+            f.write((item if isinstance(item, str) else json.dumps(item)) + "\n")
+
+
+def test_catalog_keeps_the_last_record_newest_first(tmp_path):
+    path = tmp_path / "ccmixter_data.jsonl"
+    write_jsonl(path, [
+        upload(5, "five"),
+        upload(9, "nine", user_real_name="Artist", upload_num_scores="3",
+               upload_extra={"bpm": "120", "usertags": "house,remix"}, files=[{}, {}]),
+        "not json",
+        upload(5, "five again", upload_description_plain="updated"),
+        upload(7, "seven"),
+    ])
+    with Catalog(path) as catalog:
+        assert list(catalog.ids()) == [9, 7, 5]
+        row = catalog.row(9)
+        assert catalog.name(row) == "nine"
+        assert catalog.artist(row) == "Artist"
+        assert catalog.tags(row) == "house,remix"
+        assert (catalog.bpms[row], catalog.file_counts[row], catalog.num_scores[row]) == (120.0, 2, 3)
+        assert catalog.description(catalog.row(5)) == "updated"
+        assert catalog.get(5)["upload_name"] == "five again"
+        assert 6 not in catalog and catalog.get(6) is None
+
+
+def test_catalog_finds_sparse_ids(tmp_path):
+    path = tmp_path / "ccmixter_data.jsonl"
+    ids = [i * i * 7919 % 1000003 for i in range(1, 2000)]
+    write_jsonl(path, [upload(upload_id, str(upload_id)) for upload_id in ids])
+    with Catalog(path) as catalog:
+        assert len(catalog) == len(set(ids))
+        assert all(catalog.name(catalog.row(upload_id)) == str(upload_id) for upload_id in ids)
+        assert all(catalog.row(upload_id) is None for upload_id in range(1000004, 1000100))
+
+
+def test_catalog_is_rebuilt_when_stale_or_truncated(tmp_path):
+    path = tmp_path / "ccmixter_data.jsonl"
+    write_jsonl(path, [upload(1, "one")])
+    Catalog(path).close()
+
+    with open(path, "a") as f:
+        f.write(json.dumps(upload(2, "two")) + "\n")
+    with Catalog(path) as catalog:
+        assert list(catalog.ids()) == [2, 1]
+
+    with open(catalog_path(path), "r+b") as f:
+        f.truncate(os.path.getsize(catalog_path(path)) - 1)
+    with Catalog(path) as catalog:
+        assert catalog.name(catalog.row(1)) == "one"
@@ -0,0 +1,53 @@
+import struct
+
+from mutagen.mp3 import MP3
+
+from ccmixter_library import count_frames, probe_file
+from conftest import FRAME_HEADER, mpeg_frames
+from mp3_clip import info_frame
+
+
+def frames_in(path):
+    with open(path, "rb") as f:
+        return count_frames(f, MP3(path).info)
+
+
+def test_count_frames_walks_headerless_files(write_mp3):
+    assert frames_in(write_mp3("plain.mp3", 50)) == 50
+
+
+def test_count_frames_skips_tags(write_mp3):
+    id3v1 = b"TAG" + bytes(125)
+    assert frames_in(write_mp3("tagged.mp3", 50, id3=True, trailer=id3v1)) == 50
+
+
+def test_count_frames_ignores_a_truncated_last_frame(write_mp3):
+    assert frames_in(write_mp3("truncated.mp3", 50, trailer=FRAME_HEADER + bytes(100))) == 50
+
+
+def test_count_frames_trusts_the_info_header(tmp_path):
+    path = tmp_path / "info.mp3"
+    # The header is believed even when it disagrees with the frames that follow.
+    path.write_bytes(info_frame(FRAME_HEADER, 40, 40 * 417, vbr=False) + mpeg_frames(50))
+    assert frames_in(path) == 40
+
+
+def test_count_frames_walks_past_a_header_without_a_count(tmp_path):
+    header = bytearray(info_frame(FRAME_HEADER, 40, 40 * 417, vbr=True))
+    tag = header.index(b"Xing")
+    header[tag + 4:tag + 8] = struct.pack(">I", 0)
+    path = tmp_path / "xing.mp3"
+    path.write_bytes(bytes(header) + mpeg_frames(50))
+    assert frames_in(path) == 50
+
+
+def test_probe_file(write_mp3, tmp_path):
+    facts = probe_file(write_mp3("plain.mp3", 50))
+    assert facts["frames"] == 50
+    assert facts["sample_rate"] == 44100
+    assert facts["channels"] == 2
+    assert facts["bitrate"] == 128000
+
+    broken = tmp_path / "broken.mp3"
+    broken.write_bytes(b"not audio")
+    assert "error" in probe_file(broken)
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+
+import pytest
+
+from ccmixter_selection import (SelectionJournal, check_label, parse_entry, read_selection, replay, sidecar_path,
+                                snapshot_path)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return tmp_path / "selected_uploads.journal", tmp_path / "selected_uploads.txt"
+
+
+def test_parse_entry():
+    assert parse_entry("1700000000.500\t+\t42\tdefault\n") == (1700000000.5, True, 42, "default")
+    assert parse_entry("1700000000.500\t-\t42\ttrain\n") == (1700000000.5, False, 42, "train")
+    assert parse_entry("# compacted 0123456789ab\n") is None
+    assert parse_entry("1700000000.500\t*\t42\tdefault\n") is None
+    assert parse_entry("1700000000.500\t+\tabc\tdefault\n") is None
+    assert parse_entry("1700000000.500\t+\t42\tno spaces\n") is None
+
+
+def test_check_label():
+    assert check_label("split-1_a") == "split-1_a"
+    with pytest.raises(ValueError):
+        check_label("a/b")
+
+
+def test_replay_keeps_the_latest_state_in_selection_order():
+    lines = [
+        "1.0\t+\t1\tdefault\n",
+        "2.0\t+\t2\tdefault\n",
+        "3.0\t+\t2\ttrain\n",
+        "garbage\n",
+        "4.0\t-\t2\tdefault\n",
+        "5.0\t+\t1\tdefault\n",
+    ]
+    entries = OrderedDict()
+    assert replay(lines, entries) == 5
+    assert list(entries.items()) == [((2, "train"), 3.0), ((1, "default"), 5.0)]
+
+    entries = OrderedDict()
+    replay(lines, entries, "default")
+    assert list(entries) == [(1, "default")]
+
+
+def test_journal_survives_reopening(paths):
+    journal = SelectionJournal(*paths)
+    journal.select(1)
+    journal.select(2, "train")
+    journal.select(3)
+    assert journal.toggle(3) is False
+    journal.close()
+
+    journal = SelectionJournal(*paths)
+    assert len(journal) == 2
+    assert 1 in journal and 3 not in journal
+    assert journal.labels_of(2) == {"train"}
+    assert journal.last_selected() == 2
+    journal.close()
+
+
+def test_read_selection_replays_the_journal_after_the_snapshots(paths):
+    journal = SelectionJournal(*paths)
+    for upload_id in (1, 2, 3):
+        journal.select(upload_id)
+    journal.select(2, "train")
+    journal.compact()
+    journal.unselect(1)
+    journal.select(4, "train")
+    journal.close()
+
+    assert read_selection(None, *paths) == [2, 3, 4]
+    assert read_selection("default", *paths) == [2, 3]
+    assert read_selection("train", *paths) == [2, 4]
+    assert read_selection("test", *paths) == []
+
+    base = paths[1]
+    assert base.read_text() == "1\n2\n3\n"
+    assert snapshot_path("train", base).read_text() == "2\n"
+    assert sidecar_path(base).exists()
+
+
+def test_read_selection_ignores_snapshots_of_another_generation(paths):
+    journal = SelectionJournal(*paths)
+    journal.select(1)
+    journal.compact()
+    journal.select(2)
+    journal.close()
+
+    # As if a compaction stopped after rewriting the snapshots but before the sidecar.
+    paths[1].write_text("7\n")
+    sidecar_path(paths[1]).write_text("ffffffffffff 0\n")
+    assert read_selection(None, *paths) == [1, 2]
+
+
+def test_compaction_keeps_toggles_and_drops_stale_labels(paths):
+    journal = SelectionJournal(*paths)
+    journal.select(1, "train")
+    journal.compact()
+    journal.unselect(1, "train")
+    journal.select(2)
+    journal.compact()
+    assert not snapshot_path("train", paths[1]).exists()
+    assert journal.lines == 1
+    assert not journal.needs_compaction()
+    journal.close()
+
+    assert paths[0].read_text().splitlines()[0].startswith("# compacted ")
+    assert read_selection(None, *paths) == [2]
+
+
+def test_plain_selection_lists_are_adopted(paths):
+    paths[1].write_text("5\n6\n")
+    assert read_selection(None, *paths) == [5, 6]
+
+    journal = SelectionJournal(*paths)
+    assert journal.is_selected(5) and journal.is_selected(6)
+    journal.close()
+    assert paths[0].exists()
+    assert read_selection(None, *paths) == [5, 6]
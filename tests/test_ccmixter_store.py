@@ -0,0 +1,104 @@
+import hashlib
+
+import pytest
+
+from ccmixter_store import AudioStore, PreviewCache
+
+
+def add_file(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return path, hashlib.sha256(content).hexdigest()
+
+
+@pytest.fixture
+def root(tmp_path):
+    return tmp_path / "store"
+
+
+def test_url_index_merges_writes_from_several_stores(tmp_path, root):
+    first, second = AudioStore(root), AudioStore(root)
+    path_a, sha_a = add_file(tmp_path, "a.mp3", b"a")
+    path_b, sha_b = add_file(tmp_path, "b.mp3", b"b")
+    first.add(path_a, sha_a, "http://example.com/a.mp3")
+    # second has not seen a.mp3; saving must not drop it.
+    second.add(path_b, sha_b, "http://example.com/b.mp3")
+
+    assert AudioStore(root).urls == {"http://example.com/a.mp3": sha_a, "http://example.com/b.mp3": sha_b}
+    assert first.lookup_url("http://example.com/b.mp3") == sha_b
+
+    first.discard(sha_b)
+    assert second.lookup_url("http://example.com/b.mp3") is None
+    assert second.lookup_url("http://example.com/a.mp3") == sha_a
+
+
+def test_lookup_url_needs_the_object(tmp_path, root):
+    store = AudioStore(root)
+    path, sha256 = add_file(tmp_path, "a.mp3", b"a")
+    store.add(path, sha256, "http://example.com/a.mp3")
+    store.object_path(sha256).unlink()
+    assert store.lookup_url("http://example.com/a.mp3") is None
+
+
+def test_link_shares_one_object(tmp_path, root):
+    store = AudioStore(root)
+    path, sha256 = add_file(tmp_path, "1_1.mp3", b"audio")
+    store.adopt(path, sha256)
+    copy = store.link(sha256, tmp_path / "2_1.mp3")
+    assert copy.read_bytes() == b"audio"
+    assert store.object_path(sha256).stat().st_nlink == 3
+
+
+def test_release_keeps_linked_objects(tmp_path, root):
+    store = AudioStore(root)
+    kept, kept_sha = add_file(tmp_path, "kept.mp3", b"kept")
+    store.adopt(kept, kept_sha)
+    loose, loose_sha = add_file(tmp_path, "loose.mp3", b"loose")
+    store.add(loose, loose_sha, move=True)
+
+    store.release(kept_sha)
+    store.release(loose_sha)
+    assert store.object_path(kept_sha).exists()
+    assert not store.object_path(loose_sha).exists()
+
+
+def test_preview_caches_merge_and_evict_least_recently_played(tmp_path, root):
+    store = AudioStore(root)
+    first, second = PreviewCache(store, max_bytes=10), PreviewCache(AudioStore(root), max_bytes=10)
+    shas = []
+    for i, cache in enumerate([first, second, first]):
+        path, sha256 = add_file(tmp_path, f"{i}.mp3", bytes([i]) * 4)
+        cache.put(path, sha256, f"http://example.com/{i}.mp3")
+        shas.append(sha256)
+
+    # 12 bytes over a 10-byte budget: the oldest preview, put by the other cache, goes.
+    assert list(first.entries) == shas[1:]
+    assert not store.object_path(shas[0]).exists()
+    assert first.lookup("http://example.com/0.mp3") is None
+
+    assert second.lookup("http://example.com/1.mp3") == shas[1]
+    second.close()
+    path, sha256 = add_file(tmp_path, "3.mp3", b"3333")
+    first.put(path, sha256, "http://example.com/3.mp3")
+    assert list(first.entries) == [shas[1], sha256]
+
+
+def test_preview_cache_spares_pinned_and_linked_audio(tmp_path, root):
+    store = AudioStore(root)
+    cache = PreviewCache(store, max_bytes=4)
+    linked, linked_sha = add_file(tmp_path, "linked.mp3", b"link")
+    cache.put(linked, linked_sha, "http://example.com/linked.mp3")
+    store.link(linked_sha, tmp_path / "music.mp3")
+    cache.pinned = {linked_sha}
+
+    path, sha256 = add_file(tmp_path, "new.mp3", b"newer")
+    cache.put(path, sha256, "http://example.com/new.mp3")
+    assert list(cache.entries) == [linked_sha]
+    assert not store.object_path(sha256).exists()
+
+    cache.pinned = set()
+    path, other = add_file(tmp_path, "other.mp3", b"abcd")
+    cache.put(path, other, "http://example.com/other.mp3")
+    assert list(cache.entries) == [other]
+    # Evicted from the cache, but still linked into the music directory.
+    assert store.object_path(linked_sha).exists()
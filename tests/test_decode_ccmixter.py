@@ -0,0 +1,54 @@
+import hashlib
+import os
+import struct
+
+import pytest
+
+from decode_ccmixter import HEADER, HEADER_SIZE, MAGIC, is_current, open_pcm, pcm_path
+
+
+def write_pcm(path, source_path, samples, sample_rate=16000):
+    stat = os.stat(source_path)
+    digest = hashlib.sha256(source_path.read_bytes()).digest()
+    header = HEADER.pack(MAGIC, sample_rate, 1, 2, len(samples), stat.st_size, stat.st_mtime_ns, digest)
+    path.write_bytes(header.ljust(HEADER_SIZE, b"\0") + struct.pack(f"<{len(samples)}h", *samples))
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "1_1.mp3"
+    path.write_bytes(b"source audio")
+    return path
+
+
+def test_windows_are_slices_of_the_samples(source, tmp_path):
+    output = pcm_path(source, tmp_path)
+    assert output.name == "1_1.pcm"
+    write_pcm(output, source, list(range(-8000, 8000)), sample_rate=8000)
+    with open_pcm(output) as pcm:
+        assert (pcm.sample_rate, pcm.channels, pcm.frames, pcm.duration) == (8000, 1, 16000, 2.0)
+        assert pcm.window(1.0, 1.5).tolist() == list(range(0, 4000))
+        assert len(pcm.window(1.5)) == 4000
+        assert len(pcm.window(3.0, 4.0)) == 0
+
+
+def test_open_pcm_rejects_other_files(tmp_path):
+    path = tmp_path / "other.pcm"
+    path.write_bytes(b"\0" * HEADER_SIZE)
+    with pytest.raises(ValueError):
+        open_pcm(path)
+
+
+def test_is_current(source, tmp_path):
+    output = pcm_path(source, tmp_path)
+    assert not is_current(source, output, 16000)
+    write_pcm(output, source, [0] * 16)
+    assert is_current(source, output, 16000)
+    assert not is_current(source, output, 22050)
+
+    # Touched but unchanged: the checksum still matches.
+    os.utime(source, ns=(0, 0))
+    assert is_current(source, output, 16000)
+    source.write_bytes(b"other audio!")
+    os.utime(source, ns=(0, 0))
+    assert not is_current(source, output, 16000)
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from fetch_ccmixter import decode_content, iter_json_array, repair_value
+
+
+def test_iter_json_array_yields_each_element():
+    text = ' [ {"upload_id": 2, "tags": ["a", "b"]} ,\n{"upload_id": 1} ] '
+    assert list(iter_json_array(text)) == [{"upload_id": 2, "tags": ["a", "b"]}, {"upload_id": 1}]
+
+
+def test_iter_json_array_empty():
+    assert list(iter_json_array("[]")) == []
+    assert list(iter_json_array(" [ \n ] ")) == []
+
+
+def test_iter_json_array_repairs_leading_zeros():
+    text = '[{"upload_id": 1, "bpm": 090}, {"bpm": -007.5, "name": "track 007"}]'
+    assert list(iter_json_array(text)) == [
+        {"upload_id": 1, "bpm": 90},
+        {"bpm": -7.5, "name": "track 007"},
+    ]
+
+
+@pytest.mark.parametrize("text", ['{"upload_id": 1}', '[{"upload_id": 1} {"upload_id": 2}]', '[{"upload_id": 1}'])
+def test_iter_json_array_rejects_malformed_input(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(text))
+
+
+def test_repair_value_stops_at_the_end_of_the_value():
+    text = '{"a": [00, 01], "b": "00"}, {"c": 1}'
+    fixed, pos = repair_value(text, 0)
+    assert json.loads(fixed) == {"a": [0, 1], "b": "00"}
+    assert text[pos:] == ', {"c": 1}'
+
+
+def test_repair_value_keeps_escaped_quotes_in_strings():
+    fixed, _ = repair_value(r'{"name": "say \"007\"", "n": 007}', 0)
+    assert json.loads(fixed) == {"name": 'say "007"', "n": 7}
+
+
+def test_repair_value_unterminated():
+    with pytest.raises(json.JSONDecodeError):
+        repair_value('{"a": 01', 0)
+
+
+def test_decode_content_falls_back_to_latin1():
+    assert decode_content("café".encode("utf-8"), "utf-8") == "café"
+    assert decode_content("café".encode("latin-1")) == "café"
+    assert decode_content("café".encode("utf-8"), "no-such-charset") == "café"
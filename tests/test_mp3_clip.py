@@ -0,0 +1,87 @@
+import pytest
+
+from conftest import FRAME_HEADER, FRAME_SIZE, mpeg_frames
+from mp3_clip import clip, clip_file, frame_index, info_frame, parse_header, parse_time, scan_frames
+
+FRAME_DURATION = 1152 / 44100
+
+
+@pytest.mark.parametrize("text, seconds", [
+    ("90", 90.0),
+    ("1.5", 1.5),
+    ("01:30", 90.0),
+    ("1:02:03.5", 3723.5),
+    ("[00:12]", 12.0),
+    (" [ 1:00:00 ] ", 3600.0),
+    (45, 45.0),
+])
+def test_parse_time(text, seconds):
+    assert parse_time(text) == seconds
+
+
+@pytest.mark.parametrize("text", ["", "1:2:3:4", "soon", "[12"])
+def test_parse_time_rejects(text):
+    with pytest.raises(ValueError):
+        parse_time(text)
+
+
+def test_parse_header():
+    version, layer, sample_rate, size, samples, mono = parse_header(FRAME_HEADER, 0)
+    assert (version, layer, sample_rate, size, samples, mono) == (1, 3, 44100, FRAME_SIZE, 1152, False)
+    assert parse_header(b"\xff\xfb\xf0\x00", 0) is None
+    assert parse_header(b"\x00\xfb\x90\x00", 0) is None
+
+
+def test_scan_frames_skips_tags_headers_and_junk():
+    tag = b"ID3\x04\x00\x00\x00\x00\x00\x10" + bytes(16)
+    junk = b"\xff\x00junk\xff\xfb"
+    data = tag + info_frame(FRAME_HEADER, 20, 20 * FRAME_SIZE, vbr=False) + mpeg_frames(10) + junk + mpeg_frames(10, 10)
+    offsets, sizes, first = scan_frames(data)
+    assert len(offsets) == 20
+    assert set(sizes) == {FRAME_SIZE}
+    assert first[2] == 44100
+    assert [int.from_bytes(data[offset + 4:offset + 8], "big") for offset in offsets] == list(range(20))
+
+
+def test_frame_index_is_cached_until_the_file_changes(write_mp3, tmp_path):
+    path = write_mp3("song.mp3", 50)
+    index = frame_index(path, tmp_path / "index")
+    assert len(index) == 50
+    assert index.duration == pytest.approx(50 * FRAME_DURATION)
+    assert list(frame_index(path, tmp_path / "index").offsets) == list(index.offsets)
+
+    path.write_bytes(mpeg_frames(30))
+    assert len(frame_index(path, tmp_path / "index")) == 30
+
+
+def test_frame_range(write_mp3, tmp_path):
+    index = frame_index(write_mp3("song.mp3", 50), tmp_path / "index")
+    assert index.frame_range(0) == (0, 50)
+    assert index.frame_range(10 * FRAME_DURATION + 0.001, 20 * FRAME_DURATION - 0.001) == (10, 20)
+    assert index.frame_range(100) == (50, 50)
+
+
+def test_clip_copies_whole_frames_behind_an_info_frame(write_mp3, tmp_path):
+    path = write_mp3("song.mp3", 50, id3=True)
+    index = frame_index(path, tmp_path / "index")
+    data = clip(path, 10 * FRAME_DURATION + 0.001, 20 * FRAME_DURATION - 0.001, index)
+
+    offsets, _, _ = scan_frames(data)
+    assert [int.from_bytes(data[offset + 4:offset + 8], "big") for offset in offsets] == list(range(10, 20))
+    header_size = offsets[0]
+    assert data[:header_size] == info_frame(FRAME_HEADER, 10, 10 * FRAME_SIZE, vbr=False)
+
+
+def test_clip_rejects_an_empty_range(write_mp3, tmp_path):
+    path = write_mp3("song.mp3", 50)
+    with pytest.raises(ValueError):
+        clip(path, 60, index=frame_index(path, tmp_path / "index"))
+
+
+def test_clip_file_reuses_the_clip(write_mp3, tmp_path):
+    path = write_mp3("song.mp3", 50)
+    first = clip_file(path, 0, 1, tmp_path / "clips", tmp_path / "index")
+    assert first.read_bytes() == clip(path, 0, 1, frame_index(path, tmp_path / "index"))
+    modified = first.stat().st_mtime_ns
+    assert clip_file(path, 0, 1, tmp_path / "clips", tmp_path / "index") == first
+    assert first.stat().st_mtime_ns == modified